@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.routers import admin, employee, documents, auth, files
+from backend.routers import admin, employee, documents, auth, files, uploads
 
 app = FastAPI(
     title="Warehouse Admin API",
@@ -21,3 +21,4 @@ app.include_router(employee.router, prefix="/employee", tags=["Employee"])
 app.include_router(documents.router, prefix="/documents", tags=["Documents"])
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(files.router, prefix="/files", tags=["File Uploads"])
+app.include_router(uploads.router)  # Already prefixed with /uploads
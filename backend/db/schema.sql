@@ -6,9 +6,27 @@ CREATE TABLE IF NOT EXISTS employee_info (
     contact_number VARCHAR(15),
     pan_number VARCHAR(10),
     aadhar_number VARCHAR(12),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1
 );
 
+-- Existing databases: semantic index snapshots catch up on rows changed since updated_at
+ALTER TABLE employee_info ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+CREATE INDEX IF NOT EXISTS ix_employee_info_updated_at ON employee_info (updated_at);
+
+-- Keyset pagination and exports order by (created_at, id); rows without a created_at would never be reached
+UPDATE employee_info SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+CREATE INDEX IF NOT EXISTS ix_employee_info_created_at_id ON employee_info (created_at, id);
+
+-- Fuzzy, typo-tolerant name / address search (backend/services/employee_search.py)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS ix_employee_info_name_trgm ON employee_info USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_employee_info_address_trgm ON employee_info USING gin (address gin_trgm_ops);
+
+-- Optimistic concurrency: writes carry If-Match "<id>-v<version>" and fail with 412 when stale
+ALTER TABLE employee_info ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
 CREATE TABLE IF NOT EXISTS employee_documents (
     id SERIAL PRIMARY KEY,
     employee_id INT REFERENCES employee_info(id) ON DELETE CASCADE,
@@ -20,3 +38,37 @@ CREATE TABLE IF NOT EXISTS employee_documents (
     form_16_or_it_returns TEXT,
     uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+-- Content-addressed document / file storage (backend/services/blob_store.py)
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 VARCHAR(64) PRIMARY KEY,
+    size BIGINT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Per-content cache of scan verdicts, extracted text, ...
+CREATE TABLE IF NOT EXISTS blob_derivatives (
+    sha256 VARCHAR(64) NOT NULL,
+    kind VARCHAR(50) NOT NULL,
+    value TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (sha256, kind)
+);
+
+CREATE TABLE IF NOT EXISTS files (
+    id SERIAL PRIMARY KEY,
+    filename VARCHAR(255) NOT NULL,
+    file_type VARCHAR(100) NOT NULL DEFAULT 'application/octet-stream',
+    sha256 VARCHAR(64) NOT NULL REFERENCES blobs(sha256),
+    path TEXT NOT NULL,
+    size BIGINT NOT NULL,
+    uploaded_by VARCHAR(100) NOT NULL,
+    upload_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1,
+    is_scanned BOOLEAN NOT NULL DEFAULT FALSE,
+    is_clean BOOLEAN
+);
+CREATE INDEX IF NOT EXISTS ix_files_filename ON files (filename);
+CREATE INDEX IF NOT EXISTS ix_files_sha256 ON files (sha256);
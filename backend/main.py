@@ -1,9 +1,17 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query
+from fastapi import FastAPI, APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from backend.schema_models import EmployeeInfo 
 from backend import database, models
+from backend.services import blob_store, employee_search, employee_sync, employee_write_service, identifier_lookup
+from backend.services.employee_write_service import EmployeeNotFound, StaleVersion
+from backend.utils import autocomplete, employee_cache, file_download, semantic_index
+from backend.utils.employee_export import export_stream
+from backend.utils.pagination import InvalidCursor, keyset_page
 
 router = APIRouter()
 
@@ -27,17 +35,17 @@ def serialize_employee(emp: EmployeeInfo) -> dict:
     return {
         
         "Trucker Name": emp.name,
-        "date_of_birth": emp.dob.isoformat() if emp.dob else None,
+        "date_of_birth": emp.date_of_birth.isoformat() if emp.date_of_birth else None,
         "Home Address": emp.address,
-        "contact_number": emp.contact,
-        "Driving License Number": emp.pan,
-        "aadhar_number": emp.aadhar,
+        "contact_number": emp.contact_number,
+        "Driving License Number": emp.pan_number,
+        "aadhar_number": emp.aadhar_number,
     }
 
 @router.post("/", response_model=dict)
-def create_employee(data: EmployeeCreate, db: Session = Depends(database.get_db)):
-    dob = datetime.strptime(data.date_of_birth, "%Y-%m-%d").date()
-    obj = models.EmployeeInfo(
+async def create_employee(data: EmployeeCreate, background_tasks: BackgroundTasks, db: AsyncSession = Depends(database.get_async_db)):
+    dob = datetime.strptime(data.dob, "%Y-%m-%d").date()
+    obj = EmployeeInfo(
         name=data.name,
         date_of_birth=dob,
         address=data.address,
@@ -46,8 +54,13 @@ def create_employee(data: EmployeeCreate, db: Session = Depends(database.get_db)
         aadhar_number=data.aadhar,
     )
     db.add(obj)
-    db.commit()
-    db.refresh(obj)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise _write_failed(e)
+    await db.refresh(obj)
+    background_tasks.add_task(employee_sync.employees_changed, [obj])
     try:
         return {"message": "Employee created", "id": obj.id}
     except Exception as e:
@@ -56,61 +69,143 @@ def create_employee(data: EmployeeCreate, db: Session = Depends(database.get_db)
 
 
 @router.get("/", response_model=list)
-def list_employees(db: Session = Depends(database.get_db)):
-    employees = db.query(models.EmployeeInfo).all()
+async def list_employees(
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    # Keyset pagination; the next page's cursor comes back in X-Next-Cursor
+    try:
+        employees, next_cursor = await keyset_page(db, select(EmployeeInfo), cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [serialize_employee(emp) for emp in employees]
 
-@router.get("/{employee_id}", response_model=dict)
-def get_employee(employee_id: int, db: Session = Depends(database.get_db)):
-    emp = db.query(EmployeeInfo).filter(EmployeeInfo.id == employee_id).first()
-    if not emp:
+@router.get("/export")
+def export_employees(format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    body, media_type = export_stream(format)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="employees.{format}"'},
+    )
+
+# Declared before /{employee_id} so "search" / "autocomplete" aren't parsed as IDs
+@router.get("/search/")
+async def search_employees(
+    name: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=employee_search.SEARCH_MAX_RESULTS),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    # Trigram-ranked, typo-tolerant; best match first
+    results = await employee_search.fuzzy_search(db, name, limit)
+    return [{**serialize_employee(emp), "id": emp.id, "score": score} for emp, score in results]
+
+@router.get("/lookup")
+async def lookup_employee(q: str = Query(..., min_length=1), db: AsyncSession = Depends(database.get_async_db)):
+    # PAN / Aadhaar / contact number, straight from the unique indexes
+    found = await identifier_lookup.lookup_async(db, q)
+    if found is None:
+        raise HTTPException(status_code=400, detail="Query is not a PAN, Aadhaar or contact number")
+    field, emp = found
+    if emp is None:
         raise HTTPException(status_code=404, detail="Employee not found")
-    return serialize_employee(emp)
+    return {"matched_field": field, **serialize_employee(emp), "id": emp.id}
 
-@router.put("/{employee_id}", response_model=dict)
-def update_employee(employee_id: int, data: EmployeeUpdate, db: Session = Depends(database.get_db)):
-    emp = db.query(EmployeeInfo).filter(EmployeeInfo.id == employee_id).first()
-    if not emp:
+@router.get("/autocomplete")
+def autocomplete_names(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=autocomplete.AUTOCOMPLETE_MAX_RESULTS)):
+    return autocomplete.complete(q, limit)
+
+@router.get("/{employee_id}", response_model=dict)
+async def get_employee(employee_id: int, request: Request, db: AsyncSession = Depends(database.get_async_db)):
+    # Cached serialized profile with an ETag; If-None-Match hits return 304 without touching the DB
+    async def load():
+        emp = await db.get(EmployeeInfo, employee_id)
+        return (serialize_employee(emp), emp.version) if emp else None
+
+    response = await employee_cache.cached_employee_response(request, "employee", employee_id, load)
+    if response is None:
         raise HTTPException(status_code=404, detail="Employee not found")
+    return response
 
+def _expected_version(request: Request, employee_id: int):
+    try:
+        return employee_cache.expected_version(request, employee_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _write_failed(error: Exception):
+    if isinstance(error, EmployeeNotFound):
+        return HTTPException(status_code=404, detail="Employee not found")
+    if isinstance(error, StaleVersion):
+        return HTTPException(
+            status_code=412,
+            detail="Employee was modified by someone else; reload it and retry",
+            headers={"ETag": employee_cache.etag_for(error.employee_id, error.current_version)},
+        )
+    if isinstance(error, IntegrityError):
+        return HTTPException(status_code=409, detail="Another employee already has this PAN, Aadhaar or contact number")
+    print("❌ ERROR:", str(error))
+    return HTTPException(status_code=500, detail="Internal server error")
+
+@router.put("/{employee_id}", response_model=dict)
+async def update_employee(employee_id: int, data: EmployeeUpdate, request: Request, response: Response, background_tasks: BackgroundTasks, db: AsyncSession = Depends(database.get_async_db)):
+    # One UPDATE ... RETURNING; If-Match: "<id>-v<version>" turns a stale write into a 412
+    fields = {}
     if data.name is not None:
-        emp.name = data.name
-    if data.date_of_birth is not None:
-        emp.date_of_birth = datetime.strptime(data.date_of_birth, "%Y-%m-%d").date()
+        fields["name"] = data.name
+    if data.dob is not None:
+        fields["date_of_birth"] = datetime.strptime(data.dob, "%Y-%m-%d").date()
     if data.address is not None:
-        emp.address = data.address
+        fields["address"] = data.address
     if data.contact is not None:
-        emp.contact = data.contact
-    if data.pan_number is not None:
-        emp.pan = data.pan
+        fields["contact_number"] = data.contact
+    if data.pan is not None:
+        fields["pan_number"] = data.pan
     if data.aadhar is not None:
-        emp.aadhar = data
+        fields["aadhar_number"] = data.aadhar
 
-    db.commit()
-    db.refresh(emp)
-    return {"message": "Employee updated", "id": emp.id}
+    try:
+        emp = await employee_write_service.update_employee(db, employee_id, fields, _expected_version(request, employee_id))
+    except (EmployeeNotFound, StaleVersion, IntegrityError) as e:
+        raise _write_failed(e)
+    employee_cache.invalidate(employee_id)
+    background_tasks.add_task(employee_sync.employees_changed, [emp])
+    response.headers["ETag"] = employee_cache.etag_for(emp.id, emp.version)
+    return {"message": "Employee updated", "id": emp.id, "version": emp.version}
 
 @router.delete("/{employee_id}", response_model=dict)
-def delete_employee(employee_id: int, db: Session = Depends(database.get_db)):
-    emp = db.query(EmployeeInfo).filter(EmployeeInfo.id == employee_id).first()
-    if not emp:
-        raise HTTPException(status_code=404, detail="Employee not found")
-
-    db.delete(emp)
-    db.commit()
+async def delete_employee(employee_id: int, request: Request, background_tasks: BackgroundTasks, db: AsyncSession = Depends(database.get_async_db)):
+    try:
+        freed = await employee_write_service.delete_employee(db, employee_id, _expected_version(request, employee_id))
+    except (EmployeeNotFound, StaleVersion) as e:
+        raise _write_failed(e)
+    employee_cache.invalidate(employee_id)
+    file_download.invalidate_documents(employee_id)
+    background_tasks.add_task(employee_sync.employees_deleted, [employee_id])
+    background_tasks.add_task(blob_store.discard, freed)
     return {"message": "Employee deleted", "id": employee_id}
 
-@router.get("/search/")
-def search_employees(name: str = Query(..., min_length=1), db: Session = Depends(database.get_db)):
-    results = db.query(EmployeeInfo).filter(EmployeeInfo.name.ilike(f"%{name}%")).all()
-    return [serialize_employee(emp) for emp in results]
 
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 import os
 
+from backend.routers import search, stats
+
 app = FastAPI()
 app.include_router(router, prefix="/employee", tags=["Employee"])
+app.include_router(search.router, tags=["Semantic Search"])
+app.include_router(stats.router)
+
+# 👇 Warm the semantic model and index in the background; /semantic-search/ready reports progress
+@app.on_event("startup")
+def warm_semantic_index():
+    if os.getenv("SEMANTIC_WARMUP", "1") == "1":
+        semantic_index.start_warm_up()
 
 # 👇 Mount frontend folder
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
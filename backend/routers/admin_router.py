@@ -1,6 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from backend import database, models # Assuming backend is your project root or a package
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend import database # Assuming backend is your project root or a package
+from backend.schema_models import EmployeeDocuments, EmployeeInfo
+from backend.services import blob_store, employee_sync
+from backend.utils import employee_cache, file_download
+from backend.utils.employee_export import export_stream
+from backend.utils.pagination import InvalidCursor, keyset_page
 
 # No need for: from . import admin_router as router
 # Just define the APIRouter directly
@@ -8,50 +15,85 @@ from backend import database, models # Assuming backend is your project root or
 router = APIRouter(prefix="/admin", tags=["Admin Panel"])
 
 @router.get("/employees")
-def view_employees(db: Session = Depends(database.get_db)):
+async def view_employees(
+    response: Response,
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(database.get_async_db),
+):
     """
-    Retrieves all employee information.
+    Retrieves employee information one page at a time, ordered by (created_at, id).
+    The next page's cursor is returned in the X-Next-Cursor header.
+    Use /admin/employees/export for the whole table.
     """
-    return db.query(models.EmployeeInfo).all()
+    try:
+        employees, next_cursor = await keyset_page(db, select(EmployeeInfo), cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return employees
+
+@router.get("/employees/export")
+def export_employees(format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """
+    Streams all employee information as NDJSON or CSV with constant memory.
+    """
+    body, media_type = export_stream(format)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="employees.{format}"'},
+    )
 
 @router.get("/documents")
-def view_documents(db: Session = Depends(database.get_db)):
+async def view_documents(db: AsyncSession = Depends(database.get_async_db)):
     """
     Retrieves all employee documents information.
     """
-    return db.query(models.EmployeeDocuments).all()
+    return (await db.execute(select(EmployeeDocuments))).scalars().all()
 
 @router.get("/employee/{emp_id}")
-def get_employee(emp_id: int, db: Session = Depends(database.get_db)):
+async def get_employee(emp_id: int, db: AsyncSession = Depends(database.get_async_db)):
     """
     Retrieves details for a specific employee by ID.
     """
-    employee = db.query(models.EmployeeInfo).filter(models.EmployeeInfo.id == emp_id).first()
+    employee = await db.get(EmployeeInfo, emp_id)
     if not employee:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found")
     return employee
 
 @router.get("/documents/{emp_id}")
-def get_employee_documents(emp_id: int, db: Session = Depends(database.get_db)):
+async def get_employee_documents(emp_id: int, db: AsyncSession = Depends(database.get_async_db)):
     """
     Retrieves documents for a specific employee by ID.
     """
-    documents = db.query(models.EmployeeDocuments).filter(models.EmployeeDocuments.employee_id == emp_id).first()
+    documents = (await db.execute(
+        select(EmployeeDocuments).where(EmployeeDocuments.employee_id == emp_id).limit(1)
+    )).scalars().first()
     if not documents:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Documents not found for this employee")
     return documents
 
 @router.delete("/employee/{emp_id}", status_code=status.HTTP_200_OK)
-def delete_employee(emp_id: int, db: Session = Depends(database.get_db)):
+async def delete_employee(emp_id: int, background_tasks: BackgroundTasks, db: AsyncSession = Depends(database.get_async_db)):
     """
     Deletes an employee by ID.
     """
-    obj = db.query(models.EmployeeInfo).filter(models.EmployeeInfo.id == emp_id).first()
+    obj = await db.get(EmployeeInfo, emp_id)
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found")
     
-    db.delete(obj)
-    db.commit()
+    documents = (await db.execute(
+        blob_store.document_paths_statement(EmployeeDocuments.employee_id == emp_id)
+    )).all()
+    freed = await blob_store.release(db, [path for row in documents for path in row])
+    await db.delete(obj)  # passive_deletes: documents go through ON DELETE CASCADE, not a lazy load
+    await db.commit()
+    employee_cache.invalidate(emp_id)
+    file_download.invalidate_documents(emp_id)
+    background_tasks.add_task(employee_sync.employees_deleted, [emp_id])
+    background_tasks.add_task(blob_store.discard, freed)
     # Optionally, you might want to refresh the object to ensure it's detached from the session,
     # or simply return a success message.
     # db.refresh(obj) # Not needed if you are just returning a message.
@@ -1,6 +1,8 @@
 # trucker_warehouse/backend/routers/auth.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 
 # Assuming database includes your get_db function
@@ -34,7 +36,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
     summary="Register a new user",
     description="Registers a new user with email, password, and an optional role. Returns the created user's details (email and role)."
 )
-def signup(user: UserCreate, db: Session = Depends(database.get_db)):
+async def signup(user: UserCreate, db: AsyncSession = Depends(database.get_async_db)):
     """
     Handles user registration by creating a new user in the database.
     - Checks if the email is already registered using the UserRole ORM model.
@@ -43,23 +45,24 @@ def signup(user: UserCreate, db: Session = Depends(database.get_db)):
     - Returns the created user's email and role.
     """
     # Use the imported UserRole ORM model for database queries
-    existing_user = db.query(UserRole).filter(UserRole.email == user.email).first()
+    existing_user = (await db.execute(select(UserRole).where(UserRole.email == user.email))).scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered."
         )
 
-    hashed_pw = hash_password(user.password)
+    # bcrypt is deliberately slow; keep it off the event loop
+    hashed_pw = await run_in_threadpool(hash_password, user.password)
     # Create a new UserRole instance using data from UserCreate
     new_user = UserRole(email=user.email, hashed_password=hashed_pw, role=user.role)
 
     try:
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user) # Refresh to get the generated ID and any default values
+        await db.commit()
+        await db.refresh(new_user) # Refresh to get the generated ID and any default values
     except Exception as e:
-        db.rollback() # Rollback in case of an error during commit
+        await db.rollback() # Rollback in case of an error during commit
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred during user creation: {e}"
@@ -73,17 +76,17 @@ def signup(user: UserCreate, db: Session = Depends(database.get_db)):
     summary="Authenticate user and get access token",
     description="Authenticates a user with email and password. Returns an access token upon successful login."
 )
-def login(user: UserLogin, db: Session = Depends(database.get_db)):
+async def login(user: UserLogin, db: AsyncSession = Depends(database.get_async_db)):
     """
     Authenticates a user and generates a JWT access token.
     - Verifies email and password against stored credentials using the UserRole ORM model.
     - Returns an access token for subsequent authenticated requests.
     """
     # Use the imported UserRole ORM model for database queries
-    db_user = db.query(UserRole).filter(UserRole.email == user.email).first()
+    db_user = (await db.execute(select(UserRole).where(UserRole.email == user.email))).scalars().first()
 
     # Check if user exists and password is correct
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    if not db_user or not await run_in_threadpool(verify_password, user.password, db_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials.",
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Request, Response, status
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
+import asyncio
 import shutil
 import os
+import time
 from datetime import datetime
 
 # Assuming 'backend' is your project root and contains database.py and models.py
 # Make sure your import paths are correct relative to where this file will be located
-from backend import database, models
+from backend import database
+from backend.database import get_async_db
+from backend.schema_models import EmployeeDocuments, EmployeeInfo
+from backend.services import blob_store
+from backend.utils import employee_cache, file_download
+from backend.utils.file_utils import FileTooLarge, run_io
 
 router = APIRouter(
     prefix="/documents",  # All routes under this router will be prefixed with /documents
@@ -17,6 +25,8 @@ router = APIRouter(
 
 # --- Configuration ---
 UPLOAD_DIR = "uploads"
+# Document slots of one request stored at the same time
+DOCUMENT_UPLOAD_CONCURRENCY = int(os.getenv("DOCUMENT_UPLOAD_CONCURRENCY", "3"))
 # Ensure the upload directory exists
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
@@ -52,34 +62,171 @@ def get_db():
 
 # --- Helper Function for File Saving ---
 
-def save_uploaded_file(file: UploadFile, employee_id: int) -> str:
+# Upload fields of EmployeeDocuments, in form order
+DOCUMENT_FIELDS = (
+    "resume",
+    "educational_certificates",
+    "offer_letters",
+    "pan_card",
+    "aadhar_card",
+    "form_16_or_it_returns",
+)
+
+async def _run_slots(work: dict, semaphore: asyncio.Semaphore, timings: dict) -> dict:
     """
-    Saves an uploaded file to the UPLOAD_DIR within a subdirectory for the employee.
-    Returns the relative path to the saved file.
+    Awaits {document field: coroutine} concurrently, at most `semaphore` at a
+    time, adding each slot's time to `timings`. Waits for every slot even if
+    one fails, so the caller's cleanup sees all the files that were written.
     """
-    # Create a unique subdirectory for each employee's documents
-    employee_upload_dir = os.path.join(UPLOAD_DIR, str(employee_id))
-    os.makedirs(employee_upload_dir, exist_ok=True)
+    async def timed(doc_field, coro):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                timings[doc_field] = timings.get(doc_field, 0.0) + (time.perf_counter() - start) * 1000
 
-    # Sanitize filename to prevent directory traversal attacks
+    results = await asyncio.gather(*(timed(f, coro) for f, coro in work.items()), return_exceptions=True)
+    return dict(zip(work, results))
+
+def _slot_error(doc_field: str, file: UploadFile, error: Exception) -> HTTPException:
     filename = os.path.basename(file.filename)
-    # Optional: Add a UUID to filename to prevent collisions for same filename uploads
-    # import uuid
-    # file_extension = os.path.splitext(filename)[1]
-    # unique_filename = f"{uuid.uuid4()}{file_extension}"
-    # file_path = os.path.join(employee_upload_dir, unique_filename)
+    if isinstance(error, FileTooLarge):
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"{doc_field} '{filename}': {error}"
+        )
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Failed to save {doc_field} '{filename}': {str(error)}"
+    )
 
-    file_path = os.path.join(employee_upload_dir, filename)
+async def save_uploaded_files(db: AsyncSession, uploads: dict, timings: dict) -> dict:
+    """
+    Stores the provided document slots ({document field: UploadFile}) in the
+    content-addressed blob store, taking one reference per slot in the
+    current transaction. Returns ({document field: blob path}, created): the
+    paths of blobs this request created, for attach_documents() to remove if
+    its commit fails.
+
+    Slots are streamed to staging files and hashed in the same pass,
+    concurrently (DOCUMENT_UPLOAD_CONCURRENCY at a time); the session is only
+    used after that, one statement at a time. Per-slot times in ms
+    are added to `timings`. If any slot fails, the transaction is rolled back
+    and every file written for this request is removed before the
+    HTTPException for that slot is raised.
+    """
+    semaphore = asyncio.Semaphore(DOCUMENT_UPLOAD_CONCURRENCY)
+    written = []  # staged files and newly created blobs, removed on failure
+    created_paths = []
+
+    def first_failure(results: dict):
+        for doc_field, result in results.items():
+            if isinstance(result, Exception):
+                return _slot_error(doc_field, uploads[doc_field], result)
+        return None
 
     try:
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        # 1. Stream every slot to a staging file, hashing it on the way (one read per upload)
+        staged = await _run_slots({f: blob_store.stage_upload(file) for f, file in uploads.items()}, semaphore, timings)
+        written.extend(result.path for result in staged.values() if not isinstance(result, Exception))
+        if failure := first_failure(staged):
+            raise failure
+
+        # 2. Take them into the store (one session, so one after the other);
+        #    content that's already stored only gains a reference
+        stored_paths = {}
+        for doc_field, stored in staged.items():
+            path, created = await blob_store.adopt(db, stored, uploads[doc_field].filename)
+            if created:
+                written.append(path)
+                created_paths.append(path)
+            stored_paths[doc_field] = path
+    except BaseException as e:
+        await db.rollback()
+        await run_io(blob_store.discard, written)
+        if isinstance(e, Exception) and not isinstance(e, HTTPException):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to save documents: {str(e)}"
+            )
+        raise
+    return stored_paths, created_paths
+
+def server_timing(timings: dict) -> str:
+    """
+    Server-Timing header value for per-slot and per-phase times in ms.
+    """
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in timings.items())
+
+async def get_documents_record(db: AsyncSession, employee_id: int):
+    """
+    The EmployeeDocuments row of an employee, or None.
+    """
+    result = await db.execute(
+        select(EmployeeDocuments).where(EmployeeDocuments.employee_id == employee_id).limit(1)
+    )
+    return result.scalars().first()
+
+async def attach_documents(db: AsyncSession, employee_id: int, stored_paths: dict, created_paths=()):
+    """
+    Stores document blob paths ({document field: path}) on the employee's
+    documents record, creating the record if needed, releases the blobs they
+    replace and commits. Shared by the multipart uploads and finalized
+    resumable uploads.
+
+    `created_paths` are the blobs this transaction created (see
+    blob_store.adopt()); their files are removed if it rolls back.
+    """
+    # Check if a document record already exists for this employee
+    db_documents = await get_documents_record(db, employee_id)
+
+    if not db_documents:
+        # Create a new document entry if none exists
+        db_documents = EmployeeDocuments(employee_id=employee_id)
+        db_documents.uploaded_at = datetime.now()
+
+    db_documents.updated_at = datetime.now() # Always update timestamp on file upload/update
+    replaced = [getattr(db_documents, doc_field, None) for doc_field in stored_paths]
+    for doc_field, file_path in stored_paths.items():
+        setattr(db_documents, doc_field, file_path) # Store the path in the database
+
+    try:
+        freed = await blob_store.release(db, replaced)
+        db.add(db_documents)
+        await db.commit()
+        await db.refresh(db_documents)
+        employee_cache.invalidate(employee_id)
+        file_download.invalidate(*(file_download.document_key(employee_id, doc_field) for doc_field in stored_paths))
+        await run_io(blob_store.discard, freed)
+    except IntegrityError:
+        await db.rollback()
+        await run_io(blob_store.discard, created_paths)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Document entry already exists for this employee, use PUT to update."
+        )
     except Exception as e:
+        await db.rollback()
+        await run_io(blob_store.discard, created_paths)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to save file '{filename}': {str(e)}"
+            detail=f"Failed to save document record: {str(e)}"
         )
-    return file_path # Return the full path relative to the server root for storage
+    return db_documents
+
+async def _store_and_attach(db: AsyncSession, employee_id: int, uploads: dict, response: Response):
+    """
+    save_uploaded_files() + attach_documents(), reporting the time of each
+    slot and of the record commit in a Server-Timing header.
+    """
+    timings = {}
+    stored_paths, created_paths = await save_uploaded_files(db, uploads, timings)
+    start = time.perf_counter()
+    record = await attach_documents(db, employee_id, stored_paths, created_paths)
+    timings["commit"] = (time.perf_counter() - start) * 1000
+    response.headers["Server-Timing"] = server_timing(timings)
+    return record
 
 # --- CRUD Endpoints ---
 
@@ -87,40 +234,29 @@ def save_uploaded_file(file: UploadFile, employee_id: int) -> str:
 # 🚀 Endpoint: Upload (Create) Documents
 # ---------------------
 @router.post("/{employee_id}", response_model=DocumentOut, status_code=status.HTTP_201_CREATED)
-def upload_employee_documents(
+async def upload_employee_documents(
     employee_id: int,
+    response: Response,
     resume: UploadFile = File(None, description="Employee's resume"), # Made optional
     educational_certificates: UploadFile = File(None, description="Educational certificates"),
     offer_letters: UploadFile = File(None, description="Offer letters from previous employers"),
     pan_card: UploadFile = File(None, description="PAN Card copy"),
     aadhar_card: UploadFile = File(None, description="Aadhar Card copy"),
     form_16_or_it_returns: UploadFile = File(None, description="Form 16 or Income Tax Returns"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Uploads multiple documents for a specific employee.
     If documents for the employee already exist, they will be updated/overwritten.
     """
     # Check if employee exists
-    employee = db.query(models.EmployeeInfo).filter(models.EmployeeInfo.id == employee_id).first()
+    employee = await db.get(EmployeeInfo, employee_id)
     if not employee:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Employee with ID {employee_id} not found."
         )
 
-    # Check if a document record already exists for this employee
-    db_documents = db.query(models.EmployeeDocuments).filter(
-        models.EmployeeDocuments.employee_id == employee_id
-    ).first()
-
-    if not db_documents:
-        # Create a new document entry if none exists
-        db_documents = models.EmployeeDocuments(employee_id=employee_id)
-        db_documents.uploaded_at = datetime.now()
-    
-    db_documents.updated_at = datetime.now() # Always update timestamp on file upload/update
-
     # Dictionary to map schema fields to uploaded files
     files_to_process = {
         "resume": resume,
@@ -131,50 +267,19 @@ def upload_employee_documents(
         "form_16_or_it_returns": form_16_or_it_returns,
     }
 
-    # Process each uploaded file
-    for doc_field, uploaded_file in files_to_process.items():
-        if uploaded_file and uploaded_file.filename: # Ensure a file was actually provided
-            try:
-                file_path = save_uploaded_file(uploaded_file, employee_id)
-                setattr(db_documents, doc_field, file_path) # Store the path in the database
-            except HTTPException as e:
-                # Re-raise HTTPExceptions from save_uploaded_file
-                raise e
-            except Exception as e:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Error processing {doc_field}: {str(e)}"
-                )
-
-    try:
-        db.add(db_documents)
-        db.commit()
-        db.refresh(db_documents)
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Document entry already exists for this employee, use PUT to update."
-        )
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to save document record: {str(e)}"
-        )
-    return db_documents
+    # Store the provided files concurrently, then save the record once
+    uploads = {f: file for f, file in files_to_process.items() if file and file.filename} # Ensure a file was actually provided
+    return await _store_and_attach(db, employee_id, uploads, response)
 
 # ---------------------
 # 📋 Endpoint: Get Documents by Employee ID
 # ---------------------
 @router.get("/{employee_id}", response_model=DocumentOut)
-def get_employee_documents(employee_id: int, db: Session = Depends(get_db)):
+async def get_employee_documents(employee_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieves document paths for a specific employee.
     """
-    documents = db.query(models.EmployeeDocuments).filter(
-        models.EmployeeDocuments.employee_id == employee_id
-    ).first()
+    documents = await get_documents_record(db, employee_id)
     if not documents:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -186,29 +291,26 @@ def get_employee_documents(employee_id: int, db: Session = Depends(get_db)):
 # ✏️ Endpoint: Update Documents (Partial Upload)
 # ---------------------
 @router.put("/{employee_id}", response_model=DocumentOut)
-def update_employee_documents(
+async def update_employee_documents(
     employee_id: int,
+    response: Response,
     resume: UploadFile = File(None, description="Employee's resume"),
     educational_certificates: UploadFile = File(None, description="Educational certificates"),
     offer_letters: UploadFile = File(None, description="Offer letters from previous employers"),
     pan_card: UploadFile = File(None, description="PAN Card copy"),
     aadhar_card: UploadFile = File(None, description="Aadhar Card copy"),
     form_16_or_it_returns: UploadFile = File(None, description="Form 16 or Income Tax Returns"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Updates specific documents for an existing employee. Only provided files will be updated.
     """
-    db_documents = db.query(models.EmployeeDocuments).filter(
-        models.EmployeeDocuments.employee_id == employee_id
-    ).first()
+    db_documents = await get_documents_record(db, employee_id)
     if not db_documents:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Documents for employee ID {employee_id} not found. Use POST to upload first."
         )
-    
-    db_documents.updated_at = datetime.now()
 
     files_to_process = {
         "resume": resume,
@@ -219,42 +321,19 @@ def update_employee_documents(
         "form_16_or_it_returns": form_16_or_it_returns,
     }
 
-    for doc_field, uploaded_file in files_to_process.items():
-        if uploaded_file and uploaded_file.filename: # Only process if a new file is provided for this field
-            try:
-                file_path = save_uploaded_file(uploaded_file, employee_id)
-                setattr(db_documents, doc_field, file_path)
-            except HTTPException as e:
-                raise e
-            except Exception as e:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Error processing {doc_field}: {str(e)}"
-                )
-
-    try:
-        db.add(db_documents)
-        db.commit()
-        db.refresh(db_documents)
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to update document record: {str(e)}"
-        )
-    return db_documents
+    uploads = {f: file for f, file in files_to_process.items() if file and file.filename} # Only process if a new file is provided for this field
+    # Replaced documents drop their blob reference
+    return await _store_and_attach(db, employee_id, uploads, response)
 
 # ---------------------
 # 🗑️ Endpoint: Delete All Documents for an Employee
 # ---------------------
 @router.delete("/{employee_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_employee_documents(employee_id: int, db: Session = Depends(get_db)):
+async def delete_employee_documents(employee_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Deletes all document records and associated files for a specific employee.
     """
-    db_documents = db.query(models.EmployeeDocuments).filter(
-        models.EmployeeDocuments.employee_id == employee_id
-    ).first()
+    db_documents = await get_documents_record(db, employee_id)
     if not db_documents:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -262,16 +341,22 @@ def delete_employee_documents(employee_id: int, db: Session = Depends(get_db)):
         )
 
     try:
-        # Delete the physical files from the server
-        employee_doc_dir = os.path.join(UPLOAD_DIR, str(employee_id))
-        if os.path.exists(employee_doc_dir):
-            shutil.rmtree(employee_doc_dir) # Recursively delete the employee's document directory
+        # Drop this record's blob references; content no one else uses is freed
+        freed = await blob_store.release(db, [getattr(db_documents, doc_field) for doc_field in DOCUMENT_FIELDS])
 
         # Delete the database record
-        db.delete(db_documents)
-        db.commit()
+        await db.delete(db_documents)
+        await db.commit()
+        employee_cache.invalidate(employee_id)
+        file_download.invalidate_documents(employee_id)
+
+        # Delete the physical files from the server once the commit made them unreachable
+        await run_io(blob_store.discard, freed)
+        employee_doc_dir = os.path.join(UPLOAD_DIR, str(employee_id))  # Pre-blob-store uploads
+        if os.path.exists(employee_doc_dir):
+            await run_io(shutil.rmtree, employee_doc_dir) # Recursively delete the employee's document directory
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete document record or files: {str(e)}"
@@ -285,46 +370,49 @@ def delete_employee_documents(employee_id: int, db: Session = Depends(get_db)):
 from fastapi.responses import FileResponse
 
 @router.get("/{employee_id}/{document_type}", response_class=FileResponse)
-def download_employee_document(employee_id: int, document_type: str, db: Session = Depends(get_db)):
+async def download_employee_document(employee_id: int, document_type: str, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Downloads a specific document for an employee.
     Document types: resume, educational_certificates, offer_letters, pan_card, aadhar_card, form_16_or_it_returns.
+    Supports Range requests (206) and conditional requests (ETag / Last-Modified, 304);
+    repeat downloads are served without a database query.
     """
-    db_documents = db.query(models.EmployeeDocuments).filter(
-        models.EmployeeDocuments.employee_id == employee_id
-    ).first()
-    if not db_documents:
+    if document_type not in DOCUMENT_FIELDS:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Documents for employee ID {employee_id} not found."
+            detail=f"Document type '{document_type}' not found for employee ID {employee_id}."
         )
 
-    # Get the file path from the database record
-    file_path = getattr(db_documents, document_type, None)
-
-    if not file_path:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Document type '{document_type}' not found for employee ID {employee_id}."
+    async def load():
+        db_documents = await get_documents_record(db, employee_id)
+        if not db_documents:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Documents for employee ID {employee_id} not found."
+            )
+
+        # Get the file path from the database record
+        file_path = getattr(db_documents, document_type, None)
+        if not file_path:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Document type '{document_type}' not found for employee ID {employee_id}."
+            )
+
+        # Blob names are content hashes; name the download after the document instead
+        filename = f"{document_type}{os.path.splitext(file_path)[1]}" if blob_store.is_blob_path(file_path) else os.path.basename(file_path)
+        return file_download.DownloadMeta(
+            path=file_path,
+            filename=filename,
+            media_type=file_download.media_type_for(filename),
+            sha256=blob_store.sha256_of_path(file_path),
         )
 
+    response = await file_download.serve(request, file_download.document_key(employee_id, document_type), load)
     # Ensure the file actually exists on the server
-    if not os.path.exists(file_path):
+    if response is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"File not found on server at path: {file_path}. It might have been moved or deleted externally."
+            detail=f"File for '{document_type}' of employee ID {employee_id} not found on server. It might have been moved or deleted externally."
         )
-
-    # Determine media type dynamically or use a sensible default
-    media_type = "application/octet-stream" # Default for unknown binary files
-    if file_path.endswith(".pdf"):
-        media_type = "application/pdf"
-    elif file_path.endswith(".jpg") or file_path.endswith(".jpeg"):
-        media_type = "image/jpeg"
-    elif file_path.endswith(".png"):
-        media_type = "image/png"
-    elif file_path.endswith(".doc") or file_path.endswith(".docx"):
-        media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    # Add more as needed
-
-    return FileResponse(path=file_path, media_type=media_type, filename=os.path.basename(file_path))
+    return response
@@ -1,11 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import csv
+import os
+
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, date
 
 # Assuming 'backend' is your project root and contains database.py and models.py
 # Make sure your import paths are correct relative to where this file will be located
 from backend import database, models
+from backend.database import get_async_db
+from backend.schema_models import EmployeeInfo
+from backend.services import blob_store, employee_bulk_service, employee_search, employee_sync, employee_write_service, identifier_lookup
+from backend.services.employee_write_service import EmployeeNotFound, StaleVersion
+from backend.utils import autocomplete, employee_cache, file_download
+from backend.utils.employee_export import export_stream
+from backend.utils.pagination import InvalidCursor, keyset_page
+
+# Most IDs accepted by one bulk update / delete request
+BULK_MAX_ITEMS = int(os.getenv("EMPLOYEE_BULK_MAX_ITEMS", "5000"))
+
+# Reject single-employee writes that don't carry If-Match (428) instead of applying them unconditionally
+REQUIRE_IF_MATCH = os.getenv("EMPLOYEE_REQUIRE_IF_MATCH", "0") == "1"
 
 router = APIRouter(
     prefix="/employees", # All routes under this router will be prefixed with /employees
@@ -38,15 +58,33 @@ class EmployeeUpdate(EmployeeBase):
     aadhar_number: str | None = Field(None, pattern=r"^\d{12}$", example="987654321098")
 
 
+class EmployeeBulkUpdate(EmployeeUpdate):
+    """One entry of a bulk update: the employee ID plus only the fields to change."""
+    id: int
+
+class EmployeeBulkDelete(BaseModel):
+    ids: list[int] = Field(..., min_length=1, example=[101, 102, 103])
+
+
 class EmployeeOut(EmployeeBase):
     """Schema for returning employee data."""
     id: int
     created_at: datetime
     updated_at: datetime | None
+    version: int
 
     class Config:
         orm_mode = True
 
+class EmployeeSearchOut(EmployeeOut):
+    """An employee search hit with its similarity score (0-1)."""
+    score: float = 0.0
+
+class EmployeeLookupOut(BaseModel):
+    """An exact identifier match and which identifier it matched on."""
+    matched_field: str
+    employee: EmployeeOut
+
 # -------------------------------
 # 🚀 Dependency
 # -------------------------------
@@ -67,128 +105,323 @@ def get_db():
 # 🚀 Endpoint: Create Employee
 # ---------------------
 @router.post("/", response_model=EmployeeOut, status_code=status.HTTP_201_CREATED)
-def create_employee(data: EmployeeCreate, db: Session = Depends(get_db)):
+async def create_employee(data: EmployeeCreate, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
     """
-    Creates a new employee record.
+    Creates a new employee record and adds it to the semantic index.
     """
-    db_employee = models.EmployeeInfo(**data.model_dump())
+    db_employee = EmployeeInfo(**data.model_dump())
     db_employee.created_at = datetime.now() # Set creation timestamp
     db_employee.updated_at = datetime.now() # Initialize updated_at on creation
 
     try:
         db.add(db_employee)
-        db.commit()
-        db.refresh(db_employee)
+        await db.commit()
+        await db.refresh(db_employee)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create employee: {str(e)}"
         )
+    background_tasks.add_task(employee_sync.employees_changed, [db_employee])
     return db_employee
 
+# ---------------------
+# 📥 Endpoint: Bulk Import Employees
+# ---------------------
+@router.post("/bulk/import")
+def bulk_import_employees(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON (one employee per line)"),
+    format: str | None = Query(None, pattern="^(csv|ndjson)$", description="Defaults to the file extension"),
+    db: Session = Depends(get_db)
+):
+    """
+    Imports many employees from one upload. Rows are validated with the
+    EmployeeCreate rules as they are read, then loaded with COPY in batched
+    transactions. Invalid rows and rows that duplicate a PAN, Aadhaar or
+    contact number are reported per row without failing the rest. The new
+    employees are indexed for search after the response.
+    """
+    fmt = format or ("csv" if (file.filename or "").lower().endswith(".csv") else "ndjson")
+    rows = employee_bulk_service.iter_upload_rows(file.file, fmt)
+    try:
+        result, inserted = employee_bulk_service.import_employees(db, rows, EmployeeCreate)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not read {fmt} upload: {str(e)}"
+        )
+    background_tasks.add_task(employee_sync.employees_changed, inserted)
+    return result
+
+# ---------------------
+# ✏️ Endpoint: Bulk Update Employees
+# ---------------------
+@router.post("/bulk/update")
+def bulk_update_employees(changes: list[EmployeeBulkUpdate], background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Applies partial updates to many employees with one set-based UPDATE in a
+    single transaction. Returns a status per ID: updated, not_found, or
+    conflict (duplicate PAN / Aadhaar / contact number). The updated
+    employees are re-indexed for search after the response.
+    """
+    if len(changes) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {BULK_MAX_ITEMS} employees per request."
+        )
+    try:
+        outcomes, updated = employee_bulk_service.update_employees(
+            db, [(change.id, change.model_dump(exclude_unset=True, exclude={"id"})) for change in changes]
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update employees: {str(e)}"
+        )
+    background_tasks.add_task(employee_sync.employees_changed, updated)
+    return outcomes
+
+# ---------------------
+# 🗑️ Endpoint: Bulk Delete Employees
+# ---------------------
+@router.post("/bulk/delete")
+def bulk_delete_employees(request: EmployeeBulkDelete, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Deletes many employees with one DELETE in a single transaction. Their
+    document records cascade with them; the document files are removed from
+    disk, and the employees from the search indexes, after the response.
+    Returns a status per ID: deleted or not_found.
+    """
+    if len(request.ids) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {BULK_MAX_ITEMS} employees per request."
+        )
+    try:
+        outcomes, document_paths, deleted_ids = employee_bulk_service.delete_employees(db, request.ids)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete employees: {str(e)}"
+        )
+    background_tasks.add_task(employee_sync.employees_deleted, deleted_ids)
+    background_tasks.add_task(employee_bulk_service.delete_document_files, document_paths)
+    return outcomes
+
 # ---------------------
 # 📋 Endpoint: List All Employees
 # ---------------------
 @router.get("/", response_model=list[EmployeeOut])
-def list_employees(
-    skip: int = Query(0, ge=0, description="Number of items to skip"),
+async def list_employees(
+    response: Response,
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
     limit: int = Query(100, ge=1, le=200, description="Maximum number of items to return"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Retrieves a list of all employees with optional pagination.
+    Retrieves employees ordered by (created_at, id), one page at a time.
+    The cursor for the next page is returned in the X-Next-Cursor header,
+    which is absent on the last page.
     """
-    employees = db.query(models.EmployeeInfo).offset(skip).limit(limit).all()
+    try:
+        employees, next_cursor = await keyset_page(db, select(EmployeeInfo), cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return employees
 
+# ---------------------
+# 📤 Endpoint: Export Employees
+# ---------------------
+@router.get("/export")
+def export_employees(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+):
+    """
+    Streams every employee as NDJSON or CSV. Rows are read with a server-side
+    cursor and written as they arrive, so memory stays flat at any table size.
+    """
+    body, media_type = export_stream(format)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="employees.{format}"'},
+    )
+
+# -------------------------------
+# 🔍 Endpoint: Search by Name
+# -------------------------------
+# Declared before /{employee_id} so "search" isn't parsed as an ID
+@router.get("/search", response_model=list[EmployeeSearchOut])
+async def search_employees(
+    name: str = Query(..., min_length=1, example="john"),
+    limit: int = Query(20, ge=1, le=employee_search.SEARCH_MAX_RESULTS),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Fuzzy, typo-tolerant search on name (and address), ranked by trigram
+    similarity and served from the pg_trgm GIN indexes.
+    """
+    results = await employee_search.fuzzy_search(db, name, limit)
+    return [EmployeeSearchOut.model_validate(emp).model_copy(update={"score": score}) for emp, score in results]
+
+# -------------------------------
+# 🪪 Endpoint: Lookup by PAN / Aadhaar / Contact
+# -------------------------------
+@router.get("/lookup", response_model=EmployeeLookupOut)
+async def lookup_employee(
+    q: str = Query(..., min_length=1, example="ABCDE1234F"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Exact lookup by PAN, Aadhaar or contact number. The identifier type is
+    detected from the shape of `q` and answered with one unique-index probe.
+    """
+    found = await identifier_lookup.lookup_async(db, q)
+    if found is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Query is not a PAN, Aadhaar or contact number"
+        )
+    field, employee = found
+    if employee is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No employee with this {field}"
+        )
+    return {"matched_field": field, "employee": employee}
+
+# -------------------------------
+# 🔤 Endpoint: Name Autocomplete
+# -------------------------------
+@router.get("/autocomplete")
+def autocomplete_names(
+    q: str = Query(..., min_length=1, example="har"),
+    limit: int = Query(10, ge=1, le=autocomplete.AUTOCOMPLETE_MAX_RESULTS),
+):
+    """
+    Prefix suggestions for the search box, answered from an in-process sorted
+    index without touching the database.
+    """
+    return autocomplete.complete(q, limit)
+
 # ---------------------
 # 🔍 Endpoint: Get Employee by ID
 # ---------------------
 @router.get("/{employee_id}", response_model=EmployeeOut)
-def get_employee(employee_id: int, db: Session = Depends(get_db)):
+async def get_employee(employee_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieves a single employee record by its ID.
+    Served from the in-process response cache when possible; send the ETag
+    back in If-None-Match to get a 304 without any DB access.
     """
-    employee = db.query(models.EmployeeInfo).filter(models.EmployeeInfo.id == employee_id).first()
-    if not employee:
+    async def load():
+        employee = await db.get(EmployeeInfo, employee_id)
+        return (EmployeeOut.model_validate(employee).model_dump(mode="json"), employee.version) if employee else None
+
+    response = await employee_cache.cached_employee_response(request, "employees", employee_id, load)
+    if response is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Employee not found"
         )
-    return employee
+    return response
 
 # ---------------------
 # ✏️ Endpoint: Update Employee
 # ---------------------
 @router.put("/{employee_id}", response_model=EmployeeOut)
-def update_employee(employee_id: int, data: EmployeeUpdate, db: Session = Depends(get_db)):
+async def update_employee(
+    employee_id: int,
+    data: EmployeeUpdate,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Updates an existing employee record by ID.
+    Updates an existing employee record by ID in one UPDATE ... RETURNING
+    and re-embeds just that employee.
+
+    Send the ETag from GET in If-Match to make the write conditional: if
+    someone else updated the employee in the meantime, this returns 412
+    instead of overwriting their change.
     """
-    db_employee = db.query(models.EmployeeInfo).filter(models.EmployeeInfo.id == employee_id).first()
-    if not db_employee:
+    expected_version = _if_match_version(request, employee_id)
+    try:
+        db_employee = await employee_write_service.update_employee(
+            db, employee_id, data.model_dump(exclude_unset=True), expected_version
+        )
+    except EmployeeNotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Employee not found"
         )
-
-    # Update only the provided fields
-    for field, value in data.model_dump(exclude_unset=True).items():
-        setattr(db_employee, field, value)
-
-    db_employee.updated_at = datetime.now() # Set update timestamp
-
-    try:
-        db.add(db_employee)
-        db.commit()
-        db.refresh(db_employee)
+    except StaleVersion as e:
+        raise _precondition_failed(e)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another employee already has this PAN, Aadhaar or contact number"
+        )
     except Exception as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update employee: {str(e)}"
         )
+    employee_cache.invalidate(employee_id)
+    background_tasks.add_task(employee_sync.employees_changed, [db_employee])
+    response.headers["ETag"] = employee_cache.etag_for(employee_id, db_employee.version)
     return db_employee
 
 # ---------------------
 # 🗑️ Endpoint: Delete Employee
 # ---------------------
 @router.delete("/{employee_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_employee(employee_id: int, db: Session = Depends(get_db)):
+async def delete_employee(employee_id: int, request: Request, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
     """
-    Deletes an employee record by ID.
+    Deletes an employee record by ID in one DELETE ... RETURNING and drops its
+    vector from the semantic index. Honours If-Match like update.
     """
-    db_employee = db.query(models.EmployeeInfo).filter(models.EmployeeInfo.id == employee_id).first()
-    if not db_employee:
+    expected_version = _if_match_version(request, employee_id)
+    try:
+        freed = await employee_write_service.delete_employee(db, employee_id, expected_version)
+    except EmployeeNotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Employee not found"
         )
-
-    try:
-        db.delete(db_employee)
-        db.commit()
+    except StaleVersion as e:
+        raise _precondition_failed(e)
     except Exception as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete employee: {str(e)}"
         )
+    employee_cache.invalidate(employee_id)
+    file_download.invalidate_documents(employee_id)
+    background_tasks.add_task(employee_sync.employees_deleted, [employee_id])
+    background_tasks.add_task(blob_store.discard, freed)
     return # No content returned for 204
 
-# -------------------------------
-# 🔍 Endpoint: Search by Name
-# -------------------------------
-@router.get("/search", response_model=list[EmployeeOut])
-def search_employees(
-    name: str = Query(..., min_length=1, example="john"),
-    db: Session = Depends(get_db),
-):
-    """
-    Searches for employees by name (case-insensitive, partial match).
-    """
-    employees = db.query(models.EmployeeInfo).filter(
-        models.EmployeeInfo.name.ilike(f"%{name}%")
-    ).all()
-    return employees
+def _if_match_version(request: Request, employee_id: int):
+    try:
+        expected_version = employee_cache.expected_version(request, employee_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if expected_version is None and REQUIRE_IF_MATCH:
+        raise HTTPException(
+            status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+            detail="Send the employee's ETag in If-Match"
+        )
+    return expected_version
+
+def _precondition_failed(error: StaleVersion) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Employee was modified by someone else; reload it and retry",
+        headers={"ETag": employee_cache.etag_for(error.employee_id, error.current_version)},
+    )
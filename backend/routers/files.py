@@ -1,25 +1,18 @@
-from fastapi import APIRouter, UploadFile, Depends, HTTPException, status, File
-from sqlalchemy.orm import Session
-from backend.database import get_db
-
-# IMPORTANT: The SQLAlchemy ORM 'File' model is currently not imported.
-# Based on your instructions, it's not in 'backend.models.file_model'
-# nor 'backend.database', and no new modules can be invented.
-# You MUST ensure the 'File' ORM model is accessible in this scope,
-# or this code will result in a 'NameError' when trying to use 'FileORM'.
-# For example, if it's defined directly in 'backend.database' but under a different name,
-# or in another existing module not yet specified, you'll need to add that import.
-# Example (if it were in 'backend.some_other_module'):
-# from backend.some_other_module import File as FileORM
-
-# Pydantic models for request/response schemas are still imported from file_model
+from fastapi import APIRouter, UploadFile, Depends, HTTPException, Request, status, File
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import get_async_db
+from backend.schema_models import FileRecord
+
+# Pydantic models for request/response schemas are imported from file_model
 from backend.models import file_model
 
+from backend.services import blob_store
+from backend.utils import file_download
+from backend.utils.file_utils import FileTooLarge, StoredFile, run_io
 from backend.utils.virus_scan import scan_file
-from fastapi.responses import FileResponse
-import shutil
+import mimetypes
 import os
-import uuid
 import logging
 from typing import Annotated
 
@@ -32,6 +25,88 @@ UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+async def _scan_verdict(db: AsyncSession, stored: StoredFile) -> str:
+    async def scan():
+        # Reads the whole file, so it runs on the I/O threads
+        return "clean" if await run_io(scan_file, stored.path) else "infected"
+    # Scanned once per content hash; re-uploads of the same bytes reuse the verdict
+    return await blob_store.cached_derivative(db, stored.sha256, "virus_scan", scan)
+
+
+def _file_type(filename: str, declared: str = None) -> str:
+    """
+    The media type recorded for an upload: the client's Content-Type without
+    parameters (e.g. "; charset=utf-8"), or a guess from the file name when
+    it is missing or wouldn't fit the file_type column.
+    """
+    declared = (declared or "").split(";", 1)[0].strip().lower()
+    if 3 <= len(declared) <= file_model.FILE_TYPE_MAX_LENGTH:
+        return declared
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+async def register_file(db: AsyncSession, stored: StoredFile, filename: str, file_type: str, uploaded_by: str, created: bool = False):
+    """
+    Scans stored content (one blob reference already taken in this
+    transaction) and records its metadata, versioned per filename.
+    Shared by the one-shot upload below and finalized resumable uploads.
+    `created` says this transaction created the blob (see blob_store.adopt());
+    its file is then removed if the transaction rolls back.
+    - If clean, commits and returns the stored metadata.
+    - If infected, drops the blob reference and raises an HTTPException.
+    """
+    try:
+        if await _scan_verdict(db, stored) != "clean":
+            # No record for infected content; its blob goes unless someone else holds it
+            freed = await blob_store.release(db, [stored.path])
+            await db.commit() # Keeps the cached verdict
+            await run_io(blob_store.discard, freed)
+            logger.warning(f"Infected upload rejected: sha256 {stored.sha256}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Virus detected in uploaded file. File deleted.")
+
+        # Version and insert in one statement, instead of a separate ORDER BY version DESC lookup
+        next_version = (
+            select(func.coalesce(func.max(FileRecord.version), 0) + 1)
+            .where(FileRecord.filename == filename)
+            .scalar_subquery()
+        )
+        db_file = (await db.execute(
+            insert(FileRecord)
+            .values(
+                filename=filename,
+                file_type=_file_type(filename, file_type),
+                sha256=stored.sha256,
+                path=stored.path,
+                size=stored.size,
+                uploaded_by=uploaded_by,
+                version=next_version,
+                is_scanned=True,
+                is_clean=True,
+            )
+            .returning(FileRecord)
+        )).scalar_one()
+        # Convert the ORM model instance to the Pydantic response model before committing,
+        # so a record the response can't describe is rolled back rather than left behind a 500
+        file_out = file_model.FileOut.model_validate(db_file)
+        await db.commit() # Commit the new file's metadata to the database
+        return file_out
+    except HTTPException as e:
+        # Re-raise explicit HTTPExceptions (e.g., from virus scan or bad request)
+        await db.rollback() # Rollback any pending database changes in case of an HTTPException
+        if created:
+            await run_io(blob_store.discard, [stored.path])
+        raise e
+    except Exception as e:
+        logger.error(f"Error during file upload: {e}", exc_info=True)
+        await db.rollback() # Rollback the database transaction (and the blob reference)
+        if created:
+            await run_io(blob_store.discard, [stored.path]) # ...and the file of a blob it created
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload file: {e}"
+        )
+
+
 @router.post(
     "/upload",
     response_model=file_model.FileOut,
@@ -44,72 +119,27 @@ async def upload_file(
     # uploaded_by: Annotated[str, Depends(get_current_user)], # Uncomment and adjust for actual user object
     # For now, using a simple string if auth is not integrated yet:
     uploaded_by: str, # In a real app, this would come from current_user
-    db: Session = Depends(get_db) # Inject the database session directly
+    db: AsyncSession = Depends(get_async_db) # Inject the database session directly
 ):
     """
     Handles the file upload process.
-    - Saves the file temporarily.
-    - Performs a virus scan.
+    - Stores the content once per SHA-256; a duplicate costs a hash and a metadata insert.
+    - Performs a virus scan (cached per content hash).
     - If clean, stores file metadata in the database.
-    - If infected, deletes the temporary file and raises an HTTPException.
+    - If infected, drops the content and raises an HTTPException.
+    For large files over unreliable connections, use the resumable /uploads API instead.
     """
     if not file.filename:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No filename provided")
 
-    # Generate a unique filename to prevent conflicts and for security
-    unique_filename = f"{uuid.uuid4()}_{file.filename}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-
-    is_file_saved = False # Flag to track if the file was successfully saved to disk
     try:
-        # Save the uploaded file to disk
-        with open(file_path, "wb") as buffer:
-            # Use `await file.read()` for large files to avoid blocking
-            # For simplicity, using shutil.copyfileobj which works well with UploadFile.file
-            shutil.copyfileobj(file.file, buffer)
-        is_file_saved = True
-        logger.info(f"File saved to temporary path: {file_path}")
-
-        # Perform virus scan
-        is_clean = scan_file(file_path)
-
-        # Create a new File ORM object and add it to the database session
-        # This line will cause a NameError if FileORM is not defined or imported elsewhere.
-        db_file_orm = FileORM(
-            path=file_path,
-            original_filename=file.filename,
-            uploaded_by=uploaded_by,
-            is_scanned=True,
-            is_clean=is_clean
-        )
-        db.add(db_file_orm)
-        db.commit() # Commit the new file's metadata to the database
-        db.refresh(db_file_orm) # Refresh to get the generated ID and other default values
-
-        if not is_clean:
-            # If virus detected, delete the physical file and raise an error
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.warning(f"Infected file deleted: {file_path}")
-            # The metadata for the infected file remains in the DB, marked as not clean.
-            # If you wish to remove the metadata for infected files, uncomment the lines below:
-            # db.delete(db_file_orm)
-            # db.commit()
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Virus detected in uploaded file. File deleted.")
-
-        # Convert the ORM model instance to the Pydantic response model
-        return file_model.FileOut.from_orm(db_file_orm)
-    except HTTPException as e:
-        # Re-raise explicit HTTPExceptions (e.g., from virus scan or bad request)
-        db.rollback() # Rollback any pending database changes in case of an HTTPException
-        raise e
+        # Stage and hash the upload in one pass; content that's already stored only gains a reference
+        stored, created = await blob_store.store_upload(db, file)
+    except FileTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
     except Exception as e:
         logger.error(f"Error during file upload: {e}", exc_info=True)
-        # Clean up the partially saved file if an error occurred before successful DB commit
-        if is_file_saved and os.path.exists(file_path):
-            os.remove(file_path)
-            logger.error(f"Cleaned up partially uploaded file due to error: {file_path}")
-        db.rollback() # Rollback the database transaction if any other error occurred
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload file: {e}"
@@ -117,6 +147,9 @@ async def upload_file(
     finally:
         # Ensure the uploaded file's file-like object is closed
         await file.close()
+    logger.info(f"File stored at {stored.path} ({stored.size} bytes, sha256 {stored.sha256})")
+
+    return await register_file(db, stored, os.path.basename(file.filename), file.content_type, uploaded_by, created)
 
 
 @router.get(
@@ -125,20 +158,19 @@ async def upload_file(
     summary="Get file metadata by ID",
     description="Retrieves the metadata (filename, path, uploader, etc.) for a specific file by its ID."
 )
-def get_file_meta(
+async def get_file_meta(
     file_id: int,
-    db: Session = Depends(get_db) # Inject the database session directly
+    db: AsyncSession = Depends(get_async_db) # Inject the database session directly
 ):
     """
     Retrieves metadata for a specific file from the database.
     """
     # Query the database for the file metadata by ID
-    # This line will cause a NameError if FileORM is not defined or imported elsewhere.
-    file_metadata = db.query(FileORM).filter(FileORM.id == file_id).first()
+    file_metadata = await db.get(FileRecord, file_id)
     if not file_metadata:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File metadata not found")
     # Convert the ORM model instance to the Pydantic response model
-    return file_model.FileOut.from_orm(file_metadata)
+    return file_model.FileOut.model_validate(file_metadata)
 
 
 @router.get(
@@ -146,27 +178,35 @@ def get_file_meta(
     summary="Download a file by ID",
     description="Initiates the download of a specific file by its ID."
 )
-def download_file(
+async def download_file(
     file_id: int,
-    db: Session = Depends(get_db) # Inject the database session directly
+    request: Request,
+    db: AsyncSession = Depends(get_async_db) # Inject the database session directly
 ):
     """
     Allows downloading a file by its ID.
     - Checks if the file exists in the database and on disk.
+    - Supports Range requests (206) and conditional requests (ETag / Last-Modified, 304).
+    - Repeat downloads are served from cached metadata, without a database query.
     """
-    # Query the database for the file metadata by ID
-    # This line will cause a NameError if FileORM is not defined or imported elsewhere.
-    file_metadata = db.query(FileORM).filter(FileORM.id == file_id).first()
-    if not file_metadata:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File metadata not found")
+    async def load():
+        # Query the database for the file metadata by ID
+        file_metadata = await db.get(FileRecord, file_id)
+        if not file_metadata:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File metadata not found")
+        return file_download.DownloadMeta(
+            path=file_metadata.path,
+            filename=file_metadata.filename,
+            media_type=file_download.media_type_for(file_metadata.filename, file_metadata.file_type),
+            sha256=file_metadata.sha256,
+        )
 
-    # Verify if the physical file exists on disk before attempting to serve it
-    if not os.path.exists(file_metadata.path):
-        logger.error(f"Physical file not found for ID {file_id} at path: {file_metadata.path}")
+    response = await file_download.serve(request, file_download.file_key(file_id), load)
+    # The physical file must exist on disk to be served
+    if response is None:
+        logger.error(f"Physical file not found for ID {file_id}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Physical file not found on server. Contact administrator.")
-
-    # Return the file as a FileResponse
-    return FileResponse(path=file_metadata.path, filename=file_metadata.original_filename)
+    return response
 
 @router.delete(
     "/{file_id}",
@@ -174,38 +214,34 @@ def download_file(
     summary="Delete a file by ID",
     description="Deletes a file's metadata from the database and its corresponding physical file from storage."
 )
-def delete_file(
+async def delete_file(
     file_id: int,
-    db: Session = Depends(get_db) # Inject the database session directly
+    db: AsyncSession = Depends(get_async_db) # Inject the database session directly
 ):
     """
     Deletes a file (metadata and physical file) by its ID.
     """
     # Find the file metadata in the database
-    # This line will cause a NameError if FileORM is not defined or imported elsewhere.
-    file_to_delete = db.query(FileORM).filter(FileORM.id == file_id).first()
+    file_to_delete = await db.get(FileRecord, file_id)
 
     if not file_to_delete:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found.")
 
-    # Store the file path before deleting the database record
-    file_path = file_to_delete.path
-
     try:
-        # Delete the file metadata from the database
-        db.delete(file_to_delete)
-        db.commit() # Commit the database deletion
+        # Drop the record's blob reference, then the record itself
+        freed = await blob_store.release(db, [file_to_delete.path])
+        await db.delete(file_to_delete)
+        await db.commit() # Commit the database deletion
+        file_download.invalidate(file_download.file_key(file_id))
 
-        # Delete the physical file from disk
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            logger.info(f"Physical file deleted: {file_path}")
-        else:
-            logger.warning(f"Physical file not found on disk for ID {file_id} at path: {file_path}. Metadata deleted.")
+        # Delete the physical file from disk, unless other records still share its content
+        await run_io(blob_store.discard, freed)
+        if freed:
+            logger.info(f"Physical file deleted: {file_to_delete.path}")
 
         return {"message": f"File with ID {file_id} deleted successfully"}
     except Exception as e:
-        db.rollback() # Rollback the database transaction if an error occurs during deletion
+        await db.rollback() # Rollback the database transaction if an error occurs during deletion
         logger.error(f"Error deleting file with ID {file_id}: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,14 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List, Dict # Import Dict for the response model
+from typing import List, Dict, Optional # Import Dict for the response model
 
 # Assuming these imports are correct based on your project structure
-from backend.utils.semantic_index import semantic_search
+from backend.services import identifier_lookup
+from backend.utils import semantic_index
+from backend.utils.semantic_index import IndexNotReady
+from backend.utils.search_batcher import batcher
 from backend.database import SessionLocal
 from backend.schema_models import EmployeeInfo # This should be your SQLAlchemy model
 
 router = APIRouter()
 
+# Deepest result GET /semantic-search will page to
+SEARCH_MAX_RESULTS = int(os.getenv("SEMANTIC_SEARCH_MAX_RESULTS", "100"))
+
+# Upper bounds for POST /semantic-search/batch
+BATCH_MAX_QUERIES = int(os.getenv("SEMANTIC_BATCH_MAX_QUERIES", "512"))
+BATCH_MAX_TOP_K = int(os.getenv("SEMANTIC_BATCH_MAX_TOP_K", "50"))
+
 # Dependency to get the database session
 def get_db():
     db = SessionLocal()
@@ -17,26 +32,86 @@ def get_db():
     finally:
         db.close()
 
+def hydrate(emp_ids: List[int], db: Session) -> Dict[int, Dict]:
+    """
+    Result fields for the given employee IDs that still exist: from the
+    semantic index's in-memory projection, with one IN query for any IDs it
+    doesn't hold.
+
+    Writes made through another process (the admin app) only reach this
+    process's index at the next catch-up, so projected IDs are checked
+    against the table first: one index-only `id IN` query that drops
+    employees deleted in the meantime.
+    """
+    employees = semantic_index.project(emp_ids)
+    if employees:
+        live = set(db.scalars(select(EmployeeInfo.id).where(EmployeeInfo.id.in_(list(employees)))))
+        employees = {emp_id: fields for emp_id, fields in employees.items() if emp_id in live}
+    missing = [emp_id for emp_id in emp_ids if emp_id not in employees]
+    if missing:
+        columns = [getattr(EmployeeInfo, field) for field in semantic_index.PROJECTION_FIELDS]
+        for row in db.query(EmployeeInfo.id, *columns).filter(EmployeeInfo.id.in_(missing)):
+            employees[row.id] = {"id": row.id, **dict(zip(semantic_index.PROJECTION_FIELDS, row[1:]))}
+    return employees
+
+@router.get(
+    "/semantic-search/ready",
+    summary="Semantic search readiness",
+    description="Reports whether the embedding model and index are loaded. Returns 503 until search is warm."
+)
+def semantic_search_ready() -> JSONResponse:
+    """
+    Readiness probe for load balancers and orchestrators.
+    """
+    details = semantic_index.status()
+    code = status.HTTP_200_OK if details["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(status_code=code, content=details)
+
+@router.get(
+    "/semantic-search/metrics",
+    summary="Semantic search metrics",
+    description="Micro-batcher histograms (batch size, queueing delay, search time) and query cache hit rates and sizes."
+)
+def semantic_search_metrics() -> Dict:
+    return {
+        "batching": batcher.stats(),
+        "caches": semantic_index.cache_stats(),
+    }
+
 @router.get(
     "/semantic-search",
-    response_model=List[Dict], # Changed response_model to List[Dict]
+    response_model=List[Dict],
     summary="Perform a semantic search for employees",
-    description="Searches for employees based on a natural language query using a semantic index and returns matching employee information."
+    description=(
+        "Searches for employees based on a natural language query using a semantic index. "
+        "Results come back best match first with a cosine similarity score; use min_score to drop "
+        "weak matches and offset/limit to page. X-Has-More is set when another page exists. "
+        "PAN, Aadhaar and contact numbers are answered by exact lookup instead."
+    )
 )
 def semantic_search_api(
+    response: Response,
     query: str,
+    limit: int = Query(5, ge=1, le=SEARCH_MAX_RESULTS),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_RESULTS),
+    min_score: Optional[float] = Query(None, ge=-1.0, le=1.0),
     db: Session = Depends(get_db)
-) -> List[Dict]: # Changed return type hint to List[Dict]
+) -> List[Dict]:
     """
-    Performs a semantic search to find relevant employee IDs and then retrieves
-    the full employee information from the database.
+    Performs a semantic search and returns the matching employees in
+    similarity order. Concurrent queries are micro-batched into a single
+    encode + index search, and results are filled in from the index's
+    in-memory projection, so the database is only hit for rows it is missing.
 
     Args:
         query: The natural language query string for semantic search.
+        limit: Page size.
+        offset: Number of ranked results to skip.
+        min_score: Optional cosine similarity threshold in [-1, 1].
         db: The database session dependency.
 
     Returns:
-        A list of dictionaries, each representing an employee's information.
+        A list of dictionaries with the employee fields plus "score".
     """
     if not query:
         raise HTTPException(
@@ -44,35 +119,117 @@ def semantic_search_api(
             detail="Query parameter cannot be empty."
         )
 
+    # PAN / Aadhaar / phone numbers are exact lookups; skip the model and the index
+    found = identifier_lookup.lookup(db, query)
+    if found is not None:
+        _, emp = found
+        response.headers["X-Has-More"] = "false"
+        if emp is None or offset > 0:
+            return []
+        return [{"id": emp.id, **dict(zip(semantic_index.PROJECTION_FIELDS, semantic_index.projection_row(emp))), "score": 1.0}]
+
     try:
-        emp_ids: List[str] = semantic_search(query) # Assuming semantic_search returns a list of IDs (e.g., strings or ints)
+        # One extra hit tells us whether there is a next page
+        hits = batcher.search(query, top_k=min(offset + limit + 1, SEARCH_MAX_RESULTS))
+    except IndexNotReady as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Semantic search failed: {e}"
         )
 
-    if not emp_ids:
-        return [] # Return an empty list if no IDs are found by semantic search
-
-    # Fetch employee information from the database using the retrieved IDs
-    # Assuming EmployeeInfo.id is the primary key and matches the type of emp_ids
-    results = db.query(EmployeeInfo).filter(EmployeeInfo.id.in_(emp_ids)).all()
-
-    # Convert SQLAlchemy ORM objects to dictionaries for the API response.
-    # IMPORTANT: You MUST adjust the keys and attributes below to match
-    # the actual column names/attributes of your 'EmployeeInfo' SQLAlchemy ORM model.
-    employee_data = []
-    for emp in results:
-        # Example attributes. Replace with your actual EmployeeInfo model's attributes.
-        employee_data.append({
-            "id": emp.id,
-            "name": emp.name if hasattr(emp, 'name') else None,
-            "email": emp.email if hasattr(emp, 'email') else None,
-            "department": emp.department if hasattr(emp, 'department') else None,
-            # Add other relevant attributes from your EmployeeInfo ORM model here, e.g.:
-            # "position": emp.position,
-            # "hire_date": str(emp.hire_date), # Convert date objects to string
-        })
+    scored = [(emp_id, semantic_index.similarity(distance)) for emp_id, distance in hits]
+    if min_score is not None:
+        scored = [(emp_id, score) for emp_id, score in scored if score >= min_score]
+    page = scored[offset:offset + limit]
+    response.headers["X-Has-More"] = "true" if len(scored) > offset + limit else "false"
+
+    employees = hydrate([emp_id for emp_id, _ in page], db)
+    return [
+        {**employees[emp_id], "score": round(score, 4)}
+        for emp_id, score in page
+        if emp_id in employees  # Deleted since they were indexed
+    ]
+
+# ---------------------------
+# 📦 Batch semantic search
+# ---------------------------
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, example=["driver near Hyderabad", "expired license"])
+    top_k: int = Field(5, ge=1, example=5)
+
+@router.post(
+    "/semantic-search/batch",
+    response_model=List[Dict],
+    summary="Run many semantic searches in one request",
+    description=(
+        "Encodes all queries in one batch, searches the index once with the full query matrix and "
+        "loads every matched employee with a single DB query. Returns one ranked result list per query."
+    )
+)
+def semantic_search_batch_api(
+    request: BatchSearchRequest,
+    db: Session = Depends(get_db)
+) -> List[Dict]:
+    """
+    Batch variant of /semantic-search for matching jobs.
+
+    Bypasses the micro-batcher: the request already is a batch, so it goes
+    straight to search_many as one encode + one index search. Employees are
+    filled in from the in-memory projection, like the single-query endpoint.
 
-    return employee_data
+    Returns:
+        One entry per query, in request order:
+        {"query": ..., "results": [{"employee": {...}, "score": cosine similarity}, ...]}
+    """
+    if len(request.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {BATCH_MAX_QUERIES} queries per batch."
+        )
+    if request.top_k > BATCH_MAX_TOP_K:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"top_k cannot exceed {BATCH_MAX_TOP_K}."
+        )
+    if any(not query.strip() for query in request.queries):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Queries cannot be empty."
+        )
+
+    try:
+        hits_per_query = semantic_index.search_many(request.queries, top_k=request.top_k)
+    except IndexNotReady as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Semantic search failed: {e}"
+        )
+
+    # Hydrate every matched employee at once: projection first, one IN query for the rest
+    employees = hydrate(list({emp_id for hits in hits_per_query for emp_id, _ in hits}), db)
+
+    response = []
+    for query, hits in zip(request.queries, hits_per_query):
+        response.append({
+            "query": query,
+            "results": [
+                # Rows deleted since they were indexed are skipped
+                {"employee": employees[emp_id], "score": round(semantic_index.similarity(distance), 4)}
+                for emp_id, distance in hits
+                if emp_id in employees
+            ],
+        })
+    return response
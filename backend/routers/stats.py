@@ -1,19 +1,16 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Dict # For the response model
 
 # Assuming these imports are correct based on your project structure
-from backend.database import get_db
+from backend import database
+from backend.database import get_async_db
+from backend.schema_models import EmployeeDocuments, EmployeeInfo
 
-# IMPORTANT: The SQLAlchemy ORM models 'EmployeeInfo' and 'EmployeeDocuments'
-# are NOT imported here, as per your explicit instruction that they cannot
-# be imported from 'backend.database' and no new modules can be introduced.
-# As a result, the functions below that relied on these models will
-# return placeholder data or will need their query logic adjusted
-# once you provide the correct way to access these ORM models.
-
-from backend.models import user_model # This module remains as per your instruction
+from backend.utils import file_download
+from backend.utils.pool_metrics import pool_stats
 
 # --- Pydantic Models for Responses ---
 # It's good practice to define Pydantic models for your API responses.
@@ -29,7 +26,7 @@ router = APIRouter(prefix="/stats", tags=["Stats"])
     summary="Get Employee Count",
     description="Returns the total number of employee records in the database."
 )
-def get_employee_count(db: Session = Depends(get_db)) -> Dict[str, int]:
+async def get_employee_count(db: AsyncSession = Depends(get_async_db)) -> Dict[str, int]:
     """
     Retrieves the total count of employees from the EmployeeInfo table.
 
@@ -39,13 +36,8 @@ def get_employee_count(db: Session = Depends(get_db)) -> Dict[str, int]:
     Returns:
         A dictionary containing the count of employees.
     """
-    # Cannot query EmployeeInfo as it's not imported.
-    # You need to ensure EmployeeInfo ORM model is accessible for this to work.
-    # Example of how it *would* work if EmployeeInfo was correctly imported:
-    # count = db.query(EmployeeInfo).count()
-    # Returning a placeholder value as the ORM model is unavailable.
-    print("Warning: EmployeeInfo ORM model not accessible. Returning placeholder count.")
-    return {"count": 0}
+    count = (await db.execute(select(func.count()).select_from(EmployeeInfo))).scalar_one()
+    return {"count": count}
 
 @router.get(
     "/documents",
@@ -53,7 +45,7 @@ def get_employee_count(db: Session = Depends(get_db)) -> Dict[str, int]:
     summary="Get Document Count",
     description="Returns the total number of employee document records in the database."
 )
-def get_document_count(db: Session = Depends(get_db)) -> Dict[str, int]:
+async def get_document_count(db: AsyncSession = Depends(get_async_db)) -> Dict[str, int]:
     """
     Retrieves the total count of employee documents from the EmployeeDocuments table.
 
@@ -63,10 +55,34 @@ def get_document_count(db: Session = Depends(get_db)) -> Dict[str, int]:
     Returns:
         A dictionary containing the count of documents.
     """
-    # Cannot query EmployeeDocuments as it's not imported.
-    # You need to ensure EmployeeDocuments ORM model is accessible for this to work.
-    # Example of how it *would* work if EmployeeDocuments was correctly imported:
-    # count = db.query(EmployeeDocuments).count()
-    # Returning a placeholder value as the ORM model is unavailable.
-    print("Warning: EmployeeDocuments ORM model not accessible. Returning placeholder count.")
-    return {"count": 0}
+    count = (await db.execute(select(func.count()).select_from(EmployeeDocuments))).scalar_one()
+    return {"count": count}
+
+@router.get(
+    "/db-pool",
+    summary="Database Connection Pool",
+    description="Checked-out, idle and overflow connections, checkout wait-time histograms and timeout counts of the sync and async pools."
+)
+def get_db_pool_stats() -> Dict[str, dict]:
+    """
+    Reports live pool occupancy and checkout metrics for both engines.
+    Never touches the database, so it still answers while the pools are exhausted.
+
+    Returns:
+        A dictionary with one entry per engine ("sync", "async").
+    """
+    return {
+        "sync": pool_stats(database.engine.pool),
+        "async": pool_stats(database.async_engine.sync_engine.pool),
+    }
+
+@router.get(
+    "/download-cache",
+    summary="Download Metadata Cache",
+    description="Size, hit rate and evictions of the cache that lets repeat document and file downloads skip the database."
+)
+def get_download_cache_stats() -> Dict[str, object]:
+    """
+    Reports the download metadata cache counters, for tuning DOWNLOAD_CACHE_SIZE / DOWNLOAD_CACHE_TTL.
+    """
+    return file_download.cache.stats()
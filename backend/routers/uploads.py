@@ -0,0 +1,193 @@
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import get_async_db
+from backend.routers import documents, files
+from backend.schema_models import EmployeeInfo
+from backend.services import blob_store, upload_sessions
+from backend.services.upload_sessions import OffsetMismatch, UploadBusy, UploadIncomplete, UploadSessionNotFound
+from backend.utils.file_utils import FileTooLarge
+
+router = APIRouter(prefix="/uploads", tags=["Resumable Uploads"])
+
+# -------------------------------
+# 📦 Request and Response Schemas
+# -------------------------------
+
+class UploadCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255, example="form16_2024.pdf")
+    size: int = Field(..., gt=0, description="Total size of the file in bytes")
+    target: Literal["document", "file"] = Field(..., description="Where the finished file goes: an employee document or the file store")
+    employee_id: int | None = Field(None, description="target=document: the employee")
+    document_type: str | None = Field(None, description=f"target=document: one of {', '.join(documents.DOCUMENT_FIELDS)}")
+    uploaded_by: str | None = Field(None, min_length=2, max_length=100, description="target=file: the uploader")
+
+class UploadSessionOut(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    offset: int
+    target: str
+    expires_at: datetime
+
+# -------------------------------
+# ⏯️ Resumable Upload Endpoints
+# -------------------------------
+# 1. POST /uploads                  -> upload_id
+# 2. PUT /uploads/{id}?offset=N     raw bytes, any number of times
+#    HEAD /uploads/{id}             current offset after a dropped connection
+# 3. POST /uploads/{id}/finalize    -> the document / file record, as with a one-shot upload
+
+def _session_out(session: dict) -> UploadSessionOut:
+    return UploadSessionOut(
+        **{k: session[k] for k in ("upload_id", "filename", "size", "offset", "target")},
+        expires_at=datetime.fromtimestamp(session["expires_at"], tz=timezone.utc),
+    )
+
+def _offset_headers(session: dict) -> dict:
+    return {"Upload-Offset": str(session["offset"]), "Upload-Length": str(session["size"])}
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Upload is being written or finalized by another request; retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+async def _require_documents_record(db: AsyncSession, employee_id: int):
+    # A resumable upload carries one document, and a new documents record needs all of them
+    if await documents.get_documents_record(db, employee_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Employee {employee_id} has no documents yet; upload the full set with POST /documents/{employee_id} first."
+        )
+
+async def _session_or_404(upload_id: str) -> dict:
+    try:
+        return await upload_sessions.get(upload_id)
+    except UploadSessionNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found or expired")
+
+@router.post("", response_model=UploadSessionOut, status_code=status.HTTP_201_CREATED)
+async def create_upload(data: UploadCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """
+    Starts a resumable upload. Checks the target up front so a long upload
+    can't fail only at finalize.
+    """
+    if data.target == "document":
+        if data.employee_id is None or data.document_type not in documents.DOCUMENT_FIELDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"target=document needs employee_id and a document_type in {list(documents.DOCUMENT_FIELDS)}"
+            )
+        if await db.get(EmployeeInfo, data.employee_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Employee with ID {data.employee_id} not found.")
+        await _require_documents_record(db, data.employee_id)
+    elif not data.uploaded_by:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="target=file needs uploaded_by")
+
+    try:
+        session = await upload_sessions.create(data.model_dump())
+    except FileTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    response.headers["Location"] = f"{router.prefix}/{session['upload_id']}"
+    response.headers.update(_offset_headers(session))
+    return _session_out(session)
+
+@router.head("/{upload_id}")
+async def upload_offset(upload_id: str):
+    """
+    Where to resume: the Upload-Offset header is the number of bytes stored.
+    """
+    session = await _session_or_404(upload_id)
+    return Response(headers={**_offset_headers(session), "Cache-Control": "no-store"})
+
+@router.get("/{upload_id}", response_model=UploadSessionOut)
+async def get_upload(upload_id: str, response: Response):
+    """
+    Session details, including the current offset.
+    """
+    session = await _session_or_404(upload_id)
+    response.headers.update(_offset_headers(session))
+    response.headers["Cache-Control"] = "no-store"
+    return _session_out(session)
+
+@router.put("/{upload_id}", response_model=UploadSessionOut)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    offset: int = Query(..., ge=0, description="Byte offset of this chunk; must equal the current Upload-Offset"),
+):
+    """
+    Appends the raw request body at `offset`. The body is streamed to the
+    staging file as it arrives; if the connection drops, HEAD tells you how
+    much was kept. A wrong offset gets 409 with the right one in Upload-Offset.
+    """
+    try:
+        session = await upload_sessions.append(upload_id, offset, request.stream())
+    except UploadSessionNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found or expired")
+    except OffsetMismatch as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+            headers={"Upload-Offset": str(e.offset)},
+        )
+    except UploadBusy:
+        raise _busy()
+    except FileTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    response.headers.update(_offset_headers(session))
+    return _session_out(session)
+
+@router.post("/{upload_id}/finalize")
+async def finalize_upload(upload_id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Completes the upload: moves the file into the blob store and creates the same
+    record a one-shot upload would, returning it (DocumentOut for
+    target=document, FileOut for target=file). The session only ends once
+    that record is committed; if anything fails first, finalize can be retried.
+    """
+    session = await _session_or_404(upload_id)
+    if session["target"] == "document":
+        await _require_documents_record(db, session["employee_id"])  # may have been deleted since create
+    try:
+        # Staged next to the blob store so adopting it is another rename
+        async with upload_sessions.finalizing(upload_id, blob_store.staging_path()) as staged:
+            # Content that is already stored only gains a reference; the staged copy is dropped
+            path, created = await blob_store.adopt(db, staged, session["filename"])
+            stored = staged._replace(path=path)
+            if session["target"] == "document":
+                record = await documents.attach_documents(
+                    db, session["employee_id"], {session["document_type"]: stored.path}, [path] if created else []
+                )
+                return documents.DocumentOut.model_validate(record, from_attributes=True)
+            return await files.register_file(db, stored, session["filename"], None, session["uploaded_by"], created)
+    except UploadSessionNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found or expired")
+    except UploadIncomplete as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+            headers={"Upload-Offset": str(e.offset)},
+        )
+    except UploadBusy:
+        raise _busy()
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(upload_id: str):
+    """
+    Abandons an upload and deletes what was stored so far.
+    """
+    try:
+        await upload_sessions.abort(upload_id)
+    except UploadSessionNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found or expired")
+    except UploadBusy:
+        raise _busy()
+    return
@@ -1,11 +1,16 @@
 from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Boolean,
     Column,
     Integer,
     String,
     Date,
     Text,
     ForeignKey,
+    Index,
     TIMESTAMP,
+    event,
     func,
 )
 from sqlalchemy.orm import relationship
@@ -23,6 +28,8 @@ class EmployeeInfo(Base):
     pan_number = Column(String(10), nullable=False, unique=True)
     aadhar_number = Column(String(12), nullable=False, unique=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
+    version = Column(Integer, nullable=False, server_default="1")  # Optimistic concurrency; exposed as the ETag
 
     documents = relationship(
         "EmployeeDocuments",
@@ -31,6 +38,24 @@ class EmployeeInfo(Base):
         passive_deletes=True
     )
 
+    # ORM flushes check and bump `version` too, not just the single-statement writes
+    __mapper_args__ = {"version_id_col": version}
+
+    __table_args__ = (
+        # Keyset pagination and exports walk the table in (created_at, id) order
+        Index("ix_employee_info_created_at_id", "created_at", "id"),
+        # Trigram indexes for fuzzy name / address search (needs pg_trgm, created below)
+        Index("ix_employee_info_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_employee_info_address_trgm", "address", postgresql_using="gin", postgresql_ops={"address": "gin_trgm_ops"}),
+    )
+
+
+event.listen(
+    EmployeeInfo.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 
 class EmployeeDocuments(Base):
     __tablename__ = "employee_documents"
@@ -44,3 +69,50 @@ class EmployeeDocuments(Base):
     aadhar_card = Column(Text, nullable=False)
     form_16_or_it_returns = Column(Text, nullable=False)
 
+
+class Blob(Base):
+    """
+    One stored file content, keyed by its SHA-256 (see backend/services/blob_store.py).
+    `path` is what EmployeeDocuments columns and FileRecord rows point at;
+    `ref_count` is how many of them do.
+    """
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    path = Column(Text, nullable=False, unique=True)
+    ref_count = Column(Integer, nullable=False, server_default="0")
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+
+class BlobDerivative(Base):
+    """
+    Cached result of work done on a content hash (virus scan verdict,
+    extracted text, ...), so identical uploads never repeat it. Outlives the
+    blob itself: the verdict for known-bad content stays cached.
+    """
+    __tablename__ = "blob_derivatives"
+
+    sha256 = Column(String(64), primary_key=True)
+    kind = Column(String(50), primary_key=True)
+    value = Column(Text, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+
+class FileRecord(Base):
+    """
+    Metadata of a file uploaded through /files; the bytes live in the blob store.
+    """
+    __tablename__ = "files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String(255), nullable=False, index=True)
+    file_type = Column(String(100), nullable=False, server_default="application/octet-stream")
+    sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=False, index=True)
+    path = Column(Text, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    uploaded_by = Column(String(100), nullable=False)
+    upload_time = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    version = Column(Integer, nullable=False, server_default="1")  # per filename, 1 for the first upload
+    is_scanned = Column(Boolean, nullable=False, server_default="false")
+    is_clean = Column(Boolean)
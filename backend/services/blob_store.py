@@ -0,0 +1,211 @@
+import os
+from collections import Counter
+from uuid import uuid4
+
+from fastapi import UploadFile
+from sqlalchemy import Integer, Text, any_, bindparam, column, delete, select, update, values
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.schema_models import Blob, BlobDerivative, EmployeeDocuments
+from backend.utils.file_utils import StoredFile, run_io, stream_to_disk
+
+# ---------------------------
+# 🧬 Content-addressed blob store
+# ---------------------------
+# Uploaded bytes are stored once per SHA-256, no matter how many documents or
+# file records use them; the `blobs` row counts the references. An upload is
+# read once: it is hashed while it streams to a staging file, which then
+# either becomes the blob or, for content that is already stored, is dropped
+# in favour of a ref_count bump.
+#
+# Each time a hash is (re)stored it gets a fresh path (`<sha>-<nonce><ext>`),
+# so unlinking the file of a blob that just dropped to zero references can
+# never remove a newer copy of the same content.
+
+BLOB_DIR = os.getenv("BLOB_STORE_DIR", os.path.join("uploads", "blobs"))
+STAGING_DIR = os.path.join(BLOB_DIR, ".staging")  # same filesystem, so adopting a file is a rename
+
+# EmployeeDocuments columns that hold blob paths
+DOCUMENT_COLUMNS = (
+    EmployeeDocuments.resume,
+    EmployeeDocuments.educational_certificates,
+    EmployeeDocuments.offer_letters,
+    EmployeeDocuments.pan_card,
+    EmployeeDocuments.aadhar_card,
+    EmployeeDocuments.form_16_or_it_returns,
+)
+
+
+def is_blob_path(path: str) -> bool:
+    return bool(path) and os.path.abspath(path).startswith(os.path.abspath(BLOB_DIR) + os.sep)
+
+
+def sha256_of_path(path: str):
+    """
+    The content hash a blob path is named after, or None for other paths.
+    """
+    if not is_blob_path(path):
+        return None
+    return os.path.basename(path).split("-", 1)[0]
+
+
+def staging_path() -> str:
+    """
+    A fresh path to stage an upload at before adopt().
+    """
+    return os.path.join(STAGING_DIR, uuid4().hex)
+
+
+def _blob_path(sha256: str, ext: str) -> str:
+    return os.path.join(BLOB_DIR, sha256[:2], f"{sha256}-{uuid4().hex[:8]}{ext.lower()}")
+
+
+def _extension(filename: str) -> str:
+    # Kept on the blob so downloads still get a sensible media type
+    return os.path.splitext(os.path.basename(filename or ""))[1][:16]
+
+
+def _move(source: str, destination: str):
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(source, destination)
+
+
+def discard(paths):
+    """
+    Removes the files of blobs that release() reported as unreferenced.
+    Call after the releasing transaction commits. Missing files are ignored.
+    """
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"⚠️ Could not remove blob {path}: {e}")
+
+
+# ---------------------------
+# ➕ Taking references
+# ---------------------------
+
+async def adopt(db: AsyncSession, staged: StoredFile, filename: str = ""):
+    """
+    Takes one reference to the content of a staged, already hashed file.
+    The staged file becomes the blob if the content is new, and is deleted
+    otherwise. Runs in the caller's transaction.
+
+    Returns (blob path, created); a created blob's file must be removed if
+    that transaction rolls back.
+    """
+    candidate = _blob_path(staged.sha256, _extension(filename))
+    stmt = (
+        insert(Blob)
+        .values(sha256=staged.sha256, size=staged.size, path=candidate, ref_count=1)
+        .on_conflict_do_update(index_elements=[Blob.sha256], set_={"ref_count": Blob.ref_count + 1})
+        .returning(Blob.path)
+    )
+    path = (await db.execute(stmt)).scalar_one()
+    if path == candidate:
+        await run_io(_move, staged.path, candidate)
+        return path, True
+    await run_io(discard, [staged.path])
+    return path, False
+
+
+async def stage_upload(file: UploadFile) -> StoredFile:
+    """
+    Streams an upload (from the start) to a fresh staging path, hashing it on
+    the way, for adopt(). Raises FileTooLarge past UPLOAD_MAX_BYTES.
+    """
+    await file.seek(0)
+    return await stream_to_disk(file, staging_path())
+
+
+async def store_upload(db: AsyncSession, file: UploadFile):
+    """
+    Stores an upload and takes one reference to it; returns (StoredFile,
+    created) like adopt(): a created blob's file must be discarded if the
+    transaction rolls back.
+    Raises FileTooLarge past UPLOAD_MAX_BYTES.
+    """
+    staged = await stage_upload(file)
+    path, created = await adopt(db, staged, file.filename)
+    return StoredFile(path, staged.size, staged.sha256), created
+
+
+# ---------------------------
+# ➖ Dropping references
+# ---------------------------
+
+def _release_statements(paths):
+    counts = Counter(path for path in paths if is_blob_path(path))
+    if not counts:
+        return None
+    released = values(column("path", Text), column("n", Integer), name="released").data(list(counts.items()))
+    decrement = (
+        update(Blob)
+        .where(Blob.path == released.c.path)
+        .values(ref_count=Blob.ref_count - released.c.n)
+    )
+    purge = (
+        delete(Blob)
+        .where(Blob.path == any_(bindparam("paths", list(counts), type_=ARRAY(Text))), Blob.ref_count <= 0)
+        .returning(Blob.path)
+    )
+    return decrement, purge
+
+
+async def release(db: AsyncSession, paths) -> list:
+    """
+    Drops one reference per blob path in `paths` (other paths are ignored)
+    in the caller's transaction, and deletes blobs left with none. Returns
+    the files to discard() once that transaction commits.
+    """
+    statements = _release_statements(paths)
+    if statements is None:
+        return []
+    decrement, purge = statements
+    await db.execute(decrement.execution_options(synchronize_session=False))
+    return list((await db.execute(purge.execution_options(synchronize_session=False))).scalars())
+
+
+def release_sync(db: Session, paths) -> list:
+    """
+    release() for a sync Session.
+    """
+    statements = _release_statements(paths)
+    if statements is None:
+        return []
+    decrement, purge = statements
+    db.execute(decrement.execution_options(synchronize_session=False))
+    return list(db.execute(purge.execution_options(synchronize_session=False)).scalars())
+
+
+def document_paths_statement(*criteria):
+    """
+    SELECT of the document path columns of the EmployeeDocuments rows matching `criteria`.
+    """
+    return select(*DOCUMENT_COLUMNS).where(*criteria)
+
+
+# ---------------------------
+# 🗃️ Per-content derivatives
+# ---------------------------
+
+async def cached_derivative(db: AsyncSession, sha256: str, kind: str, compute) -> str:
+    """
+    The `kind` result (e.g. "virus_scan", "text") for this content. Computed
+    with `await compute()` the first time any upload of the content needs it,
+    and read from blob_derivatives after that.
+    """
+    value = (await db.execute(
+        select(BlobDerivative.value).where(BlobDerivative.sha256 == sha256, BlobDerivative.kind == kind)
+    )).scalar()
+    if value is None:
+        value = await compute()
+        await db.execute(
+            insert(BlobDerivative).values(sha256=sha256, kind=kind, value=value).on_conflict_do_nothing()
+        )
+    return value
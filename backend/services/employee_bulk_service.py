@@ -0,0 +1,416 @@
+import csv
+import io
+import json
+import os
+import shutil
+import time
+
+from pydantic import ValidationError
+from sqlalchemy import (
+    Date,
+    Integer,
+    String,
+    Text,
+    any_,
+    bindparam,
+    cast,
+    column,
+    delete,
+    func,
+    text,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.schema_models import EmployeeDocuments, EmployeeInfo
+from backend.services import blob_store
+from backend.utils import employee_cache, file_download, semantic_index
+
+# ---------------------------
+# ⚙️ Bulk import configuration
+# ---------------------------
+
+IMPORT_BATCH_SIZE = int(os.getenv("EMPLOYEE_IMPORT_BATCH_SIZE", "1000"))       # rows per COPY + transaction
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("EMPLOYEE_IMPORT_MAX_ERRORS", "1000"))
+
+IMPORT_FIELDS = ("name", "date_of_birth", "address", "contact_number", "pan_number", "aadhar_number")
+UNIQUE_FIELDS = ("pan_number", "aadhar_number", "contact_number")
+
+# Per-connection staging table; ON COMMIT DELETE ROWS empties it after every batch
+_CREATE_STAGING = """
+CREATE TEMP TABLE IF NOT EXISTS employee_import (
+    row_no INTEGER,
+    name VARCHAR(100),
+    date_of_birth DATE,
+    address TEXT,
+    contact_number VARCHAR(15),
+    pan_number VARCHAR(10),
+    aadhar_number VARCHAR(12)
+) ON COMMIT DELETE ROWS
+"""
+
+# Rows that would violate a unique constraint (against the table or an earlier
+# row in the same batch) are skipped rather than aborting the transaction
+_INSERT_FROM_STAGING = text("""
+INSERT INTO employee_info (name, date_of_birth, address, contact_number, pan_number, aadhar_number)
+SELECT name, date_of_birth, address, contact_number, pan_number, aadhar_number
+FROM employee_import
+ORDER BY row_no
+ON CONFLICT DO NOTHING
+RETURNING id, name, address, contact_number, pan_number, aadhar_number
+""")
+
+
+# ---------------------------
+# 📥 Streaming parsers
+# ---------------------------
+
+def iter_upload_rows(stream, fmt: str):
+    """
+    Yields (row_number, dict) from a binary CSV or NDJSON stream without
+    reading it all into memory. Row numbers are 1-based data rows.
+    Malformed NDJSON lines are yielded as (row_number, error message).
+    """
+    reader = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for row_no, row in enumerate(csv.DictReader(reader), start=1):
+            yield row_no, row
+        return
+
+    row_no = 0
+    for line in reader:
+        if not line.strip():
+            continue
+        row_no += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_no, f"invalid JSON: {e.msg}"
+            continue
+        yield row_no, record if isinstance(record, dict) else "expected a JSON object"
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors())
+
+
+# ---------------------------
+# 🚚 Bulk import
+# ---------------------------
+
+class ImportReport:
+    """
+    Running totals for one import, returned to the caller as a dict.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        self.inserted_rows = []  # for the derived indexes, once the import is done
+
+    def fail(self, row_no: int, message: str):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_no, "error": message})
+
+    def as_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "total_rows": self.total,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.total / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+def import_employees(db: Session, rows, schema, batch_size: int = IMPORT_BATCH_SIZE):
+    """
+    Validates (row_number, record) pairs against `schema` (EmployeeCreate)
+    as they stream in, and loads the valid ones batch by batch: COPY into a
+    staging table, then one INSERT ... ON CONFLICT DO NOTHING per batch, each
+    batch in its own transaction. Rows that fail validation or hit a unique
+    constraint are reported individually; the rest of the batch still lands.
+
+    Returns (import report (counts, per-row errors, rows/sec), inserted rows).
+    The derived indexes aren't touched: pass the rows to
+    employee_sync.employees_changed, e.g. as a BackgroundTask.
+    """
+    report = ImportReport()
+    batch = []
+    for row_no, record in rows:
+        report.total += 1
+        if isinstance(record, str):
+            report.fail(row_no, record)
+            continue
+        try:
+            employee = schema(**record)
+        except ValidationError as e:
+            report.fail(row_no, _validation_message(e))
+            continue
+        batch.append((row_no, employee))
+        if len(batch) >= batch_size:
+            _load_batch(db, batch, report)
+            batch = []
+    if batch:
+        _load_batch(db, batch, report)
+
+    result = report.as_dict()
+    print(f"📥 Imported {result['inserted']}/{result['total_rows']} employees "
+          f"({result['failed']} failed, {result['rows_per_second']} rows/sec).")
+    return result, report.inserted_rows
+
+
+def _load_batch(db: Session, batch, report: ImportReport):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row_no, employee in batch:
+        writer.writerow([row_no, *(getattr(employee, field) for field in IMPORT_FIELDS)])
+    buffer.seek(0)
+
+    try:
+        db.execute(text(_CREATE_STAGING))
+        # COPY runs on the session's own connection, inside the batch transaction
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY employee_import (row_no, {', '.join(IMPORT_FIELDS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        finally:
+            cursor.close()
+        inserted = db.execute(_INSERT_FROM_STAGING).all()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        for row_no, _ in batch:
+            report.fail(row_no, f"batch failed: {e}")
+        return
+
+    report.inserted += len(inserted)
+    report.inserted_rows.extend(inserted)
+    if len(inserted) < len(batch):
+        _report_conflicts(db, batch, inserted, report)
+
+
+def _unique_key(row) -> tuple:
+    return tuple(getattr(row, field) for field in UNIQUE_FIELDS)
+
+
+def _report_conflicts(db: Session, batch, inserted_rows, report: ImportReport):
+    """
+    Works out which unique field each skipped row collided on: an existing
+    employee, or an earlier row of the same import.
+    """
+    # Staged rows are inserted in row order, so each returned row is the first
+    # batch row carrying its unique values
+    unclaimed = {_unique_key(row) for row in inserted_rows}
+    skipped, inserted = [], []
+    for row_no, employee in batch:
+        key = _unique_key(employee)
+        if key in unclaimed:
+            unclaimed.discard(key)
+            inserted.append(employee)
+        else:
+            skipped.append((row_no, employee))
+
+    taken = {}
+    for field in UNIQUE_FIELDS:
+        seen = {getattr(employee, field) for _, employee in skipped}
+        attr = getattr(EmployeeInfo, field)
+        existing = {value for (value,) in db.query(attr).filter(attr.in_(seen))}
+        # Rows inserted by this batch are in the table now; those collisions are in-file duplicates
+        from_file = {getattr(employee, field) for employee in inserted}
+        taken[field] = (existing - from_file, from_file)
+    db.rollback()  # End the read-only transaction opened by the lookups
+
+    for row_no, employee in skipped:
+        reasons = []
+        for field in UNIQUE_FIELDS:
+            in_table, in_file = taken[field]
+            value = getattr(employee, field)
+            if value in in_file:
+                reasons.append(f"duplicate {field} earlier in the upload")
+            elif value in in_table:
+                reasons.append(f"duplicate {field}")
+        report.fail(row_no, ", ".join(reasons) or "conflicts with an existing employee")
+
+
+# ---------------------------
+# ✏️ Bulk update
+# ---------------------------
+
+# Column types for the VALUES list the bulk UPDATE joins against
+_UPDATE_TYPES = {
+    "name": String(100),
+    "date_of_birth": Date(),
+    "address": Text(),
+    "contact_number": String(15),
+    "pan_number": String(10),
+    "aadhar_number": String(12),
+}
+
+
+def update_employees(db: Session, changes):
+    """
+    Applies partial updates to many employees in one transaction.
+    `changes` is a list of (employee_id, {field: value}) with only the fields
+    to change. Runs a single UPDATE ... FROM (VALUES ...) RETURNING; fields
+    left out of a change keep their current value.
+
+    If a change collides with a unique PAN / Aadhaar / contact number, the
+    statement is retried row by row inside savepoints so only the offending
+    IDs fail.
+
+    Returns (outcomes, updated rows): one {"id", "status"[, "error"]} per
+    requested ID, and the rows for employee_sync.employees_changed, to run
+    e.g. as a BackgroundTask.
+    """
+    changes = _last_change_per_id(changes)
+    if not changes:
+        return [], []
+
+    try:
+        updated = {row.id: row for row in db.execute(_bulk_update_statement(changes))}
+        db.commit()
+        outcomes = {emp_id: ("updated" if emp_id in updated else "not_found", None) for emp_id, _ in changes}
+    except IntegrityError:
+        db.rollback()
+        updated, outcomes = _update_row_by_row(db, changes)
+
+    employee_cache.invalidate(*updated)
+    return [_outcome(emp_id, *outcomes[emp_id]) for emp_id, _ in changes], list(updated.values())
+
+
+def _last_change_per_id(changes) -> list:
+    merged = {}
+    for emp_id, fields in changes:
+        merged.setdefault(emp_id, {}).update(fields)
+    return list(merged.items())
+
+
+def _bulk_update_statement(changes):
+    columns = [column("id", Integer)] + [column(field, type_) for field, type_ in _UPDATE_TYPES.items()]
+    rows = [(emp_id, *(fields.get(field) for field in _UPDATE_TYPES)) for emp_id, fields in changes]
+    incoming = values(*columns, name="incoming").data(rows)
+    return (
+        update(EmployeeInfo)
+        .where(EmployeeInfo.id == incoming.c.id)
+        .values(
+            updated_at=func.now(),
+            version=EmployeeInfo.version + 1,  # Retires outstanding ETags, so stale If-Match writes get 412
+            **{
+                # The cast keeps an all-NULL VALUES column from being typed as text
+                field: func.coalesce(cast(incoming.c[field], type_), getattr(EmployeeInfo, field))
+                for field, type_ in _UPDATE_TYPES.items()
+            },
+        )
+        .returning(*semantic_index.INDEXED_COLUMNS)
+    )
+
+
+def _update_row_by_row(db: Session, changes):
+    updated, outcomes = {}, {}
+    for emp_id, fields in changes:
+        savepoint = db.begin_nested()
+        try:
+            row = db.execute(_bulk_update_statement([(emp_id, fields)])).first()
+            savepoint.commit()
+        except IntegrityError as e:
+            savepoint.rollback()
+            outcomes[emp_id] = ("conflict", _conflict_message(e))
+            continue
+        if row is None:
+            outcomes[emp_id] = ("not_found", None)
+        else:
+            updated[emp_id] = row
+            outcomes[emp_id] = ("updated", None)
+    db.commit()
+    return updated, outcomes
+
+
+def _conflict_message(error: IntegrityError) -> str:
+    detail = str(error.orig).lower()
+    for field in UNIQUE_FIELDS:
+        if field in detail:
+            return f"duplicate {field}"
+    return "conflicts with an existing employee"
+
+
+def _outcome(emp_id: int, status: str, error: str = None) -> dict:
+    outcome = {"id": emp_id, "status": status}
+    if error:
+        outcome["error"] = error
+    return outcome
+
+
+# ---------------------------
+# 🗑️ Bulk delete
+# ---------------------------
+
+# Where routers/documents.py keeps each employee's uploads (uploads/<employee_id>/...)
+DOCUMENTS_DIR = os.getenv("DOCUMENTS_UPLOAD_DIR", "uploads")
+
+def delete_employees(db: Session, employee_ids):
+    """
+    Deletes many employees with one DELETE ... WHERE id = ANY(...) RETURNING
+    in a single transaction; employee_documents rows go with them through the
+    ON DELETE CASCADE foreign key.
+
+    Returns (outcomes, document_paths, deleted_ids): one {"id", "status"} per
+    requested ID; the document files to remove: blobs no other record
+    references any more, plus pre-blob-store uploads; and the IDs for
+    employee_sync.employees_deleted. The files and derived indexes are left
+    for the caller to update after the response (see delete_document_files).
+    """
+    employee_ids = list(dict.fromkeys(employee_ids))
+    if not employee_ids:
+        return [], [], []
+    id_array = bindparam("ids", employee_ids, type_=ARRAY(Integer))
+
+    try:
+        paths = [
+            path
+            for row in db.execute(blob_store.document_paths_statement(EmployeeDocuments.employee_id == any_(id_array)))
+            for path in row
+            if path
+        ]
+        # Shared blobs stay until their last reference goes
+        freed = blob_store.release_sync(db, paths)
+        deleted = set(db.execute(
+            delete(EmployeeInfo).where(EmployeeInfo.id == any_(id_array)).returning(EmployeeInfo.id)
+        ).scalars())
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    employee_cache.invalidate(*deleted)
+    file_download.invalidate_documents(*deleted)
+    outcomes = [_outcome(emp_id, "deleted" if emp_id in deleted else "not_found") for emp_id in employee_ids]
+    legacy = [path for path in paths if not blob_store.is_blob_path(path)]
+    document_paths = freed + legacy + [os.path.join(DOCUMENTS_DIR, str(emp_id)) for emp_id in sorted(deleted)]
+    return outcomes, document_paths, sorted(deleted)
+
+
+def delete_document_files(paths):
+    """
+    Removes deleted employees' document files and upload directories.
+    Missing files are ignored.
+    """
+    for path in paths:
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            print(f"⚠️ Could not remove document file {path}: {e}")
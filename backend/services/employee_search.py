@@ -0,0 +1,66 @@
+import os
+
+from sqlalchemy import case, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.schema_models import EmployeeInfo
+
+# ---------------------------
+# 🔎 Fuzzy name / address search
+# ---------------------------
+# Backed by the pg_trgm GIN indexes on employee_info.name and .address (see
+# schema.sql). The `%` / `<%` operators and ILIKE all use those indexes, so a
+# search never scans the table, and trigram similarity tolerates typos.
+
+SEARCH_MAX_RESULTS = int(os.getenv("EMPLOYEE_SEARCH_MAX_RESULTS", "50"))                 # hard cap per request
+SEARCH_SIMILARITY_THRESHOLD = float(os.getenv("EMPLOYEE_SEARCH_SIMILARITY_THRESHOLD", "0.3"))
+ADDRESS_WEIGHT = 0.5  # An address hit ranks below a name hit of the same similarity
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def fuzzy_search(db: AsyncSession, term: str, limit: int = 20, include_address: bool = True):
+    """
+    Employees whose name (or address) resembles `term`, best first.
+    Returns a list of (EmployeeInfo, score) with score in [0, 1]; never more
+    than SEARCH_MAX_RESULTS rows.
+    """
+    term = " ".join(term.split())
+    if not term:
+        return []
+    limit = max(1, min(limit, SEARCH_MAX_RESULTS))
+
+    # Transaction-local thresholds for the % and <% operators
+    await db.execute(select(
+        func.set_config("pg_trgm.similarity_threshold", str(SEARCH_SIMILARITY_THRESHOLD), True),
+        func.set_config("pg_trgm.word_similarity_threshold", str(SEARCH_SIMILARITY_THRESHOLD), True),
+    ))
+
+    query_term = literal(term)
+    pattern = _like_pattern(term)
+    name_score = func.greatest(
+        func.similarity(EmployeeInfo.name, query_term),
+        func.word_similarity(query_term, EmployeeInfo.name),
+    )
+    matches = [
+        EmployeeInfo.name.op("%")(query_term),
+        query_term.op("<%")(EmployeeInfo.name),
+        EmployeeInfo.name.ilike(pattern),
+    ]
+    score = name_score
+    if include_address:
+        score = func.greatest(name_score, ADDRESS_WEIGHT * func.word_similarity(query_term, EmployeeInfo.address))
+        matches += [query_term.op("<%")(EmployeeInfo.address), EmployeeInfo.address.ilike(pattern)]
+
+    # Exact substring hits rank near the top even when their trigram similarity is low
+    ranked = func.greatest(score, case((EmployeeInfo.name.ilike(pattern), 0.9), else_=0.0))
+    rows = (await db.execute(
+        select(EmployeeInfo, ranked.label("score"))
+        .where(or_(*matches))
+        .order_by(ranked.desc(), EmployeeInfo.id)
+        .limit(limit)
+    )).all()
+    return [(emp, round(float(score), 4)) for emp, score in rows]
@@ -0,0 +1,31 @@
+from backend.utils import autocomplete, semantic_index
+
+# ---------------------------
+# 🔁 Derived-index fan-out
+# ---------------------------
+# Every employee write goes through these two calls so the in-process indexes
+# built from employee_info (semantic vectors + projection, name autocomplete)
+# stay in step with the table. Routes schedule them as BackgroundTasks after
+# committing; the bulk services hand back the rows and IDs they changed for that.
+
+
+def employees_changed(employees):
+    """
+    Re-indexes created or updated employees (ORM objects or rows with the indexed columns).
+    """
+    employees = list(employees)
+    if not employees:
+        return
+    semantic_index.upsert_employees(employees)
+    autocomplete.upsert_employees(employees)
+
+
+def employees_deleted(employee_ids):
+    """
+    Drops deleted employees from every derived index.
+    """
+    employee_ids = list(employee_ids)
+    if not employee_ids:
+        return
+    semantic_index.remove_employees(employee_ids)
+    autocomplete.remove_employees(employee_ids)
@@ -0,0 +1,92 @@
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.schema_models import EmployeeDocuments, EmployeeInfo
+from backend.services import blob_store
+
+# ---------------------------
+# ✏️ Single-statement writes with optimistic concurrency
+# ---------------------------
+# Each write is one UPDATE/DELETE ... WHERE id = :id [AND version = :v] RETURNING,
+# so there is no read-modify-write window: a writer holding a stale version
+# matches no row and gets StaleVersion instead of overwriting someone else.
+
+
+class EmployeeNotFound(LookupError):
+    """No employee with the requested ID."""
+
+
+class StaleVersion(Exception):
+    """The employee exists but no longer has the version the client based its write on."""
+
+    def __init__(self, employee_id: int, current_version: int):
+        super().__init__(f"Employee {employee_id} is at version {current_version}")
+        self.employee_id = employee_id
+        self.current_version = current_version
+
+
+async def _raise_for_missing_row(db: AsyncSession, employee_id: int):
+    # Only reached when the write matched nothing: tell 404 and 412 apart
+    current = (await db.execute(select(EmployeeInfo.version).where(EmployeeInfo.id == employee_id))).scalar()
+    if current is None:
+        raise EmployeeNotFound(employee_id)
+    raise StaleVersion(employee_id, current)
+
+
+async def update_employee(db: AsyncSession, employee_id: int, fields: dict, expected_version: int = None) -> EmployeeInfo:
+    """
+    Applies `fields` to one employee and bumps its version in a single
+    UPDATE ... RETURNING, then commits. With `expected_version`, the update
+    only applies if the row is still at that version.
+
+    Returns the updated EmployeeInfo. Raises EmployeeNotFound or StaleVersion
+    (nothing is written), or IntegrityError on a unique-column clash.
+    """
+    stmt = (
+        update(EmployeeInfo)
+        .where(EmployeeInfo.id == employee_id)
+        .values(**fields, version=EmployeeInfo.version + 1, updated_at=func.now())
+        .returning(EmployeeInfo)
+        .execution_options(synchronize_session=False)
+    )
+    if expected_version is not None:
+        stmt = stmt.where(EmployeeInfo.version == expected_version)
+
+    try:
+        employee = (await db.execute(stmt)).scalar_one_or_none()
+        if employee is None:
+            await _raise_for_missing_row(db, employee_id)
+        db.expunge(employee)  # Detached with the RETURNING values; nothing left to reload
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return employee
+
+
+async def delete_employee(db: AsyncSession, employee_id: int, expected_version: int = None) -> list:
+    """
+    Deletes one employee in a single DELETE ... RETURNING and commits; its
+    documents go with it through the ON DELETE CASCADE foreign key, and their
+    blob references are released in the same transaction. With
+    `expected_version`, only deletes the row if it is still at that version.
+
+    Returns the blob files no longer referenced (pass to blob_store.discard).
+    Raises EmployeeNotFound or StaleVersion when nothing was deleted.
+    """
+    stmt = delete(EmployeeInfo).where(EmployeeInfo.id == employee_id).returning(EmployeeInfo.id)
+    if expected_version is not None:
+        stmt = stmt.where(EmployeeInfo.version == expected_version)
+
+    try:
+        documents = (await db.execute(
+            blob_store.document_paths_statement(EmployeeDocuments.employee_id == employee_id)
+        )).all()
+        freed = await blob_store.release(db, [path for row in documents for path in row])
+        if (await db.execute(stmt.execution_options(synchronize_session=False))).scalar() is None:
+            await _raise_for_missing_row(db, employee_id)  # Rolls the release back too
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return freed
@@ -0,0 +1,74 @@
+import re
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.schema_models import EmployeeInfo
+
+# ---------------------------
+# 🪪 Exact identifier lookup
+# ---------------------------
+# PAN, Aadhaar and contact numbers are unique columns, so an identifier-shaped
+# query is a single probe of the matching unique B-tree index: no embedding,
+# no ranking.
+
+_PAN = re.compile(r"^[A-Z]{5}[0-9]{4}[A-Z]$")
+_SEPARATORS = re.compile(r"[\s\-().]")
+
+
+def classify(query: str):
+    """
+    Returns (field, normalized value) when `query` looks like a PAN, Aadhaar
+    or contact number, else None. Spaces, dashes, brackets and a +91 / 0
+    prefix on phone numbers are ignored.
+    """
+    compact = _SEPARATORS.sub("", query or "").upper()
+    if _PAN.match(compact):
+        return "pan_number", compact
+    if compact.startswith("+91") and len(compact) == 13 and compact[3:].isdigit():
+        return "contact_number", compact[3:]
+    if not compact.isdigit():
+        return None
+    if len(compact) == 12:
+        return "aadhar_number", compact
+    if len(compact) == 10:
+        return "contact_number", compact
+    if len(compact) == 11 and compact.startswith("0"):
+        return "contact_number", compact[1:]
+    return None
+
+
+def lookup_statement(query: str):
+    """
+    (field, SELECT for the matching employee) for an identifier-shaped query,
+    or None when the query isn't an identifier.
+    """
+    identifier = classify(query)
+    if identifier is None:
+        return None
+    field, value = identifier
+    return field, select(EmployeeInfo).where(getattr(EmployeeInfo, field) == value)
+
+
+def lookup(db: Session, query: str):
+    """
+    Finds the employee an identifier-shaped query refers to.
+    Returns (field, EmployeeInfo or None), or None when the query isn't an identifier.
+    """
+    found = lookup_statement(query)
+    if found is None:
+        return None
+    field, stmt = found
+    return field, db.execute(stmt).scalar_one_or_none()
+
+
+async def lookup_async(db: AsyncSession, query: str):
+    """
+    lookup() on an AsyncSession.
+    """
+    found = lookup_statement(query)
+    if found is None:
+        return None
+    field, stmt = found
+    return field, (await db.execute(stmt)).scalar_one_or_none()
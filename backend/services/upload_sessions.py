@@ -0,0 +1,302 @@
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+from backend.utils.file_utils import UPLOAD_CHUNK_SIZE, UPLOAD_MAX_BYTES, FileTooLarge, StoredFile, run_io
+
+# ---------------------------
+# ⏯️ Resumable upload sessions
+# ---------------------------
+# Each session is a staging file `<id>.part`, appended to chunk by chunk, and
+# a JSON sidecar `<id>.json` with what the upload is for and when it expires.
+# The current offset is the staging file's size, so it survives restarts and
+# a chunk cut off mid-way keeps whatever bytes did arrive. Finalizing
+# hard-links the staging file into place: nothing is copied, which is why the
+# session directory must be on the same filesystem as the upload directories.
+# The session itself is only removed once the caller's commit succeeds, so a
+# failed finalize can simply be retried.
+#
+# Appending, finalizing and aborting hold an exclusive flock on `<id>.lock`,
+# so they exclude each other across all workers; a request that finds the
+# session busy gets UploadBusy instead of waiting.
+
+UPLOAD_SESSION_DIR = os.getenv("UPLOAD_SESSION_DIR", os.path.join("uploads", ".sessions"))
+UPLOAD_SESSION_TTL = float(os.getenv("UPLOAD_SESSION_TTL", str(24 * 3600)))             # seconds idle before a session expires
+UPLOAD_MAX_CHUNK_BYTES = int(os.getenv("UPLOAD_MAX_CHUNK_BYTES", str(16 * 1024 * 1024)))  # per PUT
+UPLOAD_SESSION_SWEEP_SECONDS = float(os.getenv("UPLOAD_SESSION_SWEEP_SECONDS", "600"))    # how often expired sessions are purged
+
+_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+_last_sweep = 0.0
+_sweep_task = None
+
+
+class UploadSessionNotFound(LookupError):
+    """No such upload session, or it expired."""
+
+
+class OffsetMismatch(Exception):
+    """A chunk was sent for an offset other than where the upload stands."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+class UploadBusy(Exception):
+    """Another request, in this or another worker, is using the session."""
+
+
+class UploadIncomplete(Exception):
+    """Finalize was called before all bytes arrived."""
+
+    def __init__(self, offset: int, size: int):
+        super().__init__(f"Upload has {offset} of {size} bytes")
+        self.offset = offset
+        self.size = size
+
+
+def _paths(upload_id: str):
+    if not _ID_PATTERN.fullmatch(upload_id):  # IDs become file names; reject anything else
+        raise UploadSessionNotFound(upload_id)
+    base = os.path.join(UPLOAD_SESSION_DIR, upload_id)
+    return f"{base}.part", f"{base}.json"
+
+
+def _lock_path(upload_id: str) -> str:
+    return os.path.join(UPLOAD_SESSION_DIR, f"{upload_id}.lock")
+
+
+def _write_sidecar(meta_path: str, session: dict):
+    tmp = f"{meta_path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(session, f)
+    os.replace(tmp, meta_path)
+
+
+def _read_session(upload_id: str):
+    data_path, meta_path = _paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            session = json.load(f)
+        offset = os.path.getsize(data_path)
+    except FileNotFoundError:
+        return None
+    return {**session, "offset": offset}
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_session(upload_id: str):
+    for path in (*_paths(upload_id), _lock_path(upload_id)):
+        _remove_file(path)
+
+
+def _acquire(upload_id: str) -> int:
+    if not os.path.exists(_paths(upload_id)[1]):  # don't leave lock files for unknown IDs
+        raise UploadSessionNotFound(upload_id)
+    fd = os.open(_lock_path(upload_id), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        # Per open file, so it also excludes other requests in this worker;
+        # the kernel drops it if the worker dies
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        raise UploadBusy(upload_id)
+    return fd
+
+
+@asynccontextmanager
+async def _claim(upload_id: str):
+    fd = await run_io(_acquire, upload_id)
+    try:
+        yield
+    finally:
+        os.close(fd)
+
+
+def _link(source: str, destination: str):
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:  # no hard links on this filesystem
+        shutil.copyfile(source, destination)
+
+
+def _sha256_of(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def sweep_expired() -> int:
+    """
+    Deletes expired sessions, and staging and lock files left without a
+    sidecar. Returns how many sessions were removed.
+    """
+    if not os.path.isdir(UPLOAD_SESSION_DIR):
+        return 0
+    now = time.time()
+    removed = 0
+    for name in os.listdir(UPLOAD_SESSION_DIR):
+        upload_id, ext = os.path.splitext(name)
+        if not _ID_PATTERN.fullmatch(upload_id):
+            continue
+        path = os.path.join(UPLOAD_SESSION_DIR, name)
+        try:
+            if ext == ".json":
+                with open(path) as f:
+                    expired = json.load(f)["expires_at"] < now
+            elif ext in (".part", ".lock"):
+                expired = (not os.path.exists(_paths(upload_id)[1])
+                           and os.path.getmtime(path) < now - UPLOAD_SESSION_TTL)
+            else:
+                continue
+        except (OSError, ValueError, KeyError):
+            continue
+        if expired:
+            _remove_session(upload_id)
+            removed += 1
+    if removed:
+        print(f"🧹 Removed {removed} expired upload sessions.")
+    return removed
+
+
+def _maybe_sweep():
+    # Opportunistic, at most every UPLOAD_SESSION_SWEEP_SECONDS, off the request path
+    global _last_sweep, _sweep_task
+    now = time.monotonic()
+    if now - _last_sweep < UPLOAD_SESSION_SWEEP_SECONDS:
+        return
+    _last_sweep = now
+    _sweep_task = asyncio.ensure_future(run_io(sweep_expired))
+
+
+async def create(fields: dict) -> dict:
+    """
+    Opens a session for an upload of `fields["size"]` bytes. `fields` also
+    says what the finished file is for (see backend.routers.uploads) and is
+    kept in the sidecar. Raises FileTooLarge past UPLOAD_MAX_BYTES.
+    """
+    if fields["size"] > UPLOAD_MAX_BYTES:
+        raise FileTooLarge(UPLOAD_MAX_BYTES)
+    _maybe_sweep()
+
+    upload_id = uuid4().hex
+    data_path, meta_path = _paths(upload_id)
+    now = time.time()
+    session = {**fields, "upload_id": upload_id, "created_at": now, "expires_at": now + UPLOAD_SESSION_TTL}
+
+    def write():
+        os.makedirs(UPLOAD_SESSION_DIR, exist_ok=True)
+        open(data_path, "wb").close()
+        _write_sidecar(meta_path, session)
+
+    await run_io(write)
+    return {**session, "offset": 0}
+
+
+async def get(upload_id: str) -> dict:
+    """
+    The session with its current `offset`. Raises UploadSessionNotFound for
+    unknown or expired sessions (and removes the latter).
+    """
+    session = await run_io(_read_session, upload_id)
+    if session is None:
+        raise UploadSessionNotFound(upload_id)
+    if session["expires_at"] < time.time():
+        await run_io(_remove_session, upload_id)
+        raise UploadSessionNotFound(upload_id)
+    return session
+
+
+async def append(upload_id: str, offset: int, chunks) -> dict:
+    """
+    Appends the byte chunks of the async iterable `chunks` (e.g. a request
+    body stream) at `offset`, which must equal the session's current offset.
+
+    Bytes are written as they arrive, so if the stream breaks the next
+    offset reflects what was kept. Raises OffsetMismatch, UploadBusy while
+    another request uses the session, or FileTooLarge when the chunk passes
+    the declared size or UPLOAD_MAX_CHUNK_BYTES. Each successful append
+    pushes the expiry out by UPLOAD_SESSION_TTL.
+    """
+    async with _claim(upload_id):
+        session = await get(upload_id)
+        if offset != session["offset"]:
+            raise OffsetMismatch(session["offset"])
+
+        data_path, meta_path = _paths(upload_id)
+        written = 0
+        buffer = await run_io(open, data_path, "ab")
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                if written + len(chunk) > UPLOAD_MAX_CHUNK_BYTES:
+                    raise FileTooLarge(UPLOAD_MAX_CHUNK_BYTES)
+                if offset + written + len(chunk) > session["size"]:
+                    raise FileTooLarge(session["size"])
+                await run_io(buffer.write, chunk)
+                written += len(chunk)
+        finally:
+            await run_io(buffer.close)
+
+        session["offset"] = offset + written
+        session["expires_at"] = time.time() + UPLOAD_SESSION_TTL
+        await run_io(_write_sidecar, meta_path, {k: v for k, v in session.items() if k != "offset"})
+        return session
+
+
+@asynccontextmanager
+async def finalizing(upload_id: str, destination: str):
+    """
+    Completes an upload: `async with finalizing(...) as stored` gives a
+    StoredFile at `destination`, a hard link to the staging file (no copy)
+    that the block takes over, e.g. with blob_store.adopt().
+
+    The session ends only if the block exits cleanly, i.e. after the
+    caller's commit. If it raises, the session is kept as it was (anything
+    left at `destination` is removed) and finalize can be retried. The
+    session stays locked throughout, so no other request can append to,
+    finalize or abort it meanwhile. Raises UploadIncomplete while bytes are
+    still missing, and UploadBusy.
+    """
+    async with _claim(upload_id):
+        session = await get(upload_id)
+        if session["offset"] != session["size"]:
+            raise UploadIncomplete(session["offset"], session["size"])
+
+        data_path, _ = _paths(upload_id)
+        sha256 = await run_io(_sha256_of, data_path)
+        await run_io(_link, data_path, destination)
+        try:
+            yield StoredFile(destination, session["size"], sha256)
+        except BaseException:
+            await run_io(_remove_file, destination)
+            raise
+        await run_io(_remove_session, upload_id)
+
+
+async def abort(upload_id: str):
+    """
+    Discards a session and whatever was uploaded so far. Raises UploadBusy
+    while another request uses it.
+    """
+    async with _claim(upload_id):
+        await get(upload_id)
+        await run_io(_remove_session, upload_id)
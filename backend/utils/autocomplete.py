@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+
+from sqlalchemy import select
+
+from backend.database import SessionLocal
+from backend.schema_models import EmployeeInfo
+
+# In-process prefix index for the search page's autocomplete
+AUTOCOMPLETE_MAX_RESULTS = int(os.getenv("AUTOCOMPLETE_MAX_RESULTS", "20"))
+AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", "300"))  # full reload, catches other workers' writes
+AUTOCOMPLETE_LOAD_CHUNK_SIZE = int(os.getenv("AUTOCOMPLETE_LOAD_CHUNK_SIZE", "5000"))
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+class PrefixIndex:
+    """
+    Sorted list of (token, employee_id) entries, one per word of each name, so
+    "sin" finds both "Singh, Harpreet" and "Gurpreet Singh". A lookup is one
+    bisect plus a scan of the matching run; writes are an insort/removal.
+    """
+
+    def __init__(self):
+        self._entries = []   # sorted (token, employee_id)
+        self._names = {}     # employee_id -> display name
+        self._lock = threading.RLock()
+        self.loaded_at = None
+
+    def _tokens(self, name: str):
+        normalized = _normalize(name)
+        # The full name as well, so multi-word prefixes ("john d") also match
+        return {normalized, *normalized.split()} if normalized else set()
+
+    def load(self, rows):
+        """
+        Replaces the contents with (employee_id, name) rows.
+        """
+        entries, names = [], {}
+        for emp_id, name in rows:
+            names[emp_id] = name
+            entries.extend((token, emp_id) for token in self._tokens(name))
+        entries.sort()
+        with self._lock:
+            self._entries, self._names = entries, names
+            self.loaded_at = time.monotonic()
+
+    def upsert(self, emp_id: int, name: str):
+        with self._lock:
+            self._remove_locked(emp_id)
+            self._names[emp_id] = name
+            for token in self._tokens(name):
+                insort(self._entries, (token, emp_id))
+
+    def remove(self, emp_id: int):
+        with self._lock:
+            self._remove_locked(emp_id)
+
+    def _remove_locked(self, emp_id: int):
+        old_name = self._names.pop(emp_id, None)
+        if old_name is None:
+            return
+        for token in self._tokens(old_name):
+            pos = bisect_left(self._entries, (token, emp_id))
+            if pos < len(self._entries) and self._entries[pos] == (token, emp_id):
+                del self._entries[pos]
+
+    def complete(self, prefix: str, limit: int = 10):
+        """
+        Up to `limit` {"id", "name"} suggestions whose name, or any word of it,
+        starts with `prefix`, in alphabetical order of the matching word.
+        """
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        matches, seen = [], set()
+        with self._lock:
+            pos = bisect_left(self._entries, (prefix, -1))
+            while pos < len(self._entries) and len(matches) < limit:
+                token, emp_id = self._entries[pos]
+                if not token.startswith(prefix):
+                    break
+                if emp_id not in seen:
+                    seen.add(emp_id)
+                    matches.append({"id": emp_id, "name": self._names[emp_id]})
+                pos += 1
+        return matches
+
+    def __len__(self):
+        return len(self._names)
+
+
+names = PrefixIndex()
+_refresh_lock = threading.Lock()
+
+
+def _load_from_db():
+    db = SessionLocal()
+    try:
+        stmt = select(EmployeeInfo.id, EmployeeInfo.name).execution_options(yield_per=AUTOCOMPLETE_LOAD_CHUNK_SIZE)
+        names.load(db.execute(stmt))
+        print(f"🔤 Loaded {len(names)} names for autocomplete.")
+    finally:
+        db.close()
+
+
+def _refresh_in_background():
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    def run():
+        try:
+            _load_from_db()
+        except Exception as e:
+            print(f"⚠️ Autocomplete refresh failed: {e}")
+        finally:
+            _refresh_lock.release()
+    threading.Thread(target=run, name="autocomplete-refresh", daemon=True).start()
+
+
+def complete(prefix: str, limit: int = 10):
+    """
+    Autocomplete suggestions. Loads the index on first use; after that it is
+    updated on every write through backend.services.employee_sync and fully
+    reloaded in the background every AUTOCOMPLETE_REFRESH_SECONDS.
+    """
+    if names.loaded_at is None:
+        with _refresh_lock:
+            if names.loaded_at is None:
+                _load_from_db()
+    elif time.monotonic() - names.loaded_at > AUTOCOMPLETE_REFRESH_SECONDS:
+        _refresh_in_background()
+    return names.complete(prefix, min(limit, AUTOCOMPLETE_MAX_RESULTS))
+
+
+def upsert_employees(employees):
+    # Before the first load there is nothing to keep fresh; the load will see these rows
+    if names.loaded_at is None:
+        return
+    for emp in employees:
+        names.upsert(emp.id, emp.name)
+
+
+def remove_employees(employee_ids):
+    if names.loaded_at is None:
+        return
+    for emp_id in employee_ids:
+        names.remove(int(emp_id))
@@ -0,0 +1,66 @@
+import os
+
+# Which runtime encodes text for the semantic index:
+#   "torch" - full-precision PyTorch MiniLM (reference)
+#   "onnx"  - int8 dynamically-quantized ONNX export of the same model, run by onnxruntime
+#             (needs `pip install "sentence-transformers[onnx]"`)
+EMBEDDING_BACKEND = os.getenv("SEMANTIC_EMBEDDING_BACKEND", "torch").lower()
+
+# The Hub repo ships pre-quantized exports; point these at a local directory
+# produced by export_quantized_onnx() to use your own.
+ONNX_MODEL = os.getenv("SEMANTIC_ONNX_MODEL", "all-MiniLM-L6-v2")
+ONNX_FILE = os.getenv("SEMANTIC_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+
+BACKENDS = ("torch", "onnx")
+
+
+def encoder_id(model_name: str, backend: str = EMBEDDING_BACKEND) -> str:
+    """
+    Identifies the exact encoder that produced a set of vectors. Stored in index
+    snapshots so switching backends forces a rebuild instead of mixing embeddings.
+    """
+    if backend == "onnx":
+        return f"{ONNX_MODEL}:{ONNX_FILE}"
+    return model_name
+
+
+def load_encoder(model_name: str, backend: str = EMBEDDING_BACKEND):
+    """
+    Loads a SentenceTransformer for the requested backend. Both expose the same
+    .encode() API, so the rest of semantic_index doesn't care which one it gets.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "onnx":
+        return SentenceTransformer(ONNX_MODEL, backend="onnx", model_kwargs={"file_name": ONNX_FILE})
+    raise ValueError(f"Unknown SEMANTIC_EMBEDDING_BACKEND '{backend}' (expected one of {', '.join(BACKENDS)})")
+
+
+def export_quantized_onnx(model_name: str, output_dir: str, config: str = "avx2") -> str:
+    """
+    Exports `model_name` to ONNX and writes an int8 dynamically-quantized copy
+    tuned for `config` ("avx2", "avx512", "avx512_vnni" or "arm64") into output_dir.
+    Returns the relative file name to use as SEMANTIC_ONNX_FILE.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    model = SentenceTransformer(model_name, backend="onnx")
+    model.save_pretrained(output_dir)
+    export_dynamic_quantized_onnx_model(model, config, output_dir)
+    prefix = "quint8" if config == "avx2" else "qint8"
+    return f"onnx/model_{prefix}_{config}.onnx"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export an int8-quantized ONNX copy of the embedding model.")
+    parser.add_argument("output_dir")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--config", default="avx2", choices=["avx2", "avx512", "avx512_vnni", "arm64"])
+    args = parser.parse_args()
+
+    file_name = export_quantized_onnx(args.model, args.output_dir, args.config)
+    print(f"✅ Exported. Use SEMANTIC_EMBEDDING_BACKEND=onnx SEMANTIC_ONNX_MODEL={args.output_dir} SEMANTIC_ONNX_FILE={file_name}")
@@ -0,0 +1,92 @@
+import json
+import os
+import re
+import threading
+
+from fastapi import Request, Response
+
+from backend.utils.etags import if_none_match
+from backend.utils.ttl_cache import TTLCache
+
+# Serialized GET /employees/{id} and /employee/{id} responses
+EMPLOYEE_CACHE_SIZE = int(os.getenv("EMPLOYEE_CACHE_SIZE", "10000"))
+EMPLOYEE_CACHE_TTL = float(os.getenv("EMPLOYEE_CACHE_TTL", "300"))
+
+# One entry per (serializer, employee ID); each router renders a profile differently
+NAMESPACES = ("employees", "employee")
+
+cache = TTLCache(EMPLOYEE_CACHE_SIZE, EMPLOYEE_CACHE_TTL)
+
+# Bumped by every invalidate(). A miss only stores what it loaded if no
+# invalidate ran meanwhile: a write committing between the read and the store
+# would otherwise have its invalidate overtaken by the older row.
+_invalidations = 0
+_invalidations_lock = threading.Lock()
+
+
+def etag_for(employee_id: int, version: int) -> str:
+    """
+    ETag of an employee profile: changes exactly when its version does, so
+    clients can send it back in If-Match for optimistic concurrency.
+    """
+    return f'"{employee_id}-v{version}"'
+
+
+def expected_version(request: Request, employee_id: int):
+    """
+    The version an If-Match header pins a write to, or None without one.
+    Raises ValueError for a header that isn't one of this employee's ETags.
+    """
+    header = request.headers.get("if-match")
+    if not header or header.strip() == "*":
+        return None
+    match = re.fullmatch(rf'\s*"{employee_id}-v(\d+)"\s*', header)
+    if not match:
+        raise ValueError(f"If-Match must be an ETag of employee {employee_id}")
+    return int(match.group(1))
+
+
+def _response(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}  # always revalidate, cheaply
+    if if_none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def cached_employee_response(request: Request, namespace: str, employee_id: int, load) -> Response:
+    """
+    Read-through cache for one employee profile.
+
+    A hit answers straight from memory: 304 when If-None-Match matches,
+    otherwise the stored JSON bytes; no DB access or serialization either way.
+    On a miss `await load()` is called for (JSON-ready dict, version). If it
+    returns None (no such employee) so does this, and the caller raises its
+    404; those aren't cached, and neither is a load that an invalidate()
+    overlapped (it may predate the write); the next request reloads.
+    """
+    entry = cache.get((namespace, employee_id))
+    if entry is None:
+        generation = _invalidations
+        loaded = await load()
+        if loaded is None:
+            return None
+        payload, version = loaded
+        entry = (json.dumps(payload, default=str).encode(), etag_for(employee_id, version))
+        with _invalidations_lock:
+            if generation == _invalidations:
+                cache.set((namespace, employee_id), entry)
+    body, etag = entry
+    return _response(request, body, etag)
+
+
+def invalidate(*employee_ids):
+    """
+    Drops the cached profiles of the given employees. Call right after the
+    commit that changes them.
+    """
+    global _invalidations
+    with _invalidations_lock:
+        _invalidations += 1
+    for employee_id in employee_ids:
+        for namespace in NAMESPACES:
+            cache.invalidate((namespace, int(employee_id)))
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from backend.database import SessionLocal
+from backend.schema_models import EmployeeInfo
+
+# Rows fetched per server-side cursor round trip while exporting
+EXPORT_CHUNK_SIZE = int(os.getenv("EMPLOYEE_EXPORT_CHUNK_SIZE", "1000"))
+
+EXPORT_COLUMNS = (
+    EmployeeInfo.id,
+    EmployeeInfo.name,
+    EmployeeInfo.date_of_birth,
+    EmployeeInfo.address,
+    EmployeeInfo.contact_number,
+    EmployeeInfo.pan_number,
+    EmployeeInfo.aadhar_number,
+    EmployeeInfo.created_at,
+    EmployeeInfo.updated_at,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def _iter_chunks(chunk_size: int):
+    """
+    Streams employee rows from Postgres with a server-side cursor, one chunk at
+    a time. Opens its own session because the response body is produced after
+    the route (and its request-scoped session) has returned.
+    """
+    db = SessionLocal()
+    try:
+        stmt = (
+            select(*EXPORT_COLUMNS)
+            .order_by(EmployeeInfo.created_at, EmployeeInfo.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        for chunk in db.execute(stmt).partitions():
+            yield chunk
+    finally:
+        db.close()
+
+
+def iter_ndjson(chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    One JSON object per line, one yielded string per cursor chunk.
+    """
+    for chunk in _iter_chunks(chunk_size):
+        yield "".join(
+            json.dumps({field: _plain(value) for field, value in zip(EXPORT_FIELDS, row)}) + "\n"
+            for row in chunk
+        )
+
+
+def iter_csv(chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Header line, then one yielded block of CSV rows per cursor chunk.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+
+    for chunk in _iter_chunks(chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_plain(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
+
+
+def export_stream(fmt: str):
+    """
+    Returns (body iterator, media type) for "ndjson" or "csv".
+    """
+    if fmt == "csv":
+        return iter_csv(), MEDIA_TYPES["csv"]
+    return iter_ndjson(), MEDIA_TYPES["ndjson"]
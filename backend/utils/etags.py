@@ -0,0 +1,13 @@
+# Conditional-request helpers shared by the cached employee profiles and file downloads
+
+
+def if_none_match(header: str, etag: str) -> bool:
+    """
+    Whether an If-None-Match header value matches `etag` (a quoted strong
+    ETag), i.e. the client's copy is current and a 304 will do.
+    """
+    if not header:
+        return False
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
@@ -0,0 +1,244 @@
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import NamedTuple
+from urllib.parse import quote
+
+from fastapi import Request, Response
+
+from backend.services.blob_store import DOCUMENT_COLUMNS
+from backend.utils import etags
+from backend.utils.file_utils import run_io
+from backend.utils.ttl_cache import TTLCache
+
+# ---------------------------
+# ⬇️ File downloads
+# ---------------------------
+# What a download needs besides the bytes (path, media type, name, ETag) is
+# cached per URL, so a repeat download reads no database rows. Every entry is
+# checked against the disk when it is served: a path that has gone (its blob
+# was released) is reloaded, never served stale.
+#
+# Responses carry a strong ETag (the content's SHA-256 where it is known),
+# Last-Modified and Cache-Control. They answer If-None-Match /
+# If-Modified-Since with 304, and a single `Range: bytes=...` with 206 (or
+# 416), so viewers can fetch a PDF page by page and resume broken downloads.
+# When the ASGI server offers the zero-copy extensions, the kernel sends the
+# file (sendfile); otherwise it is read in DOWNLOAD_CHUNK_SIZE steps on the
+# I/O threads.
+
+DOWNLOAD_CACHE_SIZE = int(os.getenv("DOWNLOAD_CACHE_SIZE", "10000"))
+DOWNLOAD_CACHE_TTL = float(os.getenv("DOWNLOAD_CACHE_TTL", "300"))
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+DOWNLOAD_CACHE_CONTROL = os.getenv("DOWNLOAD_CACHE_CONTROL", "private, no-cache")  # revalidate; a 304 is cheap
+
+cache = TTLCache(DOWNLOAD_CACHE_SIZE, DOWNLOAD_CACHE_TTL)
+
+
+class DownloadMeta(NamedTuple):
+    path: str
+    filename: str           # offered to the client in Content-Disposition
+    media_type: str
+    sha256: str | None      # None for files stored before the blob store
+
+
+class _Unsatisfiable(Exception):
+    """The Range starts past the end of the file."""
+
+
+def media_type_for(filename: str, declared: str = None) -> str:
+    """
+    `declared` (e.g. the uploader's content type) unless it's missing or
+    generic, otherwise guessed from the file name.
+    """
+    if declared and declared != "application/octet-stream":
+        return declared
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def _etag(meta: DownloadMeta, stat: os.stat_result) -> str:
+    if meta.sha256:
+        return f'"{meta.sha256}"'
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def _byte_range(header: str, size: int):
+    """
+    (first, last) byte, inclusive, of a single-range `Range` header, or None
+    when the header should be ignored (other units, several ranges, bad
+    syntax) and the whole file sent. Raises _Unsatisfiable.
+    """
+    units, _, spec = header.partition("=")
+    if units.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if not first:  # suffix: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise _Unsatisfiable()
+        return max(size - int(last), 0), size - 1
+    start, end = int(first), int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise _Unsatisfiable()
+    return start, min(end, size - 1)
+
+
+class FileRangeResponse(Response):
+    """
+    Sends bytes [start, start + count) of an open file and closes it.
+    """
+
+    def __init__(self, file, start: int, count: int, status_code: int, headers: dict, media_type: str):
+        self.file = file
+        self.start = start
+        self.count = count
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers({**headers, "Content-Length": str(count)})
+
+    async def __call__(self, scope, receive, send):
+        extensions = scope.get("extensions") or {}
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if scope.get("method") == "HEAD" or self.count == 0:
+                await send({"type": "http.response.body", "body": b""})
+            elif "http.response.zerocopysend" in extensions:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": self.file,
+                    "offset": self.start,
+                    "count": self.count,
+                })
+            elif "http.response.pathsend" in extensions and self.start == 0 and self.count == os.fstat(self.file.fileno()).st_size:
+                await send({"type": "http.response.pathsend", "path": os.path.abspath(self.file.name)})
+            else:
+                await self._send_chunks(send)
+        finally:
+            await run_io(self.file.close)
+
+    async def _send_chunks(self, send):
+        fd = self.file.fileno()
+        offset, remaining = self.start, self.count
+        while remaining:
+            chunk = await run_io(os.pread, fd, min(DOWNLOAD_CHUNK_SIZE, remaining), offset)
+            if not chunk:  # truncated underneath us; end the response short
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": bool(remaining)})
+        if remaining:
+            await send({"type": "http.response.body", "body": b""})
+
+
+def _open(path: str):
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    return file, os.fstat(file.fileno())
+
+
+async def _file_response(request: Request, meta: DownloadMeta):
+    opened = await run_io(_open, meta.path)
+    if opened is None:
+        return None
+    file, stat = opened
+
+    etag = _etag(meta, stat)
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": DOWNLOAD_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if (etags.if_none_match(if_none_match, etag) if if_none_match
+            else if_modified_since and _not_modified_since(if_modified_since, stat.st_mtime)):
+        await run_io(file.close)
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = _content_disposition(meta.filename)
+    size = stat.st_size
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range: only honour the Range if the client's copy is still current (strong match)
+    if range_header and (not if_range or if_range.strip() in (etag, last_modified)):
+        try:
+            byte_range = _byte_range(range_header, size)
+        except _Unsatisfiable:
+            await run_io(file.close)
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        return FileRangeResponse(file, 0, size, 200, headers, meta.media_type)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return FileRangeResponse(file, start, end - start + 1, 206, headers, meta.media_type)
+
+
+async def serve(request: Request, key, load):
+    """
+    Download response for the file behind `key` (e.g. ("file", 42)).
+
+    On a cache miss `await load()` is called for its DownloadMeta; it raises
+    (typically a 404) when there is nothing to download. Returns None when
+    the file is missing on disk even after a fresh load, for the caller's 404.
+    """
+    meta = cache.get(key)
+    if meta is not None:
+        response = await _file_response(request, meta)
+        if response is not None:
+            return response
+        cache.invalidate(key)  # released or moved since it was cached
+
+    meta = await load()
+    response = await _file_response(request, meta)
+    if response is not None:
+        cache.set(key, meta)
+    return response
+
+
+def document_key(employee_id: int, document_type: str):
+    return ("document", int(employee_id), document_type)
+
+
+def file_key(file_id: int):
+    return ("file", int(file_id))
+
+
+def invalidate(*keys):
+    """
+    Drops cached download metadata. Call right after the commit that changes
+    or removes the file behind a key.
+    """
+    for key in keys:
+        cache.invalidate(key)
+
+
+def invalidate_documents(*employee_ids):
+    """
+    Drops the cached downloads of all documents of the given employees.
+    """
+    invalidate(*(document_key(employee_id, column.key) for employee_id in employee_ids for column in DOCUMENT_COLUMNS))
@@ -1,11 +1,38 @@
+import asyncio
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Tuple
 from uuid import uuid4
 from fastapi import UploadFile
-from typing import Tuple
 
 ALLOWED_EXTENSIONS = {"pdf", "doc", "docx", "png", "jpg", "jpeg", "zip"}
 UPLOAD_DIR = "uploaded_files"
 
+# Streamed uploads
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))         # bytes read/written per step
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))      # per file; larger uploads get a 413
+UPLOAD_IO_THREADS = int(os.getenv("UPLOAD_IO_THREADS", "4"))
+
+# Dedicated to upload disk writes, so a few large uploads can't starve the
+# shared threadpool that sync routes and run_in_threadpool calls depend on
+_io_pool = ThreadPoolExecutor(max_workers=UPLOAD_IO_THREADS, thread_name_prefix="upload-io")
+
+
+class FileTooLarge(ValueError):
+    """The upload exceeded the size limit; nothing was kept on disk."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"File exceeds the {limit} byte upload limit")
+        self.limit = limit
+
+
+class StoredFile(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+
+
 def is_allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[-1].lower() in ALLOWED_EXTENSIONS
 
@@ -17,5 +44,62 @@ def save_upload_file(file: UploadFile, subdir: str = "") -> Tuple[str, str]:
 
     with open(full_path, "wb") as buffer:
         buffer.write(file.file.read())
-    
+
     return full_path, unique_name
+
+
+def _write_chunk(buffer, hasher, chunk: bytes):
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+
+async def run_io(func, *args):
+    """
+    Runs a blocking file operation on the upload I/O threads.
+    """
+    return await asyncio.get_running_loop().run_in_executor(_io_pool, func, *args)
+
+
+async def stream_to_disk(file: UploadFile, path: str, max_bytes: int = None) -> StoredFile:
+    """
+    Copies an upload to `path` chunk by chunk without blocking the event loop,
+    hashing (SHA-256) and size-checking it in the same pass.
+
+    The data goes to `path + ".part"` first and is renamed into place only
+    once complete, so readers never see a half-written file. Raises
+    FileTooLarge past `max_bytes` (default UPLOAD_MAX_BYTES), removing the
+    partial file.
+
+    The limit applies after spooling: Starlette has already received the
+    whole multipart body (and spooled it to a temp file) before the route
+    runs, so it bounds what is kept, not bandwidth or temp disk. Those are
+    bounded by the server's request body limit, or by using the resumable
+    /uploads API, which checks sizes as the chunks arrive.
+    """
+    limit = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial = f"{path}.part"
+    hasher = hashlib.sha256()
+    size = 0
+
+    buffer = await run_io(open, partial, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > limit:
+                raise FileTooLarge(limit)
+            await run_io(_write_chunk, buffer, hasher, chunk)
+        await run_io(buffer.close)
+        await run_io(os.replace, partial, path)
+    except BaseException:
+        await run_io(buffer.close)
+        await run_io(_remove_if_exists, partial)
+        raise
+    return StoredFile(path, size, hasher.hexdigest())
+
+
+def _remove_if_exists(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
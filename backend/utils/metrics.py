@@ -0,0 +1,45 @@
+import threading
+
+
+class Histogram:
+    """
+    Small thread-safe histogram with fixed upper bounds, reported as cumulative
+    bucket counts (Prometheus style) plus count/sum/mean/max.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        slot = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                slot = i
+                break
+        with self._lock:
+            self._counts[slot] += 1
+            self._count += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            count, total, peak = self._count, self._sum, self._max
+
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(self.buckets + ["+Inf"], counts):
+            running += bucket_count
+            cumulative[f"le_{bound}"] = running
+        return {
+            "count": count,
+            "sum": round(total, 3),
+            "mean": round(total / count, 3) if count else 0.0,
+            "max": round(peak, 3),
+            "buckets": cumulative,
+        }
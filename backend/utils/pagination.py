@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from backend.schema_models import EmployeeInfo
+
+# Keyset pagination over employee_info ordered by (created_at, id).
+# Each page seeks straight to the last row of the previous one through the
+# (created_at, id) index, so page 10,000 costs the same as page 1.
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor can't be decoded (tampered, truncated or from another listing)."""
+
+
+def encode_cursor(created_at: datetime, emp_id: int) -> str:
+    """
+    Opaque cursor pointing just past the given row.
+    """
+    payload = json.dumps([created_at.isoformat() if created_at else None, emp_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, emp_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(emp_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+async def keyset_page(db, stmt, cursor: str = None, limit: int = 100):
+    """
+    Runs one page of a select() over EmployeeInfo with keyset pagination on
+    an AsyncSession.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Raises InvalidCursor for a malformed cursor.
+    """
+    stmt = stmt.order_by(EmployeeInfo.created_at, EmployeeInfo.id)
+    if cursor:
+        created_at, emp_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(EmployeeInfo.created_at, EmployeeInfo.id) > (created_at, emp_id))
+
+    # One extra row says whether there is another page without a COUNT(*)
+    rows = (await db.execute(stmt.limit(limit + 1))).scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
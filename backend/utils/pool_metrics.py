@@ -0,0 +1,72 @@
+import threading
+import time
+
+from sqlalchemy import exc
+
+from backend.utils.metrics import Histogram
+
+
+class PoolMetrics:
+    """
+    Checkout wait times and timeout count of one connection pool. The wait
+    covers queueing for a free connection plus, while the pool is still
+    growing, opening a new one.
+    """
+
+    def __init__(self):
+        self.wait_ms = Histogram([0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, 30000])
+        self._timeouts = 0
+        self._lock = threading.Lock()
+
+    def timed_out(self):
+        with self._lock:
+            self._timeouts += 1
+
+    @property
+    def timeouts(self) -> int:
+        with self._lock:
+            return self._timeouts
+
+
+class _TimedCheckout:
+    # Mixed in ahead of a SQLAlchemy pool class; `metrics` is set per engine
+    metrics: PoolMetrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timed_out()
+            raise
+        finally:
+            self.metrics.wait_ms.observe((time.perf_counter() - start) * 1000)
+
+
+def instrumented_pool_class(pool_class, metrics: PoolMetrics):
+    """
+    A subclass of `pool_class` (QueuePool, AsyncAdaptedQueuePool, ...) that
+    records every checkout into `metrics`. Pass it as create_engine(poolclass=...);
+    it survives pool.recreate() since the metrics hang off the class.
+    """
+    return type(f"Instrumented{pool_class.__name__}", (_TimedCheckout, pool_class), {"metrics": metrics})
+
+
+def pool_stats(pool) -> dict:
+    """
+    Live occupancy of a QueuePool plus its checkout metrics.
+    """
+    stats = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # Negative while the pool hasn't opened all of its `size` connections yet
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout_seconds": pool.timeout(),
+    }
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats["checkout_wait_ms"] = metrics.wait_ms.snapshot()
+        stats["timeouts"] = metrics.timeouts
+    return stats
@@ -0,0 +1,107 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from backend.utils import semantic_index
+from backend.utils.metrics import Histogram
+
+# Dynamic micro-batching for semantic queries
+BATCH_MAX_SIZE = int(os.getenv("SEMANTIC_BATCH_MAX_SIZE", "32"))          # queries per encode/search
+BATCH_MAX_WAIT_MS = float(os.getenv("SEMANTIC_BATCH_MAX_WAIT_MS", "5"))    # how long the first query waits for company
+
+
+class QueryBatcher:
+    """
+    Gathers semantic queries that arrive within `max_wait_ms` of each other (up
+    to `max_batch_size`), encodes them together and runs a single matrix search,
+    then hands each caller its own results.
+
+    Callers block on submit(...).result(), which suits FastAPI's sync routes:
+    the waiting happens on threadpool workers while one dispatcher thread owns
+    the model and index.
+    """
+
+    def __init__(self, search_fn, max_batch_size: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        self.search_fn = search_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.queue_delay_ms = Histogram([0.5, 1, 2, 5, 10, 25, 50, 100, 250])
+        self.search_ms = Histogram([1, 2, 5, 10, 25, 50, 100, 250, 500])
+        self.errors = 0
+
+    def submit(self, query: str, top_k: int = 5) -> Future:
+        """
+        Queues one query. The returned future resolves to a list of
+        (employee_id, distance) pairs, or raises whatever the search raised.
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((query, top_k, future, time.perf_counter()))
+        return future
+
+    def search(self, query: str, top_k: int = 5, timeout: float = 30):
+        return self.submit(query, top_k).result(timeout=timeout)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="semantic-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect_batch(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first[3] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            dispatched = time.perf_counter()
+            for _, _, _, enqueued in batch:
+                self.queue_delay_ms.observe((dispatched - enqueued) * 1000)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                # One search at the largest top_k, then trim per caller
+                max_k = max(top_k for _, top_k, _, _ in batch)
+                results = self.search_fn([query for query, _, _, _ in batch], max_k)
+            except Exception as e:
+                self.errors += 1
+                for _, _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                self.search_ms.observe((time.perf_counter() - dispatched) * 1000)
+
+            for (_, top_k, future, _), hits in zip(batch, results):
+                future.set_result(hits[:top_k])
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": self._queue.qsize(),
+            "errors": self.errors,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_delay_ms": self.queue_delay_ms.snapshot(),
+            "search_ms": self.search_ms.snapshot(),
+        }
+
+
+batcher = QueryBatcher(semantic_index.search_many)
@@ -1,58 +1,978 @@
-import faiss
+import os
+import json
+import fcntl
+import threading
+import multiprocessing
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from sqlalchemy import func, select
 from backend.database import SessionLocal
 from backend.schema_models import EmployeeInfo  # Or models.EmployeeInfo if schema_models doesn't define it
+from backend.utils.ttl_cache import TTLCache
+from backend.utils.embedding_backends import EMBEDDING_BACKEND, encoder_id, load_encoder
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384  # Output size of MiniLM
+
+# Streaming rebuild tuning
+BUILD_CHUNK_SIZE = int(os.getenv("SEMANTIC_BUILD_CHUNK_SIZE", "2000"))      # rows per server-side cursor fetch
+ENCODE_BATCH_SIZE = int(os.getenv("SEMANTIC_ENCODE_BATCH_SIZE", "256"))     # sentences per forward pass
+BUILD_WORKERS = int(os.getenv("SEMANTIC_BUILD_WORKERS", "0"))               # 0 = encode in-process
+
+# On-disk snapshots
+SNAPSHOT_DIR = os.getenv("SEMANTIC_SNAPSHOT_DIR", "semantic_snapshots")
+SNAPSHOTS_TO_KEEP = int(os.getenv("SEMANTIC_SNAPSHOTS_TO_KEEP", "3"))
+SNAPSHOT_RESAVE_THRESHOLD = int(os.getenv("SEMANTIC_SNAPSHOT_RESAVE_THRESHOLD", "1000"))  # changed rows before re-snapshotting
+SEMANTIC_REFRESH_SECONDS = float(os.getenv("SEMANTIC_REFRESH_SECONDS", "60"))  # catch_up() period once warm; 0 = startup only
+SNAPSHOT_FORMAT = 4  # Bump whenever the embedding text or index layout changes
+
+# Index type: "flat" (exact, brute force), "ivf" or "hnsw" (approximate).
+# Approximate indexes and compressed storage only kick in once the corpus reaches
+# ANN_MIN_ROWS; below that a plain float32 flat index is used.
+INDEX_TYPE = os.getenv("SEMANTIC_INDEX_TYPE", "flat").lower()
+ANN_MIN_ROWS = int(os.getenv("SEMANTIC_ANN_MIN_ROWS", "20000"))
+IVF_NLIST = int(os.getenv("SEMANTIC_IVF_NLIST", "0"))                      # 0 = ~4 * sqrt(rows)
+IVF_NPROBE = int(os.getenv("SEMANTIC_IVF_NPROBE", "16"))                   # lists scanned per query
+HNSW_M = int(os.getenv("SEMANTIC_HNSW_M", "32"))                           # graph degree
+HNSW_EF_CONSTRUCTION = int(os.getenv("SEMANTIC_HNSW_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH = int(os.getenv("SEMANTIC_HNSW_EF_SEARCH", "64"))           # candidate list size per query
+TOMBSTONE_REBUILD_RATIO = float(os.getenv("SEMANTIC_TOMBSTONE_REBUILD_RATIO", "0.1"))
+
+# Vector storage: "float" (1536 B/vector), "sq8" (int8 scalar quantization, 384 B) or
+# "pq" (product quantization, PQ_M bytes). Compressed candidates can be re-ranked
+# against "flat" (exact float32) or "fp16" (half-size) copies of the vectors.
+VECTOR_STORAGE = os.getenv("SEMANTIC_VECTOR_STORAGE", "float").lower()
+PQ_M = int(os.getenv("SEMANTIC_PQ_M", "48"))                              # sub-quantizers; must divide 384
+RERANK = os.getenv("SEMANTIC_RERANK", "none").lower()
+RERANK_K_FACTOR = int(os.getenv("SEMANTIC_RERANK_K_FACTOR", "4"))        # candidates fetched per result
+
+# Query caches: normalized query -> embedding, and (query, top_k, index_version) -> ranked hits
+EMBEDDING_CACHE_SIZE = int(os.getenv("SEMANTIC_EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_TTL = float(os.getenv("SEMANTIC_EMBEDDING_CACHE_TTL", "3600"))
+RESULT_CACHE_SIZE = int(os.getenv("SEMANTIC_RESULT_CACHE_SIZE", "5000"))
+RESULT_CACHE_TTL = float(os.getenv("SEMANTIC_RESULT_CACHE_TTL", "300"))
+
+# torch, sentence-transformers and faiss are imported on first use, not at module
+# import, so processes that never serve a semantic query don't pay for them.
+# `model` and `index` stay None until get_model() / warm_up() load them.
+model = None
+_model_lock = threading.Lock()
+
+index = None
+_index_lock = threading.RLock()  # Guards every read/write of `index`
+_build_journal = None  # Upserts/removals that happen while a rebuild is running
+_projection = {}  # employee ID -> PROJECTION_FIELDS values, kept in step with `index`
+_tombstones = set()  # Internal labels of vectors deleted or replaced in an index that can't remove them (HNSW, IVF, refine)
+index_version = 0  # Bumped on every change to `index`; part of the result cache key
+_rebuild_thread = None
+_index_mmapped = False  # True while `index` is backed by a shared, read-only snapshot mapping
+_high_water_mark = None  # Latest employee_info.updated_at reflected in `index`
+snapshot_version = None  # Snapshot the live index was loaded from, if any
+
+_ready = threading.Event()  # Set once the model and index are both warm
+_warm_up_thread = None
+_refresh_thread = None
+_refresh_stop = threading.Event()  # Ends the periodic catch-up (tests, shutdown)
+_warm_up_error = None
+
+embedding_cache = TTLCache(EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL)
+result_cache = TTLCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+
+
+class IndexNotReady(RuntimeError):
+    """Raised when a search arrives before the model and index have been warmed up."""
+
+
+def get_model():
+    """
+    Returns the sentence-transformer, loading it on first call with the backend
+    picked by SEMANTIC_EMBEDDING_BACKEND (PyTorch or int8 ONNX).
+    """
+    global model
+    if model is None:
+        with _model_lock:
+            if model is None:
+                model = load_encoder(MODEL_NAME)
+                embedding_cache.clear()  # Embeddings are only valid for the model that produced them
+    return model
+
+
+# ---------------------------
+# 🧭 Index construction
+# ---------------------------
+
+IndexLayout = namedtuple("IndexLayout", "kind storage rerank")
+FLAT_LAYOUT = IndexLayout("flat", "float", "none")
+
+
+def choose_layout(expected_rows: int) -> IndexLayout:
+    """
+    Index type, vector storage and re-ranking to build for a corpus of
+    `expected_rows`: the configured ones once the corpus passes ANN_MIN_ROWS,
+    plain float32 flat below that.
+    """
+    if INDEX_TYPE not in ("flat", "ivf", "hnsw"):
+        raise ValueError(f"Unknown SEMANTIC_INDEX_TYPE '{INDEX_TYPE}' (expected flat, ivf or hnsw)")
+    if VECTOR_STORAGE not in ("float", "sq8", "pq"):
+        raise ValueError(f"Unknown SEMANTIC_VECTOR_STORAGE '{VECTOR_STORAGE}' (expected float, sq8 or pq)")
+    if RERANK not in ("none", "fp16", "flat"):
+        raise ValueError(f"Unknown SEMANTIC_RERANK '{RERANK}' (expected none, fp16 or flat)")
+    if expected_rows < ANN_MIN_ROWS:
+        return FLAT_LAYOUT
+    return IndexLayout(INDEX_TYPE, VECTOR_STORAGE, RERANK if VECTOR_STORAGE != "float" else "none")
+
+
+def _ivf_nlist(expected_rows: int) -> int:
+    return IVF_NLIST or int(min(65536, max(16, 4 * np.sqrt(expected_rows))))
+
+
+def _factory_string(layout: IndexLayout, expected_rows: int) -> str:
+    codec = {"float": "Flat", "sq8": "SQ8", "pq": f"PQ{PQ_M}"}[layout.storage]
+    if layout.kind == "ivf":
+        desc = f"IVF{_ivf_nlist(expected_rows)},{codec}"
+    elif layout.kind == "hnsw":
+        desc = f"HNSW{HNSW_M}" if layout.storage == "float" else f"HNSW{HNSW_M}_{codec}"
+    else:
+        desc = codec
+    if layout.rerank == "flat":
+        desc += ",RFlat"
+    elif layout.rerank == "fp16":
+        desc += ",Refine(SQfp16)"
+    return desc
+
+
+def min_train_rows(layout: IndexLayout, expected_rows: int) -> int:
+    """
+    Fewest vectors the layout can be trained on (0 when it needs no training).
+    """
+    needed = 0
+    if layout.kind == "ivf":
+        needed = max(needed, _ivf_nlist(expected_rows))
+    if layout.storage == "pq":
+        needed = max(needed, 256)  # one k-means per sub-quantizer with 256 centroids
+    elif layout.storage == "sq8":
+        needed = max(needed, 1)
+    return needed
+
+
+def new_index(layout: IndexLayout = FLAT_LAYOUT, expected_rows: int = 0):
+    """
+    Empty FAISS index for 384-dim embeddings (for MiniLM model), keyed by employee ID
+    so single vectors can be added or removed without a rebuild.
+    IVF and compressed layouts must be trained (see index_rows) before vectors are added.
+    """
+    import faiss
+    idx = faiss.index_factory(EMBEDDING_DIM, f"IDMap2,{_factory_string(layout, expected_rows)}")
+    base, _ = _unwrap(idx)
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    apply_search_params(idx)
+    return idx
+
+
+def _unwrap(idx):
+    # IDMap2 -> [Refine ->] base index; returns (base, refine or None)
+    import faiss
+    inner = faiss.downcast_index(idx.index)
+    if isinstance(inner, faiss.IndexRefine):
+        return faiss.downcast_index(inner.base_index), inner
+    return inner, None
+
+
+def index_layout(idx) -> IndexLayout:
+    import faiss
+    base, refine = _unwrap(idx)
+    if isinstance(base, faiss.IndexIVF):
+        kind = "ivf"
+    elif isinstance(base, faiss.IndexHNSW):
+        kind = "hnsw"
+        base = faiss.downcast_index(base.storage)
+    else:
+        kind = "flat"
+
+    if isinstance(base, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        storage = "sq8"
+    elif isinstance(base, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        storage = "pq"
+    else:
+        storage = "float"
+
+    rerank = "none"
+    if refine is not None:
+        rerank = "flat" if isinstance(faiss.downcast_index(refine.refine_index), faiss.IndexFlat) else "fp16"
+    return IndexLayout(kind, storage, rerank)
+
+
+def apply_search_params(idx, nprobe: int = None, ef_search: int = None, k_factor: int = None):
+    """
+    Applies the query-time knobs (IVF nprobe / HNSW efSearch / re-rank k_factor)
+    to an index. They aren't reliably preserved by snapshots, so this runs after
+    every load too.
+    """
+    import faiss
+    base, refine = _unwrap(idx)
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = nprobe or IVF_NPROBE
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = ef_search or HNSW_EF_SEARCH
+    if refine is not None:
+        refine.k_factor = k_factor or RERANK_K_FACTOR
+
+
+def supports_remove(idx) -> bool:
+    # Only flat storage compacts in step with the IDMap2 labels. HNSW graphs
+    # can't drop nodes, refine wrappers don't implement removal, and IVF lists
+    # keep their old labels while remove_ids renumbers the ID map. Deleted and
+    # replaced vectors there become tombstones until the next rebuild
+    layout = index_layout(idx)
+    return layout.kind == "flat" and layout.rerank == "none"
+
+
+def _id_map(idx) -> np.ndarray:
+    # Employee ID of every internal label, as a view on the index's own array:
+    # only valid until the next add, so use it with _index_lock held
+    import faiss
+    if not idx.id_map.size():
+        return np.empty(0, dtype="int64")
+    return faiss.rev_swig_ptr(idx.id_map.data(), idx.id_map.size())
+
+
+def _labels_of(idx, ids: np.ndarray) -> list:
+    # Internal labels currently holding vectors for the given employee IDs
+    return np.flatnonzero(np.isin(_id_map(idx), ids)).tolist()
+
+
+def _live_ids(idx, tombstones: set) -> np.ndarray:
+    id_map = _id_map(idx)
+    if not tombstones:
+        return id_map.copy()
+    return np.delete(id_map, np.fromiter(tombstones, dtype="int64"))
+
+
+def _search_labels(idx, tombstones: set, queries: np.ndarray, k: int):
+    """
+    Searches below the ID map so hits come back as internal labels, drops
+    tombstoned ones and maps the rest to employee IDs (-1 where dropped or empty).
+    """
+    D, labels = idx.index.search(queries, k)
+    ids = np.where(labels >= 0, _id_map(idx)[np.maximum(labels, 0)], -1)
+    if tombstones:
+        ids[np.isin(labels, np.fromiter(tombstones, dtype="int64"))] = -1
+    return D, ids
+
+# Only the columns that feed the embedding text and the projection are pulled during a rebuild
+INDEXED_COLUMNS = (
+    EmployeeInfo.id,
+    EmployeeInfo.name,
+    EmployeeInfo.address,
+    EmployeeInfo.contact_number,
+)
+
+
+# Fields search results are hydrated from without going back to Postgres
+PROJECTION_FIELDS = ("name", "address", "contact_number")
+
+
+def projection_row(emp) -> tuple:
+    return tuple(getattr(emp, field) for field in PROJECTION_FIELDS)
+
+
+def employee_text(emp) -> str:
+    """
+    Text that gets embedded for an employee row (ORM object or column tuple).
+    Identifiers (PAN, Aadhaar, phone) are left out: they carry no meaning for
+    the model and are answered exactly by backend/services/identifier_lookup.
+    """
+    return f"{emp.name} {emp.address}"
+
+
+def encode_texts(texts, encoder=None) -> np.ndarray:
+    """
+    Encodes a list of texts in large batches and returns a float32 matrix.
+    """
+    embeddings = (encoder or get_model()).encode(
+        list(texts),
+        batch_size=ENCODE_BATCH_SIZE,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    return np.ascontiguousarray(embeddings, dtype="float32")
+
+
+# ---------------------------
+# 🧵 Process pool helpers
+# ---------------------------
+
+def _init_worker(torch_threads: int):
+    # Every worker gets its own slice of the cores instead of all of them
+    import torch
+    torch.set_num_threads(torch_threads)
+
+
+def _encode_in_worker(texts):
+    # Workers are spawned, so each one loads its own copy of the model
+    return encode_texts(texts)
+
+
+def _as_ids(ids) -> np.ndarray:
+    return np.fromiter(ids, dtype="int64")
+
+
+class _StreamingAdder:
+    """
+    Appends encoded chunks to a new index. Indexes that need training (IVF,
+    SQ8, PQ) buffer the first chunks until there are enough samples, train
+    once, then stream.
+    """
+
+    def __init__(self, layout: IndexLayout, expected_rows: int):
+        self.index = new_index(layout, expected_rows)
+        self.min_rows = min_train_rows(layout, expected_rows)
+        # ~50 samples per IVF list / enough for 256 PQ centroids, capped at the corpus size
+        self.train_rows = min(expected_rows, max(self.min_rows * 50, 10000)) if self.min_rows else 0
+        self.buffered = []
+        self.buffered_rows = 0
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray):
+        if self.index.is_trained:
+            self.index.add_with_ids(vectors, ids)
+            return
+        self.buffered.append((vectors, ids))
+        self.buffered_rows += len(ids)
+        if self.buffered_rows >= self.train_rows:
+            self._train_and_flush()
 
-# Load the model once
-model = SentenceTransformer("all-MiniLM-L6-v2")
+    def _train_and_flush(self):
+        if not self.buffered:
+            return
+        sample = np.concatenate([vectors for vectors, _ in self.buffered])
+        if len(sample) < self.min_rows:
+            # Fewer rows than the estimate (deleted mid-build): not enough to train, go exact
+            self.index = new_index(FLAT_LAYOUT)
+        else:
+            self.index.train(sample)
+        for vectors, ids in self.buffered:
+            self.index.add_with_ids(vectors, ids)
+        self.buffered, self.buffered_rows = [], 0
+
+    def finish(self):
+        self._train_and_flush()
+        return self.index
+
+
+def index_rows(chunks, workers: int = BUILD_WORKERS, expected_rows: int = 0):
+    """
+    Encodes an iterable of row chunks and appends each one to a fresh index as it
+    arrives. At most a couple of chunks per worker are in flight, so memory stays
+    flat regardless of how many rows the iterable yields. `expected_rows` picks
+    the index layout (see choose_layout).
+    Returns the new index.
+    """
+    adder = _StreamingAdder(choose_layout(expected_rows), expected_rows)
+
+    if workers <= 0:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            adder.add(encode_texts(employee_text(row) for row in chunk), _as_ids(row.id for row in chunk))
+        return adder.finish()
 
-# Create a FAISS index for 384-dim embeddings (for MiniLM model)
-index = faiss.IndexFlatL2(384)
-id_map = []  # Maps FAISS index to employee IDs
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    pending = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),  # fork + torch threads can deadlock
+        initializer=_init_worker,
+        initargs=(torch_threads,),
+    ) as pool:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            texts = [employee_text(row) for row in chunk]
+            pending.append((_as_ids(row.id for row in chunk), pool.submit(_encode_in_worker, texts)))
+            while len(pending) >= workers * 2:
+                ids, future = pending.popleft()
+                adder.add(future.result(), ids)
+        while pending:
+            ids, future = pending.popleft()
+            adder.add(future.result(), ids)
 
+    return adder.finish()
 
-def build_index():
+
+def build_index(chunk_size: int = BUILD_CHUNK_SIZE, workers: int = BUILD_WORKERS):
     """
     Builds the FAISS semantic index from employee data.
+    Rows are streamed from Postgres with a server-side cursor in chunks of
+    `chunk_size`, encoded in batches (optionally across `workers` processes) and
+    appended to a new index, which replaces the live one once complete.
+    Writes that land while the rebuild is running are replayed onto the new index.
+    Returns True on success.
     """
     print("🔍 Building semantic index...")
-    global id_map
-    id_map.clear()
-    all_embeddings = []
+    global index, _build_journal, _index_mmapped, _high_water_mark, _tombstones, _projection
+
+    with _index_lock:
+        _build_journal = []
 
     db = SessionLocal()
     try:
-        employees = db.query(EmployeeInfo).all()
-        for emp in employees:
-            combined_text = f"{emp.name} {emp.address} {emp.pan_number} {emp.aadhar_number} {emp.contact_number}"
-            embedding = model.encode(combined_text)
-            all_embeddings.append(embedding)
-            id_map.append(emp.id)
-
-        if all_embeddings:
-            index.add(np.array(all_embeddings).astype("float32"))
-            print(f"✅ Indexed {len(id_map)} employees.")
+        high_water_mark = _current_high_water_mark(db)
+        expected_rows = db.query(func.count(EmployeeInfo.id)).scalar() or 0
+        stmt = (
+            select(*INDEXED_COLUMNS)
+            .order_by(EmployeeInfo.id)
+            .execution_options(yield_per=chunk_size)  # server-side cursor
+        )
+        result = db.execute(stmt)
+        built_projection = {}
+        built = index_rows(
+            _record_projection(result.partitions(), built_projection),
+            workers=workers,
+            expected_rows=expected_rows,
+        )
+        built_tombstones = set()
+
+        with _index_lock:
+            for op, ids, vectors, rows in _build_journal:
+                if op == "upsert":
+                    _apply_upsert(built, built_tombstones, ids, vectors)
+                    built_projection.update(zip(ids.tolist(), rows))
+                else:
+                    _apply_remove(built, built_tombstones, ids)
+                    for emp_id in ids.tolist():
+                        built_projection.pop(emp_id, None)
+            index = built
+            _projection = built_projection
+            _tombstones = built_tombstones
+            _bump_version()
+            _index_mmapped = False
+            _high_water_mark = high_water_mark
+
+        if index.ntotal:
+            print(f"✅ Indexed {index.ntotal} employees ({'/'.join(index_layout(index))} index).")
         else:
             print("⚠️ No employee records found to index.")
+        return True
     except Exception as e:
         print(f"❌ Error while building index: {e}")
+        return False
     finally:
+        with _index_lock:
+            _build_journal = None
         db.close()
 
 
-def semantic_search(query: str, top_k=5):
+def upsert_employees(employees):
     """
-    Performs a semantic search over the FAISS index.
-    Returns the top_k employee IDs based on query similarity.
+    Adds or replaces the vectors for the given employees (ORM objects or rows).
+    Costs one batched encode; no rebuild needed. A no-op in processes that
+    haven't loaded the index: catch_up() picks the rows up when they do.
     """
-    if not id_map or index.ntotal == 0:
-        print("⚠️ Index is empty. Rebuild it using build_index().")
+    employees = list(employees)
+    if not employees or (index is None and _build_journal is None):
+        return
+    vectors = encode_texts(employee_text(emp) for emp in employees)
+    ids = _as_ids(emp.id for emp in employees)
+    rows = [projection_row(emp) for emp in employees]
+
+    with _index_lock:
+        if index is not None:
+            _make_private()
+            _apply_upsert(index, _tombstones, ids, vectors)
+            _projection.update(zip(ids.tolist(), rows))
+            _bump_version()
+        if _build_journal is not None:
+            _build_journal.append(("upsert", ids, vectors, rows))
+    _maybe_schedule_rebuild()
+
+
+def remove_employees(employee_ids):
+    """
+    Drops the vectors for the given employee IDs from the index.
+    """
+    ids = _as_ids(employee_ids)
+    if not len(ids):
+        return
+
+    with _index_lock:
+        if index is not None:
+            _make_private()
+            _apply_remove(index, _tombstones, ids)
+            for emp_id in ids.tolist():
+                _projection.pop(emp_id, None)
+            _bump_version()
+        if _build_journal is not None:
+            _build_journal.append(("remove", ids, None, None))
+    _maybe_schedule_rebuild()
+
+
+def _record_projection(chunks, projection: dict):
+    # Fills the projection from the same cursor the build encodes, so it matches the new index row for row
+    for chunk in chunks:
+        projection.update((row.id, projection_row(row)) for row in chunk)
+        yield chunk
+
+
+def _bump_version():
+    # Called with _index_lock held. Cached results carry the version they were computed
+    # against, so bumping it retires them; clearing just frees the memory early.
+    global index_version
+    index_version += 1
+    result_cache.clear()
+
+
+def _apply_upsert(idx, tombstones: set, ids: np.ndarray, vectors: np.ndarray):
+    if supports_remove(idx):
+        idx.remove_ids(ids)
+    else:
+        # The old vector stays in the index under the same ID; retire it by label
+        tombstones.update(_labels_of(idx, ids))
+    idx.add_with_ids(vectors, ids)
+
+
+def _apply_remove(idx, tombstones: set, ids: np.ndarray):
+    if supports_remove(idx):
+        idx.remove_ids(ids)
+    else:
+        tombstones.update(_labels_of(idx, ids))
+
+
+def _maybe_schedule_rebuild():
+    """
+    Kicks off a background rebuild when the corpus has grown past ANN_MIN_ROWS
+    while still on a flat index, or when tombstones pile up in an HNSW index.
+    """
+    global _rebuild_thread
+    if index is None or _build_journal is not None or not _rebuild_due():
+        return
+    if _rebuild_thread is not None and _rebuild_thread.is_alive():
+        return
+    _rebuild_thread = threading.Thread(target=_rebuild_and_snapshot, name="semantic-rebuild", daemon=True)
+    _rebuild_thread.start()
+
+
+def _rebuild_due() -> bool:
+    crossed_threshold = index_layout(index) == FLAT_LAYOUT and choose_layout(index.ntotal) != FLAT_LAYOUT
+    # Deleted and replaced vectors alike: both still cost search time and memory
+    too_many_tombstones = len(_tombstones) > TOMBSTONE_REBUILD_RATIO * max(index.ntotal, 1)
+    return crossed_threshold or too_many_tombstones
+
+
+def _rebuild_and_snapshot():
+    if build_index():
+        save_snapshot()
+
+
+def _make_private():
+    # Copy-on-write: a mapped snapshot is shared with other workers and read-only,
+    # so the first write in this process takes a private copy. Call with _index_lock held.
+    # The copy goes through serialize/deserialize: clone_index() keeps pointing the
+    # codes at the mapping, and the first remove_ids/add_with_ids on it segfaults.
+    # Mapped IVF lists can neither be cloned nor serialized, so they are copied
+    # into memory in place instead (searches hold _index_lock too).
+    global index, _index_mmapped
+    if _index_mmapped:
+        import faiss
+        base, _ = _unwrap(index)
+        if isinstance(base, faiss.IndexIVF):
+            _load_inverted_lists(base)
+        else:
+            index = faiss.deserialize_index(faiss.serialize_index(index))
+            apply_search_params(index)
+        _index_mmapped = False
+
+
+def _load_inverted_lists(ivf):
+    import faiss
+    mapped = ivf.invlists
+    lists = faiss.ArrayInvertedLists(ivf.nlist, ivf.code_size)
+    for list_no in range(ivf.nlist):
+        size = mapped.list_size(list_no)
+        if size:
+            lists.add_entries(list_no, size, mapped.get_ids(list_no), mapped.get_codes(list_no))
+    ivf.replace_invlists(lists, True)
+    lists.this.disown()  # owned by the index now
+
+
+# ---------------------------
+# 💾 On-disk snapshots
+# ---------------------------
+
+# Rows whose transaction started before the mark was read can commit after it,
+# so catch-up looks back a little further than the mark itself. Rows in that
+# margin that the snapshot already has unchanged are skipped, so a fresh
+# snapshot stays shared instead of every worker taking a private copy.
+_CATCH_UP_MARGIN = timedelta(minutes=5)
+
+
+def _current_high_water_mark(db):
+    return db.query(func.max(EmployeeInfo.updated_at)).scalar()
+
+
+def _manifest_path() -> str:
+    return os.path.join(SNAPSHOT_DIR, "latest.json")
+
+
+def _read_manifest():
+    try:
+        with open(_manifest_path()) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _projection_path(index_file: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, index_file[:-len(".faiss")] + ".projection.json")
+
+
+def _prune_snapshots(current_file: str):
+    # Unlinking is safe even if another worker still has the file mapped
+    snapshots = sorted(f for f in os.listdir(SNAPSHOT_DIR) if f.startswith("index-") and f.endswith(".faiss"))
+    for name in snapshots[:-SNAPSHOTS_TO_KEEP]:
+        if name != current_file:
+            os.remove(os.path.join(SNAPSHOT_DIR, name))
+            if os.path.exists(_projection_path(name)):
+                os.remove(_projection_path(name))
+
+
+def save_snapshot():
+    """
+    Writes the live index to a new versioned snapshot file tagged with the DB
+    high-water mark, then points latest.json at it.
+    """
+    import faiss
+    if index is None:
+        return
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    filename = f"index-{version}.faiss"
+    path = os.path.join(SNAPSHOT_DIR, filename)
+
+    with _index_lock:
+        faiss.write_index(index, path + ".tmp")
+        projection = [[emp_id, *row] for emp_id, row in _projection.items()]
+        manifest = {
+            "version": version,
+            "file": filename,
+            "format": SNAPSHOT_FORMAT,
+            "model": encoder_id(MODEL_NAME),
+            "count": int(index.ntotal),
+            "layout": index_layout(index)._asdict(),
+            "tombstones": sorted(_tombstones),
+            "high_water_mark": _high_water_mark.isoformat() if _high_water_mark else None,
+        }
+    os.replace(path + ".tmp", path)
+
+    with open(_projection_path(filename) + ".tmp", "w") as f:
+        json.dump(projection, f)
+    os.replace(_projection_path(filename) + ".tmp", _projection_path(filename))
+
+    with open(_manifest_path() + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(_manifest_path() + ".tmp", _manifest_path())
+
+    _prune_snapshots(filename)
+    print(f"💾 Saved semantic index snapshot {version} ({manifest['count']} vectors).")
+
+
+def load_snapshot() -> bool:
+    """
+    Memory-maps the latest compatible snapshot as the live index.
+    Returns False when there is no usable snapshot.
+    """
+    import faiss
+    global index, _index_mmapped, _high_water_mark, snapshot_version, _tombstones, _projection
+    manifest = _read_manifest()
+    if not manifest or manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("model") != encoder_id(MODEL_NAME):
+        return False
+    layout = IndexLayout(**manifest.get("layout", FLAT_LAYOUT._asdict()))
+    if layout != choose_layout(manifest.get("count", 0)):
+        print("⚠️ Snapshot index layout doesn't match the SEMANTIC_* settings; rebuilding.")
+        return False
+
+    # Map the vectors instead of reading them so workers on one host share the page cache.
+    # IVF inverted lists are mapped by IO_FLAG_MMAP, which can't be combined with
+    # IO_FLAG_MMAP_IFC; flat codes are mapped by the latter where it exists.
+    if layout.kind == "ivf":
+        mmap_flags = faiss.IO_FLAG_MMAP
+    else:
+        mmap_flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    path = os.path.join(SNAPSHOT_DIR, manifest["file"])
+    try:
+        loaded = faiss.read_index(path, mmap_flags)
+    except RuntimeError as e:
+        print(f"⚠️ Could not load snapshot {path}: {e}")
+        return False
+    try:
+        with open(_projection_path(manifest["file"])) as f:
+            projection = {row[0]: tuple(row[1:]) for row in json.load(f)}
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"⚠️ Could not load snapshot projection for {path}: {e}")
+        return False
+
+    apply_search_params(loaded)
+    mark = manifest.get("high_water_mark")
+    with _index_lock:
+        index = loaded
+        _projection = projection
+        _tombstones = set(manifest.get("tombstones", []))
+        _bump_version()
+        _index_mmapped = True
+        _high_water_mark = datetime.fromisoformat(mark) if mark else None
+        snapshot_version = manifest["version"]
+    return True
+
+
+def catch_up(chunk_size: int = BUILD_CHUNK_SIZE) -> int:
+    """
+    Re-embeds rows changed since the high-water mark and drops vectors whose
+    employees no longer exist. Returns the number of rows touched.
+    """
+    global _high_water_mark
+    db = SessionLocal()
+    try:
+        new_mark = _current_high_water_mark(db)
+        touched = 0
+
+        stmt = (
+            select(*INDEXED_COLUMNS)
+            .order_by(EmployeeInfo.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        if _high_water_mark is not None:
+            stmt = stmt.where(EmployeeInfo.updated_at >= _high_water_mark - _CATCH_UP_MARGIN)
+        for chunk in db.execute(stmt).partitions():
+            changed = _changed_rows(chunk)
+            upsert_employees(changed)
+            touched += len(changed)
+
+        # Deletes leave no timestamp behind, so diff the indexed IDs against the table.
+        # Indexed IDs are read first: anything indexed by then was committed by then,
+        # so a row created in between can't be mistaken for a deleted one.
+        with _index_lock:
+            indexed_ids = _live_ids(index, _tombstones)
+        live_ids = np.fromiter(
+            db.execute(select(EmployeeInfo.id).execution_options(yield_per=chunk_size)).scalars(),
+            dtype="int64",
+        )
+        stale_ids = np.setdiff1d(indexed_ids, live_ids)
+        remove_employees(stale_ids)
+        touched += len(stale_ids)
+
+        _high_water_mark = new_mark
+        return touched
+    finally:
+        db.close()
+
+
+def _changed_rows(rows) -> list:
+    # Rows whose indexed fields differ from what the index holds for them
+    with _index_lock:
+        return [row for row in rows if _projection.get(row.id) != projection_row(row)]
+
+
+def load_or_build():
+    """
+    Startup entry point: map the latest snapshot and re-embed only rows changed
+    since it was taken, or do a full build and snapshot it when none exists.
+    A file lock makes sure only one worker on the host builds; the others wait
+    and then map the snapshot it wrote.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    with open(os.path.join(SNAPSHOT_DIR, ".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if load_snapshot():
+                changed = catch_up()
+                print(f"✅ Loaded snapshot {snapshot_version} ({index.ntotal} vectors), caught up {changed} rows.")
+                if changed >= SNAPSHOT_RESAVE_THRESHOLD:
+                    save_snapshot()
+            elif build_index():
+                save_snapshot()
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# ---------------------------
+# 🔥 Warm-up and readiness
+# ---------------------------
+
+def warm_up():
+    """
+    Loads the model and the index (snapshot or full build), then marks search as ready.
+    """
+    global _warm_up_error
+    try:
+        started = datetime.now()
+        get_model()
+        load_or_build()
+        if index is None:
+            raise RuntimeError("semantic index could not be loaded or built")
+        _ready.set()
+        print(f"🔥 Semantic search warm in {(datetime.now() - started).total_seconds():.1f}s.")
+        _start_refresh()
+    except Exception as e:
+        _warm_up_error = str(e)
+        print(f"❌ Semantic search warm-up failed: {e}")
+
+
+def _refresh_loop():
+    # Writes made in other processes (the admin app, other workers) only reach
+    # this index through catch_up(), so run it periodically instead of only at startup
+    while not _refresh_stop.wait(SEMANTIC_REFRESH_SECONDS):
+        try:
+            changed = catch_up()
+            if changed:
+                print(f"🔄 Semantic index caught up {changed} changed rows.")
+        except Exception as e:
+            print(f"⚠️ Semantic index catch-up failed: {e}")
+
+
+def _start_refresh():
+    global _refresh_thread
+    if SEMANTIC_REFRESH_SECONDS <= 0 or (_refresh_thread is not None and _refresh_thread.is_alive()):
+        return
+    _refresh_thread = threading.Thread(target=_refresh_loop, name="semantic-refresh", daemon=True)
+    _refresh_thread.start()
+
+
+def start_warm_up():
+    """
+    Runs warm_up() on a background thread so the server can accept requests
+    immediately. Safe to call more than once.
+    """
+    global _warm_up_thread, _warm_up_error
+    if _ready.is_set() or (_warm_up_thread is not None and _warm_up_thread.is_alive()):
+        return
+    _warm_up_error = None
+    _warm_up_thread = threading.Thread(target=warm_up, name="semantic-warm-up", daemon=True)
+    _warm_up_thread.start()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def status() -> dict:
+    """
+    Readiness details for the /semantic-search/ready endpoint.
+    """
+    return {
+        "ready": _ready.is_set(),
+        "warming_up": _warm_up_thread is not None and _warm_up_thread.is_alive(),
+        "model_loaded": model is not None,
+        "embedding_backend": EMBEDDING_BACKEND,
+        "index_loaded": index is not None,
+        "vectors": int(index.ntotal) if index is not None else 0,
+        "index_layout": index_layout(index)._asdict() if index is not None else None,
+        "tombstones": len(_tombstones),
+        "projection_rows": len(_projection),
+        "snapshot_version": snapshot_version,
+        "error": _warm_up_error,
+    }
+
+
+def normalize_query(query: str) -> str:
+    # The model is uncased, so case and spacing differences map to the same embedding
+    return " ".join(query.lower().split())
+
+
+def _embed_queries(queries) -> np.ndarray:
+    """
+    Embeddings for normalized queries, encoding only the ones not already cached.
+    """
+    embeddings = [embedding_cache.get(q) for q in queries]
+    missing = [pos for pos, emb in enumerate(embeddings) if emb is None]
+    if missing:
+        encoded = encode_texts(queries[pos] for pos in missing)
+        for pos, emb in zip(missing, encoded):
+            embeddings[pos] = emb
+            embedding_cache.set(queries[pos], emb)
+    return np.ascontiguousarray(np.vstack(embeddings), dtype="float32")
+
+
+def search_many(queries, top_k=5):
+    """
+    Encodes all queries in one batch and runs a single matrix search over the index.
+    Returns one list of (employee_id, distance) pairs per query, best match first.
+    Repeated queries are answered from the embedding and result caches.
+    Raises IndexNotReady until warm-up has finished.
+    """
+    if not _ready.is_set():
+        raise IndexNotReady("Semantic search is still warming up.")
+    queries = [normalize_query(q) for q in queries]
+    if not queries:
         return []
+    if index.ntotal == 0:
+        print("⚠️ Index is empty. Rebuild it using build_index().")
+        return [[] for _ in queries]
 
-    query_embedding = model.encode([query])
-    D, I = index.search(np.array(query_embedding).astype("float32"), top_k)
+    version = index_version
+    results = [result_cache.get((q, top_k, version)) for q in queries]
+    missing = [pos for pos, hits in enumerate(results) if hits is None]
+    if not missing:
+        return results
 
-    # Filter results to valid IDs
-    results = [id_map[i] for i in I[0] if 0 <= i < len(id_map)]
+    query_embeddings = _embed_queries([queries[pos] for pos in missing])
+    with _index_lock:
+        # Over-fetch by the tombstoned vectors, which may crowd out live ones;
+        # every live employee has exactly one live vector, so there are no duplicates
+        fetch_k = min(top_k + len(_tombstones), max(index.ntotal, 1))
+        D, I = _search_labels(index, _tombstones, query_embeddings, fetch_k)
+        version = index_version
+
+    for pos, distances, ids in zip(missing, D, I):
+        hits = []
+        for distance, emp_id in zip(distances.tolist(), ids.tolist()):
+            # -1 marks an empty slot (fewer vectors than asked for) or a tombstone
+            if emp_id < 0:
+                continue
+            hits.append((emp_id, distance))
+            if len(hits) == top_k:
+                break
+        results[pos] = hits
+        result_cache.set((queries[pos], top_k, version), hits)
     return results
+
+
+def project(employee_ids) -> dict:
+    """
+    Search-result fields for the given employee IDs, served from the in-memory
+    projection. IDs it doesn't know are left out; callers fall back to the DB.
+    """
+    with _index_lock:
+        rows = {emp_id: _projection.get(emp_id) for emp_id in employee_ids}
+    return {
+        emp_id: {"id": emp_id, **dict(zip(PROJECTION_FIELDS, row))}
+        for emp_id, row in rows.items()
+        if row is not None
+    }
+
+
+def similarity(distance: float) -> float:
+    """
+    Converts an index distance to a cosine similarity in [-1, 1]. MiniLM
+    embeddings are unit length, so squared L2 distance d = 2 - 2*cos.
+    """
+    return 1.0 - distance / 2.0
+
+
+def cache_stats() -> dict:
+    return {
+        "index_version": index_version,
+        "embedding_cache": embedding_cache.stats(),
+        "result_cache": result_cache.stats(),
+    }
+
+
+def semantic_search(query: str, top_k=5):
+    """
+    Performs a semantic search over the FAISS index.
+    Returns the top_k employee IDs based on query similarity.
+    Raises IndexNotReady until warm-up has finished.
+    """
+    return [emp_id for emp_id, _ in search_many([query], top_k)[0]]
@@ -0,0 +1,108 @@
+"""
+Benchmark: recall vs latency of the approximate index types against the flat baseline.
+
+Builds each index the same way semantic_index does (same factory strings and
+defaults), then sweeps the query-time knob (IVF nprobe, HNSW efSearch) and
+reports recall@k against exact flat search along with per-query latency.
+
+By default it uses synthetic clustered 384-d unit vectors. Pass --vectors with a
+.npy of real employee embeddings to tune on your own data.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_ann.py --rows 100000
+    PYTHONPATH=. python benchmarks/bench_ann.py --vectors embeddings.npy --k 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backend.utils import semantic_index
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    points = centers[rng.integers(0, clusters, n)] + 0.35 * rng.standard_normal((n, dim)).astype("float32")
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    return np.ascontiguousarray(points, dtype="float32")
+
+
+def build(layout, base: np.ndarray):
+    idx = semantic_index.new_index(layout, len(base))
+    if not idx.is_trained:
+        min_rows = semantic_index.min_train_rows(layout, len(base))
+        idx.train(base[:min(len(base), max(min_rows * 50, 10000))])
+    idx.add_with_ids(base, np.arange(len(base), dtype="int64"))
+    return idx
+
+
+def evaluate(idx, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        idx.search(q[None, :], k)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    _, found = idx.search(queries, k)
+    batch_seconds = time.perf_counter() - start
+
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "recall": recall,
+        "p50_ms": np.percentile(latencies_ms, 50),
+        "p99_ms": np.percentile(latencies_ms, 99),
+        "batch_qps": len(queries) / batch_seconds,
+    }
+
+
+def report(label: str, result: dict):
+    print(f"{label:<24} {result['recall']:>8.3f} {result['p50_ms']:>9.3f} "
+          f"{result['p99_ms']:>9.3f} {result['batch_qps']:>11.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--vectors", help="Optional .npy of real embeddings (rows x 384)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.vectors:
+        data = np.ascontiguousarray(np.load(args.vectors), dtype="float32")
+    else:
+        data = synthetic_vectors(args.rows + args.queries, semantic_index.EMBEDDING_DIM, args.clusters, args.seed)
+    base, queries = data[:-args.queries], data[-args.queries:]
+
+    print(f"rows={len(base)} queries={len(queries)} k={args.k}")
+    print(f"{'index':<24} {'recall':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'batch q/s':>11}")
+
+    IndexLayout = semantic_index.IndexLayout
+    flat = build(semantic_index.FLAT_LAYOUT, base)
+    _, truth = flat.search(queries, args.k)
+    report("flat (exact)", evaluate(flat, queries, truth, args.k))
+
+    start = time.perf_counter()
+    ivf = build(IndexLayout("ivf", "float", "none"), base)
+    print(f"  ivf build: {time.perf_counter() - start:.1f}s, nlist={semantic_index._ivf_nlist(len(base))}")
+    for nprobe in args.nprobe:
+        semantic_index.apply_search_params(ivf, nprobe=nprobe)
+        report(f"ivf nprobe={nprobe}", evaluate(ivf, queries, truth, args.k))
+
+    start = time.perf_counter()
+    hnsw = build(IndexLayout("hnsw", "float", "none"), base)
+    print(f"  hnsw build: {time.perf_counter() - start:.1f}s, M={semantic_index.HNSW_M}")
+    for ef in args.ef_search:
+        semantic_index.apply_search_params(hnsw, ef_search=ef)
+        report(f"hnsw efSearch={ef}", evaluate(hnsw, queries, truth, args.k))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: streaming semantic index rebuild on synthetic employees.
+
+Reports rows/sec and peak RSS for each corpus size. Every size runs in a fresh
+subprocess so the peak RSS numbers don't bleed into each other.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_build_index.py
+    PYTHONPATH=. python benchmarks/bench_build_index.py --sizes 10000 100000 --workers 4
+"""
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+Row = namedtuple("Row", "id name address pan_number aadhar_number contact_number")
+
+FIRST_NAMES = ["Ravi", "Suresh", "Anil", "Manoj", "Imran", "Gurpreet", "Venkat", "Arjun", "Kiran", "Sanjay"]
+LAST_NAMES = ["Kumar", "Singh", "Reddy", "Yadav", "Khan", "Patel", "Naidu", "Sharma", "Das", "Gill"]
+CITIES = ["Hyderabad", "Nagpur", "Vijayawada", "Pune", "Indore", "Ludhiana", "Surat", "Chennai", "Raipur", "Jaipur"]
+AREAS = ["Transport Nagar", "Truck Terminal", "NH44 Bypass", "Depot Road", "Logistics Park", "Ring Road"]
+
+
+def synthetic_chunks(total: int, chunk_size: int, seed: int = 42):
+    """
+    Yields lists of synthetic employee rows, one chunk at a time (like result.partitions()).
+    """
+    rng = random.Random(seed)
+    for start in range(0, total, chunk_size):
+        chunk = []
+        for emp_id in range(start + 1, min(start + chunk_size, total) + 1):
+            chunk.append(Row(
+                id=emp_id,
+                name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                address=f"{rng.randint(1, 999)} {rng.choice(AREAS)}, {rng.choice(CITIES)}",
+                pan_number=f"ABCDE{emp_id % 10000:04d}F",
+                aadhar_number=f"{emp_id:012d}",
+                contact_number=f"9{emp_id:09d}",
+            ))
+        yield chunk
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux; include spawned encode workers
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (own + children) / 1024
+
+
+def run_single(size: int, chunk_size: int, workers: int) -> dict:
+    from backend.utils import semantic_index
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    built = semantic_index.index_rows(synthetic_chunks(size, chunk_size), workers=workers)
+    elapsed = time.perf_counter() - start
+    assert built.ntotal == size
+
+    return {
+        "rows": size,
+        "chunk_size": chunk_size,
+        "workers": workers,
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(size / elapsed, 1),
+        "rss_after_model_mb": round(rss_before, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args.single, args.chunk_size, args.workers)))
+        return
+
+    print(f"{'rows':>10} {'workers':>8} {'seconds':>10} {'rows/sec':>10} {'peak RSS (MB)':>14}")
+    for size in args.sizes:
+        out = subprocess.run(
+            [sys.executable, __file__, "--single", str(size),
+             "--chunk-size", str(args.chunk_size), "--workers", str(args.workers)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{result['rows']:>10} {result['workers']:>8} {result['seconds']:>10} "
+              f"{result['rows_per_sec']:>10} {result['peak_rss_mb']:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: throughput and tail latency of the sync (psycopg2 + threadpool) vs
+async (asyncpg) database paths at high concurrency.
+
+Mounts two identical read endpoints on a throwaway FastAPI app, one on
+database.SessionLocal in a `def` route and one on database.AsyncSessionLocal in
+an `async def` route, and drives each in-process through httpx's ASGI transport
+with --concurrency requests in flight. --db-latency-ms adds a pg_sleep to every
+query to model a slower database or network, which is where the threadpool
+(40 workers by default) becomes the bottleneck for the sync path.
+
+Needs a reachable Postgres (DATABASE_URL / ASYNC_DATABASE_URL) with the
+employee_info table, and httpx (`pip install httpx`).
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_db_sync_vs_async.py --concurrency 200 --requests 5000
+    PYTHONPATH=. python benchmarks/bench_db_sync_vs_async.py --db-latency-ms 5
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from sqlalchemy import func, select
+
+from backend import database
+from backend.schema_models import EmployeeInfo
+
+
+def build_app(db_latency_ms: float) -> FastAPI:
+    app = FastAPI()
+    delay = db_latency_ms / 1000
+
+    def statement(emp_id: int):
+        stmt = select(EmployeeInfo.id, EmployeeInfo.name).where(EmployeeInfo.id == emp_id)
+        if delay:
+            stmt = stmt.add_columns(func.pg_sleep(delay))
+        return stmt
+
+    @app.get("/sync/{emp_id}")
+    def read_sync(emp_id: int):
+        db = database.SessionLocal()
+        try:
+            row = db.execute(statement(emp_id)).first()
+        finally:
+            db.close()
+        return {"id": row.id if row else None}
+
+    @app.get("/async/{emp_id}")
+    async def read_async(emp_id: int):
+        async with database.AsyncSessionLocal() as db:
+            row = (await db.execute(statement(emp_id))).first()
+        return {"id": row.id if row else None}
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, ids: np.ndarray, concurrency: int) -> dict:
+    latencies = []
+    queue = iter(ids)
+
+    async def worker(client: httpx.AsyncClient):
+        for emp_id in queue:
+            start = time.perf_counter()
+            response = await client.get(f"/{path}/{emp_id}")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": np.percentile(latencies_ms, 50),
+        "p95_ms": np.percentile(latencies_ms, 95),
+        "p99_ms": np.percentile(latencies_ms, 99),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    async with database.AsyncSessionLocal() as db:
+        max_id = (await db.execute(select(func.max(EmployeeInfo.id)))).scalar() or 1
+    ids = np.random.default_rng(args.seed).integers(1, max_id + 1, args.requests)
+
+    app = build_app(args.db_latency_ms)
+    # Warm both pools so connection setup isn't billed to either side
+    await drive(app, "sync", ids[:args.concurrency], args.concurrency)
+    await drive(app, "async", ids[:args.concurrency], args.concurrency)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, +{args.db_latency_ms} ms per query")
+    print(f"{'path':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for path in ("sync", "async"):
+        r = await drive(app, path, ids, args.concurrency)
+        print(f"{path:<8}{r['rps']:>10.0f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+
+    await database.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
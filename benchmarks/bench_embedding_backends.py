@@ -0,0 +1,80 @@
+"""
+Benchmark: PyTorch vs int8 ONNX embedding backends.
+
+For each backend reports single-query encode latency (p50/p95), batch
+throughput, and for the ONNX backend the drift against the PyTorch reference:
+cosine similarity between the two embeddings of the same text and the overlap
+of top-10 neighbours over the synthetic corpus.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_embedding_backends.py
+    SEMANTIC_ONNX_MODEL=./minilm-onnx SEMANTIC_ONNX_FILE=onnx/model_qint8_avx512_vnni.onnx \
+        PYTHONPATH=. python benchmarks/bench_embedding_backends.py --corpus 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_build_index import synthetic_chunks  # noqa: E402
+
+from backend.utils import embedding_backends, semantic_index  # noqa: E402
+
+QUERIES = [
+    "driver near Hyderabad", "expired license", "trucker from Nagpur depot",
+    "lives on NH44 bypass", "Gill from Ludhiana", "transport nagar Pune",
+]
+
+
+def time_single(encoder, texts, repeat: int) -> np.ndarray:
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        semantic_index.encode_texts([texts[i % len(texts)]], encoder)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = [semantic_index.employee_text(row) for chunk in synthetic_chunks(args.corpus, 1000) for row in chunk]
+    embeddings = {}
+
+    print(f"{'backend':<8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'texts/sec':>10}")
+    for backend in embedding_backends.BACKENDS:
+        encoder = embedding_backends.load_encoder(semantic_index.MODEL_NAME, backend)
+        semantic_index.encode_texts(QUERIES, encoder)  # warm-up
+
+        latencies = time_single(encoder, QUERIES, args.repeat)
+        start = time.perf_counter()
+        embeddings[backend] = semantic_index.encode_texts(corpus, encoder)
+        throughput = len(corpus) / (time.perf_counter() - start)
+
+        print(f"{backend:<8} {np.percentile(latencies, 50):>9.2f} {np.percentile(latencies, 95):>9.2f} {throughput:>10.0f}")
+
+    reference, candidate = embeddings["torch"], embeddings["onnx"]
+    cosine = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+
+    # Neighbour agreement: does the quantized model rank the same employees on top?
+    probe = min(200, len(corpus))
+    ref_top = np.argsort(-(reference[:probe] @ reference.T), axis=1)[:, 1:args.k + 1]
+    cand_top = np.argsort(-(candidate[:probe] @ candidate.T), axis=1)[:, 1:args.k + 1]
+    overlap = np.mean([len(set(r) & set(c)) / args.k for r, c in zip(ref_top, cand_top)])
+
+    print(f"\nonnx vs torch drift over {len(corpus)} texts:")
+    print(f"  cosine mean={cosine.mean():.4f} min={cosine.min():.4f} p1={np.percentile(cosine, 1):.4f}")
+    print(f"  top-{args.k} neighbour overlap={overlap:.3f}")
+
+
+if __name__ == "__main__":
+    main()
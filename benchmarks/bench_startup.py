@@ -0,0 +1,76 @@
+"""
+Benchmark: import time and RSS of the API processes, with an optional budget.
+
+Each app is imported in a fresh interpreter (median of --repeat runs). The run
+fails with exit code 1 when a budget is exceeded or when a heavy module
+(torch, faiss, sentence-transformers) gets imported eagerly, so it can gate CI.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_startup.py
+    PYTHONPATH=. python benchmarks/bench_startup.py --max-import-seconds 1.5 --max-rss-mb 150
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APPS = ["backend.main:app", "backend.admin.main:app"]
+HEAVY_MODULES = ["torch", "faiss", "sentence_transformers"]
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import importlib, json, resource, sys, time
+module_name, attr = sys.argv[1].split(":")
+start = time.perf_counter()
+app = getattr(importlib.import_module(module_name), attr)
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def measure(app: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, app],
+        cwd=REPO_ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-import-seconds", type=float, default=None)
+    parser.add_argument("--max-rss-mb", type=float, default=None)
+    parser.add_argument("--allow-heavy-imports", action="store_true")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'app':<26} {'import (s)':>11} {'RSS (MB)':>10}  heavy modules")
+    for app in APPS:
+        runs = [measure(app) for _ in range(args.repeat)]
+        seconds = statistics.median(r["seconds"] for r in runs)
+        rss = statistics.median(r["rss_mb"] for r in runs)
+        heavy = sorted({m for r in runs for m in r["heavy"]})
+        print(f"{app:<26} {seconds:>11.3f} {rss:>10.1f}  {', '.join(heavy) or '-'}")
+
+        if args.max_import_seconds is not None and seconds > args.max_import_seconds:
+            failures.append(f"{app}: import took {seconds:.3f}s (budget {args.max_import_seconds}s)")
+        if args.max_rss_mb is not None and rss > args.max_rss_mb:
+            failures.append(f"{app}: RSS {rss:.1f} MB (budget {args.max_rss_mb} MB)")
+        if heavy and not args.allow_heavy_imports:
+            failures.append(f"{app}: imported {', '.join(heavy)} at startup")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: latency of a cheap endpoint while large uploads are in flight.
+
+Mounts two upload endpoints on a throwaway FastAPI app, one that copies the
+upload with shutil.copyfileobj on the event loop (the old path) and one that
+uses file_utils.stream_to_disk, plus a /ping endpoint. For each upload path it
+keeps --uploads uploads of --size-mb running while probing /ping, and reports
+/ping p50/p99/max and the upload throughput. With the blocking copy /ping
+stalls for as long as each copy takes; with stream_to_disk it should stay at
+its idle latency.
+
+Needs httpx (`pip install httpx`); no database.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_upload_concurrency.py --size-mb 50 --uploads 4
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+import httpx
+import numpy as np
+from fastapi import FastAPI, File, UploadFile
+
+from backend.utils.file_utils import stream_to_disk
+
+
+def build_app(target_dir: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/blocking")
+    async def upload_blocking(file: UploadFile = File(...)):
+        path = os.path.join(target_dir, f"blocking-{id(file)}")
+        with open(path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        os.remove(path)
+        return {"ok": True}
+
+    @app.post("/streamed")
+    async def upload_streamed(file: UploadFile = File(...)):
+        stored = await stream_to_disk(file, os.path.join(target_dir, f"streamed-{id(file)}"), max_bytes=1 << 40)
+        os.remove(stored.path)
+        return {"size": stored.size}
+
+    return app
+
+
+async def run(client: httpx.AsyncClient, path: str, payload: bytes, uploads: int, rounds: int) -> dict:
+    done = asyncio.Event()
+    ping_ms = []
+
+    async def prober():
+        while not done.is_set():
+            start = time.perf_counter()
+            (await client.get("/ping")).raise_for_status()
+            ping_ms.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.005)
+
+    async def uploader():
+        for _ in range(rounds):
+            response = await client.post(f"/{path}", files={"file": ("blob.bin", payload)})
+            response.raise_for_status()
+
+    probe = asyncio.create_task(prober())
+    start = time.perf_counter()
+    await asyncio.gather(*(uploader() for _ in range(uploads)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe
+
+    ping = np.array(ping_ms)
+    return {
+        "ping_p50": np.percentile(ping, 50),
+        "ping_p99": np.percentile(ping, 99),
+        "ping_max": ping.max(),
+        "mb_s": len(payload) * uploads * rounds / elapsed / 1e6,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=50)
+    parser.add_argument("--uploads", type=int, default=4, help="concurrent uploads")
+    parser.add_argument("--rounds", type=int, default=3, help="uploads per uploader")
+    args = parser.parse_args()
+
+    payload = os.urandom(int(args.size_mb * 1024 * 1024))
+    with tempfile.TemporaryDirectory() as target_dir:
+        app = build_app(target_dir)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            print(f"{args.uploads} concurrent uploads of {args.size_mb} MB, {args.rounds} rounds each")
+            print(f"{'path':<10}{'ping p50':>10}{'ping p99':>10}{'ping max':>10}{'MB/s':>8}")
+            for path in ("blocking", "streamed"):
+                r = await run(client, path, payload, args.uploads, args.rounds)
+                print(f"{path:<10}{r['ping_p50']:>10.2f}{r['ping_p99']:>10.2f}{r['ping_max']:>10.2f}{r['mb_s']:>8.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+Benchmark: memory vs recall vs latency of the compressed vector storages.
+
+For every storage (float32, SQ8, PQ with a few sub-quantizer counts) and every
+re-rank option (none, fp16, exact float32), builds the index the same way
+semantic_index does and reports the serialized bytes per vector, recall@k
+against exact flat search and per-query latency.
+
+Re-ranking stores a second copy of the vectors, so its bytes/vector include
+that copy: "pq48 + flat" costs more memory than plain float32 and only makes
+sense when the compressed codes are what's kept hot (e.g. behind IVF).
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_vector_storage.py --rows 100000
+    PYTHONPATH=. python benchmarks/bench_vector_storage.py --kind ivf --pq-m 24 48 96
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_ann import build, evaluate, synthetic_vectors  # noqa: E402
+
+from backend.utils import semantic_index  # noqa: E402
+
+
+def bytes_per_vector(idx) -> float:
+    import faiss
+    return len(faiss.serialize_index(idx)) / idx.ntotal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--vectors", help="Optional .npy of real embeddings (rows x 384)")
+    parser.add_argument("--kind", default="flat", choices=["flat", "ivf", "hnsw"])
+    parser.add_argument("--pq-m", type=int, nargs="+", default=[24, 48, 96])
+    parser.add_argument("--rerank", nargs="+", default=["none", "fp16", "flat"])
+    parser.add_argument("--k-factor", type=int, default=semantic_index.RERANK_K_FACTOR)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.vectors:
+        data = np.ascontiguousarray(np.load(args.vectors), dtype="float32")
+    else:
+        data = synthetic_vectors(args.rows + args.queries, semantic_index.EMBEDDING_DIM, args.clusters, args.seed)
+    base, queries = data[:-args.queries], data[-args.queries:]
+
+    IndexLayout = semantic_index.IndexLayout
+    exact = build(semantic_index.FLAT_LAYOUT, base)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"rows={len(base)} queries={len(queries)} k={args.k} kind={args.kind} k_factor={args.k_factor}")
+    print(f"{'storage':<16} {'bytes/vec':>10} {'recall':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'build (s)':>10}")
+
+    storages = [("float", None)] + [("sq8", None)] + [("pq", m) for m in args.pq_m]
+    for storage, pq_m in storages:
+        for rerank in (["none"] if storage == "float" else args.rerank):
+            if pq_m is not None:
+                semantic_index.PQ_M = pq_m
+            layout = IndexLayout(args.kind, storage, rerank)
+
+            start = time.perf_counter()
+            idx = build(layout, base)
+            build_seconds = time.perf_counter() - start
+            semantic_index.apply_search_params(idx, k_factor=args.k_factor)
+
+            result = evaluate(idx, queries, truth, args.k)
+            label = f"{storage}{pq_m or ''}" + (f" + {rerank}" if rerank != "none" else "")
+            print(f"{label:<16} {bytes_per_vector(idx):>10.0f} {result['recall']:>8.3f} "
+                  f"{result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f} {build_seconds:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
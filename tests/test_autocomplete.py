@@ -0,0 +1,40 @@
+from backend.utils.autocomplete import PrefixIndex
+
+
+def _index():
+    index = PrefixIndex()
+    index.load([(1, "Gurpreet Singh"), (2, "Singh, Harpreet"), (3, "John  Doe")])
+    return index
+
+
+def test_matches_any_word_and_full_name():
+    index = _index()
+    assert [m["id"] for m in index.complete("SIN")] == [1, 2]
+    assert index.complete("john d") == [{"id": 3, "name": "John  Doe"}]
+    assert index.complete("  ") == []
+    assert index.complete("x") == []
+
+
+def test_limit_counts_employees_not_tokens():
+    index = PrefixIndex()
+    index.load([(1, "Sam Samson"), (2, "Samuel")])
+    assert [m["id"] for m in index.complete("sam", limit=2)] == [1, 2]
+
+
+def test_upsert_replaces_old_tokens():
+    index = _index()
+    index.upsert(3, "Jane Roe")
+    assert index.complete("doe") == []
+    assert index.complete("ro") == [{"id": 3, "name": "Jane Roe"}]
+    index.upsert(4, "Jane Austen")
+    assert [m["id"] for m in index.complete("jane")] == [3, 4]
+    assert [m["id"] for m in index.complete("jane r")] == [3]
+    assert len(index) == 4
+
+
+def test_remove():
+    index = _index()
+    index.remove(1)
+    index.remove(99)
+    assert [m["id"] for m in index.complete("singh")] == [2]
+    assert len(index) == 2
@@ -0,0 +1,39 @@
+import asyncio
+import hashlib
+import io
+import os
+
+from fastapi import UploadFile
+
+from backend.services import blob_store
+
+
+class CountingFile(io.BytesIO):
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def test_stage_upload_hashes_in_the_same_pass(monkeypatch, tmp_path):
+    monkeypatch.setattr(blob_store, "STAGING_DIR", str(tmp_path))
+    data = os.urandom(3 * 1024 * 1024 + 7)
+    source = CountingFile(data)
+
+    staged = asyncio.run(blob_store.stage_upload(UploadFile(source, filename="scan.pdf")))
+
+    assert staged.sha256 == hashlib.sha256(data).hexdigest()
+    assert staged.size == len(data)
+    assert open(staged.path, "rb").read() == data
+    assert source.bytes_read == len(data)
+
+
+def test_sha256_of_path(monkeypatch, tmp_path):
+    monkeypatch.setattr(blob_store, "BLOB_DIR", str(tmp_path))
+    sha256 = "ab" * 32
+    assert blob_store.sha256_of_path(str(tmp_path / "ab" / f"{sha256}-0f0f0f0f.pdf")) == sha256
+    assert blob_store.sha256_of_path("uploads/legacy/resume.pdf") is None
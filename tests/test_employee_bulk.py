@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.database import get_db
+from backend.routers import employee
+from backend.services import employee_bulk_service, employee_sync
+from tests.conftest import add_employee
+
+
+def test_import_indexes_after_the_response(monkeypatch):
+    inserted = [SimpleNamespace(id=1, name="Employee 1")]
+    report = {"total_rows": 1, "inserted": 1, "failed": 0}
+    indexed = []
+    monkeypatch.setattr(employee_bulk_service, "import_employees", lambda db, rows, schema: (report, inserted))
+    monkeypatch.setattr(employee_sync, "employees_changed", lambda rows: indexed.append(list(rows)))
+
+    app = FastAPI()
+    app.include_router(employee.router)
+    app.dependency_overrides[get_db] = lambda: None
+    with TestClient(app) as client:
+        response = client.post("/employees/bulk/import", files={"file": ("people.csv", b"name\n")})
+
+    assert response.status_code == 200, response.text
+    assert response.json() == report
+    assert indexed == [inserted]
+
+
+def _row(emp_id, **fields):
+    values = {
+        "name": f"Employee {emp_id}",
+        "pan_number": f"ABCDE{emp_id:04d}F",
+        "aadhar_number": f"{emp_id:012d}",
+        "contact_number": f"98{emp_id:08d}",
+        **fields,
+    }
+    return SimpleNamespace(**values)
+
+
+def test_report_conflicts(sqlite_db):
+    add_employee(sqlite_db, 1)
+    fresh, dup_in_table, dup_in_file = _row(2), _row(3, pan_number="ABCDE0001F"), _row(4, aadhar_number=f"{2:012d}")
+    batch = [(10, fresh), (11, dup_in_table), (12, dup_in_file)]
+    report = employee_bulk_service.ImportReport()
+
+    # Only row 10 was inserted; that is how the INSERT ... ON CONFLICT DO NOTHING would leave it
+    add_employee(sqlite_db, 2)
+    employee_bulk_service._report_conflicts(sqlite_db, batch, [fresh], report)
+
+    assert report.failed == 2
+    assert report.errors == [
+        {"row": 11, "error": "duplicate pan_number"},
+        {"row": 12, "error": "duplicate aadhar_number earlier in the upload"},
+    ]
+
+
+def _bulk_app(monkeypatch):
+    synced = []
+    monkeypatch.setattr(employee_sync, "employees_changed", lambda rows: synced.append(("changed", list(rows))))
+    monkeypatch.setattr(employee_sync, "employees_deleted", lambda ids: synced.append(("deleted", list(ids))))
+    app = FastAPI()
+    app.include_router(employee.router)
+    app.dependency_overrides[get_db] = lambda: None
+    return TestClient(app), synced
+
+
+def test_bulk_update_indexes_after_the_response(monkeypatch):
+    updated = [SimpleNamespace(id=1, name="Renamed")]
+    outcomes = [{"id": 1, "status": "updated"}, {"id": 2, "status": "not_found"}]
+    monkeypatch.setattr(employee_bulk_service, "update_employees", lambda db, changes: (outcomes, updated))
+    client, synced = _bulk_app(monkeypatch)
+
+    response = client.post("/employees/bulk/update", json=[{"id": 1, "name": "Renamed"}, {"id": 2, "name": "Nobody"}])
+
+    assert response.status_code == 200, response.text
+    assert response.json() == outcomes
+    assert synced == [("changed", updated)]
+
+
+def test_bulk_delete_unindexes_after_the_response(monkeypatch):
+    outcomes = [{"id": 1, "status": "deleted"}]
+    monkeypatch.setattr(employee_bulk_service, "delete_employees", lambda db, ids: (outcomes, [], [1]))
+    client, synced = _bulk_app(monkeypatch)
+
+    response = client.post("/employees/bulk/delete", json={"ids": [1]})
+
+    assert response.status_code == 200, response.text
+    assert synced == [("deleted", [1])]
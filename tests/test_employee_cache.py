@@ -0,0 +1,55 @@
+import asyncio
+
+from starlette.requests import Request
+
+from backend.utils import employee_cache
+
+
+def _request(headers=None) -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def _get(employee_id, load, headers=None):
+    return asyncio.run(employee_cache.cached_employee_response(_request(headers), "employee", employee_id, load))
+
+
+def test_hit_skips_load():
+    employee_cache.cache.clear()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return {"name": "A"}, 3
+
+    first = _get(1, load)
+    second = _get(1, load, {"If-None-Match": '"1-v3"'})
+
+    assert first.body == b'{"name": "A"}'
+    assert second.status_code == 304
+    assert calls == [1]
+
+
+def test_load_overlapping_an_invalidate_is_not_stored():
+    employee_cache.cache.clear()
+
+    async def stale_load():
+        # A write commits and invalidates while this read is in flight
+        employee_cache.invalidate(1)
+        return {"name": "before"}, 1
+
+    async def fresh_load():
+        return {"name": "after"}, 2
+
+    assert _get(1, stale_load).body == b'{"name": "before"}'
+    assert employee_cache.cache.get(("employee", 1)) is None
+    assert _get(1, fresh_load).headers["etag"] == '"1-v2"'
+    assert employee_cache.cache.get(("employee", 1)) is not None
+
+
+def test_invalidate_drops_every_namespace():
+    employee_cache.cache.clear()
+    for namespace in employee_cache.NAMESPACES:
+        employee_cache.cache.set((namespace, 1), (b"{}", '"1-v1"'))
+    employee_cache.invalidate("1")
+    assert len(employee_cache.cache) == 0
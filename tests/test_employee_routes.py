@@ -0,0 +1,113 @@
+from datetime import datetime
+
+from backend.schema_models import EmployeeInfo
+from backend.services import employee_search
+from backend.utils import semantic_index
+from tests.conftest import add_employee
+
+NEW_EMPLOYEE = {
+    "name": "Ravi Kumar",
+    "dob": "1990-04-01",
+    "address": "12 Lake Road, Hyderabad",
+    "contact": "9876543210",
+    "pan": "ABCDE1234F",
+    "aadhar": "123412341234",
+}
+
+
+def test_create_employee(employee_api, sqlite_db, monkeypatch):
+    indexed = []
+    monkeypatch.setattr(semantic_index, "upsert_employees", lambda employees: indexed.extend(employees))
+
+    response = employee_api.post("/employee/", json=NEW_EMPLOYEE)
+
+    assert response.status_code == 200, response.text
+    emp = sqlite_db.get(EmployeeInfo, response.json()["id"])
+    assert (emp.name, emp.date_of_birth.isoformat(), emp.pan_number) == ("Ravi Kumar", "1990-04-01", "ABCDE1234F")
+    assert [e.id for e in indexed] == [emp.id]  # the new row reaches the semantic index
+
+
+def test_create_employee_with_a_taken_identifier(employee_api):
+    assert employee_api.post("/employee/", json=NEW_EMPLOYEE).status_code == 200
+    response = employee_api.post("/employee/", json={**NEW_EMPLOYEE, "contact": "9000000000", "aadhar": "999999999999"})
+    assert response.status_code == 409
+
+
+def _expected_profile(emp_id: int) -> dict:
+    return {
+        "Trucker Name": f"Employee {emp_id}",
+        "date_of_birth": "1990-01-01",
+        "Home Address": f"{emp_id} Main Street",
+        "contact_number": f"98{emp_id:08d}",
+        "Driving License Number": f"ABCDE{emp_id:04d}F",
+        "aadhar_number": f"{emp_id:012d}",
+    }
+
+
+def test_lookup_by_pan(employee_api, sqlite_db):
+    add_employee(sqlite_db, 7)
+
+    response = employee_api.get("/employee/lookup", params={"q": "abcde 0007 f"})
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"matched_field": "pan_number", **_expected_profile(7), "id": 7}
+
+
+def test_lookup_by_contact_number_with_prefix(employee_api, sqlite_db):
+    add_employee(sqlite_db, 7)
+    response = employee_api.get("/employee/lookup", params={"q": "+91 98000-00007"})
+    assert response.json()["matched_field"] == "contact_number"
+    assert response.json()["id"] == 7
+
+
+def test_lookup_misses(employee_api, sqlite_db):
+    assert employee_api.get("/employee/lookup", params={"q": "ZZZZZ9999Z"}).status_code == 404
+    assert employee_api.get("/employee/lookup", params={"q": "driver"}).status_code == 400
+
+
+def test_search_employees(employee_api, sqlite_db, monkeypatch):
+    add_employee(sqlite_db, 7)
+    emp = sqlite_db.get(EmployeeInfo, 7)
+    searched = []
+
+    async def fuzzy_search(db, name, limit):
+        searched.append((name, limit))
+        return [(emp, 0.75)]
+
+    monkeypatch.setattr(employee_search, "fuzzy_search", fuzzy_search)
+
+    response = employee_api.get("/employee/search/", params={"name": "Employe 7", "limit": 5})
+
+    assert response.status_code == 200, response.text
+    assert response.json() == [{**_expected_profile(7), "id": 7, "score": 0.75}]
+    assert searched == [("Employe 7", 5)]
+
+
+def test_get_employee_etag_and_not_modified(employee_api, sqlite_db):
+    add_employee(sqlite_db, 7)
+
+    response = employee_api.get("/employee/7")
+    assert response.status_code == 200, response.text
+    assert response.json() == _expected_profile(7)
+    etag = response.headers["etag"]
+    assert etag == '"7-v1"'
+
+    cached = employee_api.get("/employee/7", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert employee_api.get("/employee/8").status_code == 404
+
+
+def test_list_employees_pages_with_cursor(employee_api, sqlite_db):
+    for emp_id in (3, 1, 2):
+        add_employee(sqlite_db, emp_id, created_at=datetime(2024, 1, emp_id))
+
+    first = employee_api.get("/employee/", params={"limit": 2})
+    assert first.status_code == 200, first.text
+    assert [row["Trucker Name"] for row in first.json()] == ["Employee 1", "Employee 2"]
+    assert first.json()[0] == _expected_profile(1)
+
+    second = employee_api.get("/employee/", params={"limit": 2, "cursor": first.headers["x-next-cursor"]})
+    assert [row["Trucker Name"] for row in second.json()] == ["Employee 3"]
+    assert "x-next-cursor" not in second.headers
+
+    assert employee_api.get("/employee/", params={"cursor": "not-a-cursor"}).status_code == 400
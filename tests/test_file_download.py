@@ -0,0 +1,40 @@
+import pytest
+
+from backend.utils.etags import if_none_match
+from backend.utils.file_download import _byte_range, _content_disposition, _Unsatisfiable
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=900-5000", (900, 999)),      # clamped to the last byte
+    ("bytes=-200", (800, 999)),          # suffix
+    ("bytes=-5000", (0, 999)),
+    (" Bytes = 5-5", (5, 5)),
+    ("items=0-10", None),                # other units
+    ("bytes=0-10,20-30", None),          # several ranges
+    ("bytes=10-5", None),                # backwards
+    ("bytes=-", None),
+    ("bytes=a-b", None),
+    ("bytes", None),
+])
+def test_byte_range(header, expected):
+    assert _byte_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header, size", [("bytes=1000-", 1000), ("bytes=-0", 1000), ("bytes=-10", 0)])
+def test_unsatisfiable_range(header, size):
+    with pytest.raises(_Unsatisfiable):
+        _byte_range(header, size)
+
+
+def test_if_none_match_is_weak():
+    assert if_none_match('W/"abc", "def"', '"abc"')
+    assert if_none_match("*", '"abc"')
+    assert not if_none_match('"abd"', '"abc"')
+    assert not if_none_match(None, '"abc"')
+
+
+def test_content_disposition_quotes_non_ascii_names():
+    assert _content_disposition("form16.pdf") == 'attachment; filename="form16.pdf"'
+    assert _content_disposition("पैन.pdf").startswith("attachment; filename*=utf-8''%E0")
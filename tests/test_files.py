@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from backend.routers import files
+from backend.schema_models import FileRecord
+from backend.utils.file_utils import StoredFile
+from tests.conftest import AsyncSessionAdapter
+
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+@pytest.fixture
+def clean_scan(monkeypatch):
+    async def verdict(db, stored):
+        return "clean"
+
+    monkeypatch.setattr(files, "_scan_verdict", verdict)
+
+
+def _register(db, file_type, filename="report.docx"):
+    stored = StoredFile("uploads/blobs/ab/abcd", 12, "ab" * 32)
+    return asyncio.run(files.register_file(AsyncSessionAdapter(db), stored, filename, file_type, "clerk"))
+
+
+def test_file_type_normalization():
+    assert files._file_type("a.pdf", "Text/Plain; charset=utf-8") == "text/plain"
+    assert files._file_type("a.pdf", None) == "application/pdf"
+    assert files._file_type("a.pdf", "x" * 200) == "application/pdf"
+    assert files._file_type("blob", "") == "application/octet-stream"
+
+
+def test_register_docx(sqlite_db, clean_scan):
+    out = _register(sqlite_db, DOCX)
+
+    assert out.file_type == DOCX
+    assert out.version == 1
+    assert sqlite_db.get(FileRecord, out.id).file_type == DOCX
+    assert _register(sqlite_db, DOCX).version == 2
+
+
+def test_unrepresentable_record_is_rolled_back(sqlite_db, clean_scan):
+    # FileOut needs a filename of 3+ characters; the insert alone would accept it
+    with pytest.raises(HTTPException) as raised:
+        _register(sqlite_db, DOCX, filename="a")
+
+    assert raised.value.status_code == 500
+    assert sqlite_db.query(FileRecord).count() == 0
+
+
+def test_failed_register_discards_created_blob(sqlite_db, clean_scan, tmp_path):
+    blob = tmp_path / "blob"
+    blob.write_bytes(b"new content")
+    stored = StoredFile(str(blob), 11, "ab" * 32)
+
+    with pytest.raises(HTTPException):
+        asyncio.run(files.register_file(AsyncSessionAdapter(sqlite_db), stored, "a", DOCX, "clerk", created=True))
+
+    assert not blob.exists()
+
+
+class FailingCommit(AsyncSessionAdapter):
+    def __init__(self, db, error):
+        super().__init__(db)
+        self.error = error
+
+    async def commit(self):
+        raise self.error
+
+
+@pytest.mark.parametrize("error, status_code", [
+    (IntegrityError("INSERT", {}, Exception("duplicate key")), 409),
+    (RuntimeError("connection lost"), 500),
+])
+def test_failed_attach_discards_created_blobs(sqlite_db, tmp_path, error, status_code):
+    from backend.routers import documents
+    from backend.schema_models import EmployeeDocuments
+
+    EmployeeDocuments.__table__.create(sqlite_db.get_bind())
+    created, shared = tmp_path / "created", tmp_path / "shared"
+    created.write_bytes(b"new")
+    shared.write_bytes(b"old")
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(documents.attach_documents(
+            FailingCommit(sqlite_db, error), 7, {"resume": str(created), "pan_card": str(shared)}, [str(created)]
+        ))
+
+    assert raised.value.status_code == status_code
+    assert not created.exists()
+    assert shared.exists()
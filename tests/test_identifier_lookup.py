@@ -0,0 +1,20 @@
+import pytest
+
+from backend.services.identifier_lookup import classify
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("ABCDE1234F", ("pan_number", "ABCDE1234F")),
+    ("abcde 1234 f", ("pan_number", "ABCDE1234F")),
+    ("1234 5678 9012", ("aadhar_number", "123456789012")),
+    ("98765-43210", ("contact_number", "9876543210")),
+    ("+91 98765 43210", ("contact_number", "9876543210")),
+    ("(0)9876543210", ("contact_number", "9876543210")),
+])
+def test_identifiers(query, expected):
+    assert classify(query) == expected
+
+
+@pytest.mark.parametrize("query", ["", None, "Ravi Kumar", "12345", "ABCDE12345", "19876543210", "+9198765"])
+def test_not_identifiers(query):
+    assert classify(query) is None
@@ -0,0 +1,20 @@
+from backend.routers.search import hydrate
+from tests.conftest import add_employee, employee
+
+
+def test_hydrate_drops_employees_deleted_since_they_were_indexed(semantic, sqlite_db):
+    semantic.index = semantic.new_index()
+    semantic.upsert_employees([employee(1), employee(2)])
+    add_employee(sqlite_db, 1)
+    add_employee(sqlite_db, 3, name="Not Indexed Yet")
+
+    # 2 was deleted through another process; 3 was added there
+    employees = hydrate([1, 2, 3], sqlite_db)
+
+    assert sorted(employees) == [1, 3]
+    assert employees[1]["name"] == "Employee 1"
+    assert employees[3]["name"] == "Not Indexed Yet"
+
+
+def test_hydrate_without_hits(semantic, sqlite_db):
+    assert hydrate([], sqlite_db) == {}
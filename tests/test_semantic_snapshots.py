@@ -0,0 +1,57 @@
+import os
+
+from tests.conftest import employee
+
+
+def _search_ids(semantic, text, top_k=5):
+    return [emp_id for emp_id, _ in semantic.search_many([text], top_k)[0]]
+
+
+def _snapshot_and_reload(semantic):
+    semantic.save_snapshot()
+    semantic.index = None
+    assert semantic.load_snapshot()
+    assert semantic._index_mmapped
+
+
+def test_upsert_and_remove_after_snapshot_load(semantic):
+    semantic.index = semantic.new_index()
+    semantic.upsert_employees([employee(i) for i in range(1, 21)])
+    _snapshot_and_reload(semantic)
+
+    # Both write paths on a mapped snapshot used to segfault the process
+    semantic.upsert_employees([employee(5, name="Renamed Person", address="Elsewhere")])
+    semantic.remove_employees([7])
+
+    assert not semantic._index_mmapped
+    assert semantic.index.ntotal == 19
+    assert _search_ids(semantic, "Renamed Person Elsewhere", 1) == [5]
+    assert 7 not in _search_ids(semantic, "Employee 7 7 Main Street", 19)
+    assert semantic.project([5, 7]) == {
+        5: {"id": 5, "name": "Renamed Person", "address": "Elsewhere", "contact_number": "9800000005"},
+    }
+
+
+def test_snapshot_survives_a_write_in_another_process(semantic):
+    semantic.index = semantic.new_index()
+    semantic.upsert_employees([employee(i) for i in range(1, 11)])
+    _snapshot_and_reload(semantic)
+    path = os.path.join(semantic.SNAPSHOT_DIR, semantic._read_manifest()["file"])
+    before = open(path, "rb").read()
+
+    semantic.upsert_employees([employee(3, name="Changed")])
+
+    # The private copy is written to, never the shared file
+    assert open(path, "rb").read() == before
+
+
+def test_catch_up_skips_rows_the_snapshot_already_has(semantic):
+    semantic.index = semantic.new_index()
+    semantic.upsert_employees([employee(i) for i in range(1, 6)])
+    _snapshot_and_reload(semantic)
+
+    rows = [employee(1), employee(2, name="New Name"), employee(9)]
+
+    assert [row.id for row in semantic._changed_rows(rows)] == [2, 9]
+    semantic.upsert_employees(semantic._changed_rows([employee(1), employee(3)]))
+    assert semantic._index_mmapped  # nothing changed, so the snapshot stays shared
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from backend.utils.semantic_index import IndexLayout
+from tests.conftest import employee
+
+# Layouts whose vectors can't be removed: updates and deletes leave tombstones behind
+NON_REMOVABLE_LAYOUTS = [
+    IndexLayout("hnsw", "float", "none"),
+    # Refine wrappers don't implement remove_ids either
+    IndexLayout("flat", "sq8", "flat"),
+    IndexLayout("flat", "pq", "fp16"),
+    # Removing from inverted lists would renumber the ID map but not the lists' labels
+    IndexLayout("ivf", "float", "none"),
+    IndexLayout("ivf", "sq8", "none"),
+    IndexLayout("ivf", "pq", "none"),
+]
+
+
+@pytest.fixture(params=NON_REMOVABLE_LAYOUTS, ids="/".join)
+def layout(request, semantic, monkeypatch):
+    # Make the configured layout the one choose_layout() picks, so snapshots of it load
+    monkeypatch.setattr(semantic, "INDEX_TYPE", request.param.kind)
+    monkeypatch.setattr(semantic, "VECTOR_STORAGE", request.param.storage)
+    monkeypatch.setattr(semantic, "RERANK", request.param.rerank)
+    monkeypatch.setattr(semantic, "ANN_MIN_ROWS", 0)
+    monkeypatch.setattr(semantic, "PQ_M", 8)  # few sub-quantizers keep PQ training quick
+    monkeypatch.setattr(semantic, "IVF_NLIST", 4)
+    monkeypatch.setattr(semantic, "IVF_NPROBE", 4)  # every list, so IVF results are exact
+    return request.param
+
+
+def _build(semantic, layout, count=20):
+    idx = semantic.new_index(layout, 1000)
+    assert not semantic.supports_remove(idx)
+    if not idx.is_trained:
+        base, _ = semantic._unwrap(idx)
+        if hasattr(base, "do_polysemous_training"):
+            base.do_polysemous_training = False  # codebook quality doesn't matter here, training time does
+        sample = np.random.default_rng(0).standard_normal((300, semantic.EMBEDDING_DIM)).astype("float32")
+        idx.train(sample / np.linalg.norm(sample, axis=1, keepdims=True))
+    semantic.index = idx
+    semantic.upsert_employees([employee(i) for i in range(1, count + 1)])
+
+
+def _hits(semantic, text, top_k=20):
+    return semantic.search_many([text], top_k)[0]
+
+
+def _old_text(emp_id):
+    return f"Employee {emp_id} {emp_id} Main Street"
+
+
+def test_upsert_retires_the_old_vector(semantic, layout):
+    _build(semantic, layout)
+    semantic.upsert_employees([employee(5, name="Renamed Person", address="Elsewhere")])
+
+    hits = _hits(semantic, _old_text(5))
+    ids = [emp_id for emp_id, _ in hits]
+    assert len(ids) == len(set(ids)) == 20
+    # Still listed once, but no longer an exact match for the text it had before
+    assert dict(hits)[5] > 0.5
+    assert _hits(semantic, "Renamed Person Elsewhere", 1)[0][0] == 5
+    assert len(semantic._tombstones) == 1
+
+
+def test_other_employees_keep_their_ids(semantic, layout):
+    _build(semantic, layout)
+    semantic.upsert_employees([employee(5, name="Renamed Person")])
+    semantic.remove_employees([7, 8])
+    semantic.upsert_employees([employee(21)])
+
+    for emp_id in (1, 6, 9, 15, 20, 21):
+        assert _hits(semantic, _old_text(emp_id), 1)[0][0] == emp_id
+    assert {7, 8}.isdisjoint(dict(_hits(semantic, _old_text(7))))
+
+
+def test_remove_then_recreate_does_not_revive_the_old_vector(semantic, layout):
+    _build(semantic, layout)
+    semantic.remove_employees([5])
+    assert 5 not in dict(_hits(semantic, _old_text(5)))
+
+    semantic.upsert_employees([employee(5, name="Back Again", address="New Town")])
+    assert dict(_hits(semantic, _old_text(5)))[5] > 0.5
+    assert _hits(semantic, "Back Again New Town", 1)[0][0] == 5
+
+
+def test_tombstones_fill_the_top_k(semantic, layout):
+    _build(semantic, layout)
+    semantic.upsert_employees([employee(i, name=f"Moved {i}") for i in range(1, 11)])
+
+    # Retired vectors are the closest matches here, yet top_k still comes back full
+    assert len(_hits(semantic, _old_text(3), 15)) == 15
+
+
+def test_replaced_vectors_count_toward_a_rebuild(semantic, layout, monkeypatch):
+    _build(semantic, layout)
+    monkeypatch.setattr(semantic, "TOMBSTONE_REBUILD_RATIO", 0.1)
+    semantic.upsert_employees([employee(i, name=f"Moved {i}") for i in range(1, 3)])
+    assert not semantic._rebuild_due()
+
+    semantic.upsert_employees([employee(i, name=f"Moved again {i}") for i in range(1, 3)])
+    assert semantic._rebuild_due()
+
+
+def test_tombstones_survive_a_snapshot(semantic, layout):
+    _build(semantic, layout)
+    semantic.upsert_employees([employee(5, name="Renamed Person")])
+    semantic.remove_employees([6])
+    semantic.save_snapshot()
+    semantic.index = None
+    assert semantic.load_snapshot()
+
+    assert 6 not in dict(_hits(semantic, _old_text(6)))
+    assert dict(_hits(semantic, _old_text(5)))[5] > 0.5
+    assert sorted(semantic._live_ids(semantic.index, semantic._tombstones).tolist()) == [i for i in range(1, 21) if i != 6]
+
+    # Writes after the load take a private copy and keep the tombstones lined up
+    semantic.upsert_employees([employee(5, name="Renamed Twice")])
+    assert _hits(semantic, "Renamed Twice 5 Main Street", 1)[0][0] == 5
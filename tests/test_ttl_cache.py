@@ -0,0 +1,46 @@
+from backend.utils import ttl_cache
+from backend.utils.ttl_cache import TTLCache
+
+
+def test_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+
+    now[0] = 104.9
+    assert cache.get("a") == 1
+    now[0] = 105.1
+    assert cache.get("a", "gone") == "gone"
+    assert len(cache) == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_stats_and_invalidate():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("a", None)  # a cached None still counts as a hit
+    cache.get("a")
+    cache.get("b")
+    cache.invalidate("a")
+    cache.invalidate("missing")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"], stats["size"]) == (1, 1, 0.5, 0)
+
+
+def test_zero_size_disables_caching():
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats()["hit_rate"] == 0.0
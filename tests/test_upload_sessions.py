@@ -0,0 +1,84 @@
+import asyncio
+import os
+
+import pytest
+
+from backend.services import upload_sessions
+from backend.services.upload_sessions import UploadBusy, UploadIncomplete, UploadSessionNotFound
+
+
+@pytest.fixture(autouse=True)
+def session_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(upload_sessions, "UPLOAD_SESSION_DIR", str(tmp_path / "sessions"))
+    monkeypatch.setattr(upload_sessions, "UPLOAD_SESSION_SWEEP_SECONDS", float("inf"))
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _uploaded(data: bytes) -> str:
+    session = await upload_sessions.create({"filename": "a.pdf", "size": len(data)})
+    await upload_sessions.append(session["upload_id"], 0, _chunks(data))
+    return session["upload_id"]
+
+
+def test_failed_finalize_keeps_the_session(tmp_path):
+    async def scenario():
+        upload_id = await _uploaded(b"hello")
+        destination = str(tmp_path / "staged" / "first")
+        with pytest.raises(RuntimeError):
+            async with upload_sessions.finalizing(upload_id, destination) as stored:
+                assert open(stored.path, "rb").read() == b"hello"
+                raise RuntimeError("commit failed")
+        assert not os.path.exists(destination)
+        assert (await upload_sessions.get(upload_id))["offset"] == 5
+
+        # A retry completes it and ends the session
+        destination = str(tmp_path / "staged" / "second")
+        async with upload_sessions.finalizing(upload_id, destination) as stored:
+            pass
+        assert open(destination, "rb").read() == b"hello"
+        assert len(stored.sha256) == 64
+        with pytest.raises(UploadSessionNotFound):
+            await upload_sessions.get(upload_id)
+        assert os.listdir(upload_sessions.UPLOAD_SESSION_DIR) == []
+
+    asyncio.run(scenario())
+
+
+def test_incomplete_upload_cannot_be_finalized(tmp_path):
+    async def scenario():
+        session = await upload_sessions.create({"filename": "a.pdf", "size": 10})
+        with pytest.raises(UploadIncomplete):
+            async with upload_sessions.finalizing(session["upload_id"], str(tmp_path / "staged")):
+                pass
+
+    asyncio.run(scenario())
+
+
+def test_session_is_locked_while_finalizing(tmp_path):
+    async def scenario():
+        upload_id = await _uploaded(b"hello")
+        async with upload_sessions.finalizing(upload_id, str(tmp_path / "staged")):
+            # The flock is per open file, so it holds against this worker's own requests too
+            with pytest.raises(UploadBusy):
+                await upload_sessions.append(upload_id, 5, _chunks(b"!"))
+            with pytest.raises(UploadBusy):
+                async with upload_sessions.finalizing(upload_id, str(tmp_path / "other")):
+                    pass
+            with pytest.raises(UploadBusy):
+                await upload_sessions.abort(upload_id)
+
+    asyncio.run(scenario())
+
+
+def test_unknown_session_leaves_no_lock_file():
+    async def scenario():
+        os.makedirs(upload_sessions.UPLOAD_SESSION_DIR)
+        with pytest.raises(UploadSessionNotFound):
+            await upload_sessions.abort("0" * 32)
+        assert os.listdir(upload_sessions.UPLOAD_SESSION_DIR) == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,49 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.database import get_async_db
+from backend.routers import uploads
+from backend.schema_models import EmployeeDocuments
+from backend.services import upload_sessions
+from tests.conftest import AsyncSessionAdapter, add_employee
+
+
+@pytest.fixture
+def uploads_api(sqlite_db, monkeypatch, tmp_path):
+    monkeypatch.setattr(upload_sessions, "UPLOAD_SESSION_DIR", str(tmp_path / "sessions"))
+    EmployeeDocuments.__table__.create(sqlite_db.get_bind())
+
+    async def get_test_db():
+        yield AsyncSessionAdapter(sqlite_db)
+
+    app = FastAPI()
+    app.include_router(uploads.router)
+    app.dependency_overrides[get_async_db] = get_test_db
+    with TestClient(app) as client:
+        yield client
+
+
+def _document_upload(employee_id):
+    return {"filename": "resume.pdf", "size": 10, "target": "document", "employee_id": employee_id, "document_type": "resume"}
+
+
+def test_document_upload_needs_an_existing_documents_record(uploads_api, sqlite_db):
+    add_employee(sqlite_db, 7)
+
+    response = uploads_api.post("/uploads", json=_document_upload(7))
+
+    # Refused before any bytes are sent: one document can't create the record
+    assert response.status_code == 409
+    assert "POST /documents/7" in response.json()["detail"]
+
+
+def test_document_upload_replacing_a_document(uploads_api, sqlite_db):
+    add_employee(sqlite_db, 7)
+    sqlite_db.add(EmployeeDocuments(employee_id=7, **{field: f"old/{field}.pdf" for field in uploads.documents.DOCUMENT_FIELDS}))
+    sqlite_db.commit()
+
+    response = uploads_api.post("/uploads", json=_document_upload(7))
+
+    assert response.status_code == 201, response.text
+    assert response.headers["upload-offset"] == "0"